@@ -0,0 +1,4 @@
+# api模块初始化文件
+from .app import app, create_app
+
+__all__ = ['app', 'create_app']
@@ -0,0 +1,26 @@
+"""
+启动 HTTP API 服务（需要安装 ASGI 服务器: pip install .[api]）。
+
+用法:
+    python -m api --host 0.0.0.0 --port 8600
+"""
+import sys
+import argparse
+from config import API_HOST, API_PORT
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="vlm-data-api", description="多模态数据管理平台 HTTP API")
+    parser.add_argument("--host", default=API_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=API_PORT, help="监听端口")
+    parser.add_argument("--log-level", default="info", help="日志级别")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("错误: 未安装 uvicorn，请执行 pip install .[api]", file=sys.stderr)
+        return 1
+    uvicorn.run("api.app:app", host=args.host, port=args.port, log_level=args.log_level)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import os
+import json
+from email.utils import formatdate
+from config import API_MAX_PAGE_SIZE, MEDIA_CACHE_MAX_AGE
+from services.dataset_service import DatasetService
+from services.group_service import GroupService
+from models import Dataset
+from utils import jsonl
+from utils import metrics
+from utils.database import get_db_connection, dataset_row_to_dict
+from utils.preview import read_lines, file_version
+from utils.media import (
+    RangeNotSatisfiable, resolve_sandboxed, guess_content_type, parse_range, iter_file_range,
+)
+from .http import (
+    App, Router, HTTPError, Response, StreamingResponse,
+    json_response, make_etag, not_modified,
+)
+
+router = Router()
+
+def _get_dataset_row(dataset_id: int) -> tuple:
+    cursor = get_db_connection().cursor()
+    cursor.execute(
+        f"SELECT {Dataset.COLUMNS} FROM datasets WHERE id = ?",
+        (dataset_id,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        raise HTTPError(404, "数据集不存在")
+    return row
+
+def _get_group(group_id: int) -> dict:
+    group = GroupService.get_group_details(group_id)
+    if not group:
+        raise HTTPError(404, "分组不存在")
+    return group
+
+@router.route("GET", "/api/health")
+def health(request):
+    return json_response(request, {"status": "ok", "json_backend": jsonl.BACKEND})
+
+@router.route("GET", "/metrics")
+def prometheus_metrics(request):
+    return Response(metrics.export_prometheus().encode("utf-8"), content_type="text/plain; version=0.0.4")
+
+@router.route("GET", "/api/datasets")
+def list_datasets(request):
+    """数据集列表，可用 ?tag=a&tag=b 按标签筛选（满足任一标签）"""
+    tags = request.args("tag")
+    datasets = DatasetService.list_datasets()
+    if tags:
+        datasets = [ds for ds in datasets if ds.has_any_tag(tags)]
+    return json_response(request, [ds.to_dict() for ds in datasets])
+
+@router.route("GET", "/api/datasets/{dataset_id:int}")
+def get_dataset(request, dataset_id):
+    return json_response(request, dataset_row_to_dict(_get_dataset_row(dataset_id)))
+
+@router.route("GET", "/api/datasets/{dataset_id:int}/stats")
+def get_dataset_stats(request, dataset_id):
+    ds = dataset_row_to_dict(_get_dataset_row(dataset_id))
+    return json_response(request, {
+        "total": ds["item_count"],
+        "text": ds["text_count"],
+        "single_image": ds["single_image_count"],
+        "multi_image": ds["multi_image_count"],
+        "video": ds["video_count"],
+    })
+
+@router.route("GET", "/api/datasets/{dataset_id:int}/items")
+def get_dataset_items(request, dataset_id):
+    """
+    分页读取数据：?offset=0&limit=100。
+    ETag 由数据文件的大小、修改时间与分页参数决定，命中时无需读取文件。
+    """
+    offset = request.arg("offset", 0, int)
+    limit = request.arg("limit", 100, int)
+    if offset < 0 or limit < 1 or limit > API_MAX_PAGE_SIZE:
+        raise HTTPError(400, f"offset 不能为负数，limit 取值范围为 1-{API_MAX_PAGE_SIZE}")
+    row = _get_dataset_row(dataset_id)
+    path, item_count = row[2], row[7]
+    version = file_version(path)
+    if version is None:
+        raise HTTPError(404, "数据文件不存在")
+    etag = make_etag("items", dataset_id, path, version, offset, limit)
+    if request.etag_matches(etag):
+        return not_modified(etag)
+
+    items = []
+    for i, line in enumerate(read_lines(path, offset, limit)):
+        entry = {"line_no": offset + i}
+        try:
+            entry["item"] = jsonl.loads(line)
+        except jsonl.DecodeError:
+            entry["item"] = None
+            entry["error"] = "JSON 解析失败"
+        items.append(entry)
+    return json_response(request, {
+        "dataset_id": dataset_id,
+        "offset": offset,
+        "limit": limit,
+        "total": item_count,
+        "items": items,
+    }, etag=etag)
+
+@router.route("GET", "/api/datasets/{dataset_id:int}/media")
+def get_media(request, dataset_id):
+    """
+    返回数据集根目录下的媒体文件：?path=相对路径。
+    支持 Range 请求（视频拖动进度时只读取需要的字节）、ETag/Last-Modified 与浏览器缓存。
+    """
+    rel_path = request.arg("path")
+    if not rel_path:
+        raise HTTPError(400, "缺少 path 参数")
+    row = _get_dataset_row(dataset_id)
+    try:
+        path = resolve_sandboxed(row[6], rel_path)
+    except PermissionError as e:
+        raise HTTPError(403, str(e))
+    try:
+        st = os.stat(path)
+    except OSError:
+        raise HTTPError(404, "媒体文件不存在")
+    if not os.path.isfile(path):
+        raise HTTPError(404, "媒体文件不存在")
+
+    size = st.st_size
+    etag = make_etag("media", path, size, st.st_mtime_ns)
+    cache_control = f"public, max-age={MEDIA_CACHE_MAX_AGE}"
+    if request.etag_matches(etag):
+        return not_modified(etag, cache_control)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(st.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+
+    # If-Range 与当前版本不一致时忽略 Range，返回完整文件
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(b"", status=416, headers={"content-range": f"bytes */{size}", **headers})
+
+    status = 200
+    start, end = 0, size - 1
+    if byte_range:
+        status = 206
+        start, end = byte_range
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+    headers["content-length"] = str(end - start + 1 if size else 0)
+    chunks = iter_file_range(path, start, end) if size else iter(())
+    return StreamingResponse(chunks, status=status, content_type=guess_content_type(path),
+                             headers=headers, compress=False)
+
+@router.route("GET", "/api/tags")
+def list_tags(request):
+    return json_response(request, DatasetService.get_all_unique_tags())
+
+@router.route("GET", "/api/groups")
+def list_groups(request):
+    return json_response(request, [group.to_dict() for group in GroupService.list_groups()])
+
+@router.route("GET", "/api/groups/{group_id:int}")
+def get_group(request, group_id):
+    """分组详情，datasets 字段为批量导入配置格式"""
+    group = _get_group(group_id)
+    group["datasets"] = GroupService.export_group_config(group_id)
+    return json_response(request, group)
+
+@router.route("GET", "/api/groups/{group_id:int}/stats")
+def get_group_stats(request, group_id):
+    _get_group(group_id)
+    return json_response(request, GroupService.get_group_stats(group_id))
+
+@router.route("GET", "/api/groups/{group_id:int}/export")
+def export_group(request, group_id):
+    """
+    以 NDJSON 流式导出分组内的全部数据，每行为 {"dataset": 名称, "line_no": 行号, "item": 数据}。
+    数据行不经解码直接拼接输出；?dedup=1 时只导出去重清单中保留的数据。
+    """
+    group = _get_group(group_id)
+    dedup = request.arg("dedup", "0") in ("1", "true")
+    config = GroupService.export_group_config(group_id) or {}
+    sources = [(name, cfg["annotation"], file_version(cfg["annotation"])) for name, cfg in config.items()]
+    missing = [name for name, _, version in sources if version is None]
+    if missing:
+        raise HTTPError(404, f"数据文件不存在: {', '.join(missing)}")
+
+    etag = make_etag("export", group_id, group["dataset_ids"], sources, dedup)
+    if request.etag_matches(etag):
+        return not_modified(etag)
+
+    keep = None
+    if dedup:
+        manifest = GroupService.export_dedup_manifest(group_id) or {}
+        keep = {name: set(entry["keep_lines"]) for name, entry in manifest.items()}
+
+    def chunks():
+        for name, path, _ in sources:
+            prefix = b'{"dataset":' + json.dumps(name, ensure_ascii=False).encode("utf-8") + b',"line_no":'
+            keep_lines = keep.get(name, set()) if keep is not None else None
+            with open(path, "rb") as f:
+                for line_no, line in enumerate(f):
+                    line = line.strip()
+                    if not line or (keep_lines is not None and line_no not in keep_lines):
+                        continue
+                    yield prefix + str(line_no).encode() + b',"item":' + line + b"}\n"
+
+    return StreamingResponse(chunks(), headers={"etag": etag, "cache-control": "no-cache"})
+
+def create_app(pool=None) -> App:
+    """创建 ASGI 应用，pool 默认使用进程内共享的数据库连接池"""
+    return App(router, pool)
+
+app = create_app()
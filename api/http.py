@@ -0,0 +1,258 @@
+import re
+import json
+import zlib
+import asyncio
+import hashlib
+import logging
+from urllib.parse import parse_qs
+from utils import metrics
+from utils.database import pooled_connection
+
+logger = logging.getLogger("vlm_data.api")
+
+# 小于该大小的响应不压缩
+GZIP_MIN_SIZE = 1024
+# 流式响应每次发送的数据块大小
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class HTTPError(Exception):
+    """处理函数中抛出，转换为对应状态码的 JSON 错误响应"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class Request:
+    """一次 HTTP 请求，headers 的键均为小写"""
+
+    def __init__(self, scope: dict):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        self.path_params = {}
+
+    def arg(self, name: str, default=None, type=str):
+        """读取查询参数，类型转换失败时返回 400"""
+        values = self.query.get(name)
+        if not values:
+            return default
+        try:
+            return type(values[-1])
+        except ValueError:
+            raise HTTPError(400, f"参数 {name} 格式错误")
+
+    def args(self, name: str) -> list:
+        """读取可重复的查询参数"""
+        return self.query.get(name, [])
+
+    def accepts_gzip(self) -> bool:
+        return "gzip" in self.headers.get("accept-encoding", "")
+
+    def etag_matches(self, etag: str) -> bool:
+        header = self.headers.get("if-none-match")
+        if not header:
+            return False
+        candidates = {tag.strip() for tag in header.split(",")}
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class Response:
+    def __init__(self, body: bytes = b"", status: int = 200, content_type: str = "application/json",
+                 headers: dict = None):
+        self.body = body
+        self.status = status
+        self.headers = {"content-type": content_type}
+        self.headers.update(headers or {})
+
+class StreamingResponse:
+    """
+    流式响应，chunks 为产生 bytes 的同步迭代器，在线程池中逐块读取，
+    适合导出大文件而不占用大量内存。
+    """
+
+    def __init__(self, chunks, status: int = 200, content_type: str = "application/x-ndjson",
+                 headers: dict = None, compress: bool = True):
+        self.chunks = chunks
+        self.status = status
+        # 媒体文件等已压缩或需要支持 Range 的内容不应再 gzip
+        self.compress = compress
+        self.headers = {"content-type": content_type}
+        self.headers.update(headers or {})
+
+def make_etag(*parts) -> str:
+    """根据任意可 repr 的内容生成强 ETag"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def not_modified(etag: str, cache_control: str = "no-cache") -> Response:
+    return Response(b"", status=304, headers={"etag": etag, "cache-control": cache_control})
+
+def json_response(request: Request, data, status: int = 200, etag: str = None,
+                  cache_control: str = "no-cache") -> Response:
+    """
+    返回 JSON 响应。未指定 etag 时按响应内容计算，
+    客户端带 If-None-Match 且匹配时返回 304，客户端支持时对较大的响应进行 gzip 压缩。
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = etag or make_etag(body)
+    if status == 200 and request.etag_matches(etag):
+        return not_modified(etag, cache_control)
+    headers = {"etag": etag, "cache-control": cache_control, "vary": "Accept-Encoding"}
+    if request.accepts_gzip() and len(body) >= GZIP_MIN_SIZE:
+        body = _gzip(body)
+        headers["content-encoding"] = "gzip"
+    return Response(body, status=status, headers=headers)
+
+def error_response(status: int, message: str) -> Response:
+    body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+    return Response(body, status=status)
+
+def _gzip(body: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+def _gzip_stream(chunks):
+    """逐块压缩，整个响应构成一个 gzip 流"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def _buffered(chunks, size: int = STREAM_CHUNK_SIZE):
+    """合并小数据块，减少发送次数"""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+_PARAM_RE = re.compile(r"\{(\w+)(?::(int))?\}")
+
+class Router:
+    """按方法与路径模板分发请求，模板形如 /api/datasets/{dataset_id:int}"""
+
+    def __init__(self):
+        self.routes = []
+
+    def route(self, method: str, pattern: str):
+        def decorator(handler):
+            self.add(method, pattern, handler)
+            return handler
+        return decorator
+
+    def add(self, method: str, pattern: str, handler) -> None:
+        converters = {}
+
+        def replace(match):
+            name, kind = match.group(1), match.group(2)
+            converters[name] = int if kind == "int" else str
+            return rf"(?P<{name}>\d+)" if kind == "int" else rf"(?P<{name}>[^/]+)"
+
+        regex = re.compile("^" + _PARAM_RE.sub(replace, pattern) + "$")
+        self.routes.append((method, pattern, regex, converters, handler))
+
+    def match(self, method: str, path: str):
+        """返回 (路径模板, 处理函数, 路径参数)；路径存在但方法不匹配时抛出 405"""
+        path_found = False
+        for route_method, pattern, regex, converters, handler in self.routes:
+            match = regex.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                path_found = True
+                continue
+            params = {k: converters[k](v) for k, v in match.groupdict().items()}
+            return pattern, handler, params
+        if path_found:
+            raise HTTPError(405, "不支持的请求方法")
+        raise HTTPError(404, "资源不存在")
+
+class App:
+    """
+    不依赖第三方框架的 ASGI 应用。
+    处理函数是普通的同步函数，在线程池中执行，执行期间从连接池借出独立的数据库连接，
+    因此服务层函数可以被多个请求并发调用。
+    """
+
+    def __init__(self, router: Router, pool=None):
+        self.router = router
+        self.pool = pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        request = Request(scope)
+        method = "GET" if request.method == "HEAD" else request.method
+        try:
+            pattern, handler, params = self.router.match(method, request.path)
+            request.path_params = params
+        except HTTPError as e:
+            await self._send(send, error_response(e.status, e.message), request)
+            return
+
+        with metrics.timer(f"api.{method} {pattern}"):
+            try:
+                response = await asyncio.to_thread(self._handle, handler, request)
+            except HTTPError as e:
+                response = error_response(e.status, e.message)
+            except Exception:
+                logger.exception(f"处理请求失败: {request.method} {request.path}")
+                response = error_response(500, "服务器内部错误")
+            await self._send(send, response, request)
+
+    def _handle(self, handler, request: Request):
+        with pooled_connection(self.pool):
+            return handler(request, **request.path_params)
+
+    async def _send(self, send, response, request: Request) -> None:
+        head_only = request.method == "HEAD"
+        if isinstance(response, StreamingResponse):
+            headers = dict(response.headers)
+            chunks = _buffered(response.chunks)
+            if response.compress and request.accepts_gzip():
+                headers["content-encoding"] = "gzip"
+                headers["vary"] = "Accept-Encoding"
+                chunks = _gzip_stream(chunks)
+            await send({"type": "http.response.start", "status": response.status,
+                        "headers": _encode_headers(headers)})
+            if head_only:
+                await send({"type": "http.response.body", "body": b""})
+                return
+            iterator = iter(chunks)
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers = dict(response.headers)
+        headers["content-length"] = str(len(response.body))
+        await send({"type": "http.response.start", "status": response.status,
+                    "headers": _encode_headers(headers)})
+        await send({"type": "http.response.body", "body": b"" if head_only else response.body})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+def _encode_headers(headers: dict) -> list:
+    return [(k.encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()]
@@ -0,0 +1,78 @@
+import json
+import zlib
+import asyncio
+from urllib.parse import urlsplit
+
+class TestResponse:
+    """测试客户端返回的响应，gzip 压缩的内容会自动解压到 content"""
+
+    def __init__(self, status_code: int, headers: dict, raw: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.raw = raw
+        if headers.get("content-encoding") == "gzip" and raw:
+            self.content = zlib.decompress(raw, 47)
+        else:
+            self.content = raw
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+class TestClient:
+    """
+    进程内调用 ASGI 应用的测试客户端，无需启动 HTTP 服务。
+    用法:
+        client = TestClient(create_app())
+        resp = client.get("/api/datasets", headers={"accept-encoding": "gzip"})
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method: str, url: str, headers: dict = None) -> TestResponse:
+        return asyncio.run(self._request(method, url, headers or {}))
+
+    def get(self, url: str, headers: dict = None) -> TestResponse:
+        return self.request("GET", url, headers)
+
+    def head(self, url: str, headers: dict = None) -> TestResponse:
+        return self.request("HEAD", url, headers)
+
+    async def _request(self, method: str, url: str, headers: dict) -> TestResponse:
+        parts = urlsplit(url)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode("utf-8"),
+            "query_string": parts.query.encode("utf-8"),
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80),
+        }
+        messages = []
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(scope, receive, send)
+
+        start = next(m for m in messages if m["type"] == "http.response.start")
+        response_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in start.get("headers", [])}
+        body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+        return TestResponse(start["status"], response_headers, body)
@@ -1,8 +1,12 @@
 import streamlit as st
 from app.navigation import setup_navigation
+from config import METRICS_TEXTFILE
+from utils import metrics
 
 def main():
     st.set_page_config(page_title="多模态数据管理平台", layout="wide")
+    if METRICS_TEXTFILE:
+        metrics.start_textfile_exporter(METRICS_TEXTFILE)
     setup_navigation()
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
 import streamlit as st
+from config import ENABLE_DIAGNOSTICS
+from utils import metrics
+from utils.database import connection_scope
 
 def show_home():
     st.title("多模态数据管理平台")
@@ -18,9 +21,19 @@ def setup_navigation():
             st.Page("../pages/3_预览数据集.py", title="预览数据集", icon="👁️"),
             st.Page("../pages/4_编辑数据集.py", title="编辑数据集", icon="✏️"),
             st.Page("../pages/5_分组管理.py", title="分组管理", icon="📑"),
+            st.Page("../pages/6_对比数据集.py", title="对比数据集", icon="🔀"),
+            st.Page("../pages/7_预览分组.py", title="预览分组", icon="🧩"),
         ]
     }
 
+    # 性能诊断页默认隐藏，设置 ENABLE_DIAGNOSTICS=1 后显示
+    if ENABLE_DIAGNOSTICS:
+        pages["系统"] = [
+            st.Page("../pages/9_性能诊断.py", title="性能诊断", icon="⏱️", url_path="diagnostics"),
+        ]
+
     # 使用 st.navigation 配置导航
     pg = st.navigation(pages)
-    pg.run()
+    # 每次页面运行使用一个数据库连接作用域，运行结束即归还连接
+    with metrics.timer(f"page.{pg.title}"), connection_scope():
+        pg.run()
@@ -0,0 +1 @@
+# benchmarks模块初始化文件
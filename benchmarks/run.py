@@ -0,0 +1,221 @@
+"""
+无需浏览器的性能基准测试：生成合成数据集，测量导入、预览、列表与分组统计的耗时，
+并将结果写为 JSON 以便不同版本之间对比。
+
+用法:
+    python -m benchmarks.run --items 20000 --catalog-size 200 --output bench.json
+    python -m benchmarks.run --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="多模态数据管理平台性能基准测试")
+    parser.add_argument("--items", type=int, default=20000, help="单个导入数据集的数据条数")
+    parser.add_argument("--batch-datasets", type=int, default=5, help="批量导入的数据集个数")
+    parser.add_argument("--batch-items", type=int, default=2000, help="批量导入中每个数据集的数据条数")
+    parser.add_argument("--catalog-size", type=int, default=200, help="列表与分组测试使用的数据集总数")
+    parser.add_argument("--images", type=int, default=1000, help="生成的占位图片数量")
+    parser.add_argument("--videos", type=int, default=100, help="生成的占位视频数量")
+    parser.add_argument("--type-mix", default="text=0.25,image=0.4,multi-image=0.2,video=0.15",
+                        help="数据类型比例，例如 text=0.5,image=0.5")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试重复次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--workdir", default=None, help="工作目录（默认使用临时目录，结束后删除）")
+    parser.add_argument("--keep", action="store_true", help="保留工作目录")
+    parser.add_argument("--output", default=None, help="结果 JSON 输出路径（默认输出到标准输出）")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="对比两次运行的结果文件")
+    return parser.parse_args(argv)
+
+def parse_type_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def summarize(samples: list) -> dict:
+    return {
+        "runs": len(samples),
+        "min_s": round(min(samples), 6),
+        "median_s": round(statistics.median(samples), 6),
+        "mean_s": round(statistics.mean(samples), 6),
+        "max_s": round(max(samples), 6),
+    }
+
+def silence_streamlit_logs():
+    """无 Streamlit 运行时执行时会产生大量 bare mode 警告，基准测试中屏蔽"""
+    try:
+        from streamlit import config as st_config
+        from streamlit.logger import set_log_level
+    except ImportError:
+        return
+    # 先写入配置项，避免配置延迟解析时把日志级别重置为默认值
+    st_config.set_option("logger.level", "error")
+    set_log_level("error")
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """重复执行 fn 并统计耗时，setup 在每次计时前执行且不计入耗时"""
+    samples = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def run_benchmarks(args) -> dict:
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="vlm_bench_"))
+    os.makedirs(workdir, exist_ok=True)
+    # 必须在导入项目模块之前设置，config 在导入时读取环境变量
+    os.environ["DATABASE_URL"] = os.path.join(workdir, "bench.db")
+    os.environ["UPLOAD_FOLDER"] = os.path.join(workdir, "uploads")
+
+    from benchmarks.synthetic import generate_media_tree, generate_jsonl
+    from config import ITEMS_PER_PAGE
+    from services.dataset_service import DatasetService
+    from services.group_service import GroupService
+    from utils import jsonl, metrics
+    from utils.database import load_all_datasets
+    from utils.line_index import clear_line_index_cache
+    from utils.render import clear_render_cache
+    from pages.components.preview import preview_dataset
+    silence_streamlit_logs()
+
+    results = {}
+    try:
+        type_mix = parse_type_mix(args.type_mix)
+        media_root = os.path.join(workdir, "media")
+        images, videos = generate_media_tree(media_root, args.images, args.videos)
+        data_dir = os.path.join(workdir, "data")
+
+        # 单个数据集导入
+        main_file = generate_jsonl(os.path.join(data_dir, "main.jsonl"), args.items, images, videos,
+                                   type_mix, seed=args.seed)
+        imported = []
+
+        def import_single(i):
+            ok, msg, ds_id = DatasetService.import_jsonl_dataset(
+                f"bench_import_{i}", media_root, main_file, reuse_existing=False
+            )
+            if not ok:
+                raise RuntimeError(msg)
+            imported.append(ds_id)
+
+        results["import_jsonl_dataset"] = measure(import_single, args.repeat)
+
+        def import_reuse(i):
+            DatasetService.import_jsonl_dataset(f"bench_reuse_{i}", media_root, main_file)
+
+        results["import_jsonl_dataset_reuse"] = measure(import_reuse, args.repeat)
+
+        # 批量导入
+        batch_files = [
+            generate_jsonl(os.path.join(data_dir, f"batch_{j}.jsonl"), args.batch_items, images, videos,
+                           type_mix, seed=args.seed + j + 1)
+            for j in range(args.batch_datasets)
+        ]
+
+        def batch_import(i):
+            config = {
+                f"bench_batch_{i}_{j}": {"root": media_root, "annotation": path}
+                for j, path in enumerate(batch_files)
+            }
+            ok, msg, _ = DatasetService.batch_import_datasets(config, reuse_existing=False)
+            if not ok:
+                raise RuntimeError(msg)
+
+        results["batch_import_datasets"] = measure(batch_import, args.repeat)
+
+        # 预览：首页（冷/热缓存）与深分页
+        preview_id = imported[0]
+        deep_page = max(0, (args.items - 1) // ITEMS_PER_PAGE)
+        # 固定每页条数，不受按类型自适应的页大小影响，便于与历史结果对比
+        def preview(page):
+            preview_dataset(preview_id, page, page_size=ITEMS_PER_PAGE)
+
+        def clear_preview_caches(i):
+            clear_line_index_cache()
+            clear_render_cache()
+
+        results["preview_first_page_cold"] = measure(lambda i: preview(0), args.repeat, setup=clear_preview_caches)
+        results["preview_first_page_warm"] = measure(lambda i: preview(0), args.repeat)
+        results["preview_deep_page_warm"] = measure(lambda i: preview(deep_page), args.repeat)
+
+        # 补齐数据集目录，列表与分组测试使用 catalog-size 个数据集
+        existing = len(DatasetService.get_dataset_names())
+        for j in range(existing, args.catalog_size):
+            DatasetService.import_jsonl_dataset(f"bench_catalog_{j}", media_root, batch_files[j % len(batch_files)])
+        DatasetService.clear_cache()
+        catalog_ids = [ds_id for ds_id, _ in DatasetService.get_dataset_names()]
+
+        results["load_all_datasets_cold"] = measure(
+            lambda i: load_all_datasets(), args.repeat,
+            setup=lambda i: load_all_datasets.clear()
+        )
+        results["load_all_datasets_warm"] = measure(lambda i: load_all_datasets(), args.repeat)
+
+        ok, msg = GroupService.create_dataset_group("bench_group", catalog_ids)
+        if not ok:
+            raise RuntimeError(msg)
+        group_id = GroupService.get_all_groups()[-1][0]
+        results["get_group_stats"] = measure(lambda i: GroupService.get_group_stats(group_id), args.repeat)
+
+        return {
+            "meta": {
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "json_backend": jsonl.BACKEND,
+                "catalog_size": len(catalog_ids),
+            },
+            "params": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+            "results": results,
+            "metrics": metrics.snapshot()["operations"],
+        }
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(old_path: str, new_path: str) -> str:
+    """对比两次结果的中位数耗时，返回文本表格"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)["results"]
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    lines = [f"{'benchmark':<32}{'old(s)':>12}{'new(s)':>12}{'ratio':>10}"]
+    for name in sorted(set(old) | set(new)):
+        o = old.get(name, {}).get("median_s")
+        n = new.get(name, {}).get("median_s")
+        ratio = f"{n / o:.2f}x" if o and n is not None else "-"
+        lines.append(f"{name:<32}{o if o is not None else '-':>12}{n if n is not None else '-':>12}{ratio:>10}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        print(compare(*args.compare))
+        return 0
+
+    report = run_benchmarks(args)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        for name, stats in report["results"].items():
+            print(f"{name:<32}{stats['median_s']:>12.4f}s")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
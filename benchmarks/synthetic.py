@@ -0,0 +1,84 @@
+import os
+import json
+import random
+
+# 最小合法 PNG（1x1 像素），用作占位媒体文件
+_PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+_MP4_BYTES = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+
+_WORDS = (
+    "图片 视频 描述 内容 场景 人物 物体 颜色 位置 动作 the a cat dog car street "
+    "red blue left right image video scene describe what where how many"
+).split()
+
+DEFAULT_TYPE_MIX = {
+    "text": 0.25,
+    "image": 0.4,
+    "multi-image": 0.2,
+    "video": 0.15,
+}
+
+def generate_media_tree(root: str, num_images: int, num_videos: int) -> tuple[list, list]:
+    """在 root 下生成占位图片和视频文件，返回 (图片相对路径列表, 视频相对路径列表)"""
+    images, videos = [], []
+    for i in range(num_images):
+        rel = os.path.join("images", f"{i // 1000:03d}", f"{i:07d}.png")
+        os.makedirs(os.path.join(root, os.path.dirname(rel)), exist_ok=True)
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(_PNG_BYTES)
+        images.append(rel)
+    for i in range(num_videos):
+        rel = os.path.join("videos", f"{i // 1000:03d}", f"{i:07d}.mp4")
+        os.makedirs(os.path.join(root, os.path.dirname(rel)), exist_ok=True)
+        with open(os.path.join(root, rel), "wb") as f:
+            f.write(_MP4_BYTES)
+        videos.append(rel)
+    return images, videos
+
+def _conversation(rng: random.Random, turns: int, num_media: int, placeholder: str, text_len: int) -> list:
+    conversations = []
+    for turn in range(turns):
+        prompt = " ".join(rng.choice(_WORDS) for _ in range(max(1, text_len // 12)))
+        if turn == 0 and num_media:
+            prompt = "\n".join([placeholder] * num_media) + "\n" + prompt
+        answer = " ".join(rng.choice(_WORDS) for _ in range(max(1, text_len // 6)))
+        conversations.append({"from": "human", "value": prompt})
+        conversations.append({"from": "gpt", "value": answer})
+    return conversations
+
+def generate_item(rng: random.Random, idx: int, data_type: str, images: list, videos: list,
+                  max_turns: int = 3, text_len: int = 120) -> dict:
+    """生成单条 ShareGPT 扩展格式数据"""
+    turns = rng.randint(1, max_turns)
+    item = {"id": idx}
+    if data_type == "image" and images:
+        item["image"] = rng.choice(images)
+        item["conversations"] = _conversation(rng, turns, 1, "<image>", text_len)
+    elif data_type == "multi-image" and images:
+        count = rng.randint(2, 4)
+        item["image"] = [rng.choice(images) for _ in range(count)]
+        item["conversations"] = _conversation(rng, turns, count, "<image>", text_len)
+    elif data_type == "video" and videos:
+        item["video"] = [rng.choice(videos)]
+        item["conversations"] = _conversation(rng, turns, 1, "<video>", text_len)
+    else:
+        item["conversations"] = _conversation(rng, turns, 0, "", text_len)
+    return item
+
+def generate_jsonl(path: str, num_items: int, images: list, videos: list,
+                   type_mix: dict = None, seed: int = 0, **item_kwargs) -> str:
+    """按类型比例生成合成 JSONL 数据集，返回文件路径"""
+    type_mix = type_mix or DEFAULT_TYPE_MIX
+    types = list(type_mix)
+    weights = [type_mix[t] for t in types]
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for idx in range(num_items):
+            data_type = rng.choices(types, weights)[0]
+            item = generate_item(rng, idx, data_type, images, videos, **item_kwargs)
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    return path
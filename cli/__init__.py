@@ -0,0 +1 @@
+# cli模块初始化文件
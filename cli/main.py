@@ -0,0 +1,486 @@
+"""
+vlm-data 命令行工具：在不启动 Web 界面的情况下批量导入、刷新、校验、统计和导出数据集。
+
+用法:
+    vlm-data import NAME --root /data/images --annotation train.jsonl
+    vlm-data batch-import config.json --jobs 8 --group my_group
+    vlm-data refresh --all --jobs 4
+    vlm-data validate 1 2 my_dataset
+    vlm-data keyframes --all --jobs 8
+    vlm-data delete my_dataset
+    vlm-data gc --budget-mb 20480 --dry-run
+    vlm-data stats --json
+    vlm-data group create my_group 1 2 3
+    vlm-data group export my_group -o group.json
+    vlm-data sample my_dataset -n 20 --type image
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DATA_TYPES = ("text", "image", "multi-image", "video")
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="vlm-data", description="多模态数据管理平台命令行工具")
+    parser.add_argument("--db", help="数据库文件路径或地址（默认读取 DATABASE_URL）")
+    parser.add_argument("--upload-dir", help="数据存储目录（默认读取 UPLOAD_FOLDER）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出结果")
+    sub = parser.add_subparsers(dest="command", metavar="COMMAND")
+    sub.required = True
+
+    p = sub.add_parser("import", help="导入单个 JSONL 数据集")
+    p.add_argument("name", help="数据集名称")
+    p.add_argument("--root", required=True, help="媒体文件根目录")
+    p.add_argument("--annotation", required=True, help="JSONL 数据文件路径")
+    p.add_argument("--no-reuse", action="store_true", help="不复用内容相同的已有数据集")
+    p.add_argument("--max-errors", type=int, default=None,
+                   help="允许跳过的无法解析的行数，-1 为不限（默认读取 IMPORT_MAX_ERRORS）")
+
+    p = sub.add_parser("batch-import", help="按批量导入配置文件导入多个数据集")
+    p.add_argument("config", help='配置文件路径，格式为 {"名称": {"root": ..., "annotation": ...}}')
+    p.add_argument("--jobs", "-j", type=int, default=1, help="并行导入的进程数")
+    p.add_argument("--group", help="导入完成后用成功导入的数据集创建分组")
+    p.add_argument("--no-reuse", action="store_true", help="不复用内容相同的已有数据集")
+    p.add_argument("--max-errors", type=int, default=None,
+                   help="允许跳过的无法解析的行数，-1 为不限（默认读取 IMPORT_MAX_ERRORS）")
+
+    p = sub.add_parser("refresh", help="重新统计数据集的数据量与类型分布")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="刷新全部数据集")
+    p.add_argument("--jobs", "-j", type=int, default=1, help="并行处理的进程数")
+
+    p = sub.add_parser("validate", help="校验数据文件、JSON 格式与媒体文件引用")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="校验全部数据集")
+    p.add_argument("--skip-media", action="store_true", help="不检查媒体文件是否存在")
+    p.add_argument("--jobs", "-j", type=int, default=1, help="并行处理的进程数")
+
+    p = sub.add_parser("check-schema", help="按数据格式规范校验对话结构、角色交替与媒体占位符，保存逐规则违规统计")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="校验全部数据集")
+    p.add_argument("--jobs", "-j", type=int, default=None, help="并行校验的进程数")
+
+    p = sub.add_parser("media-profile", help="只读取图片文件头，统计图片格式、分辨率、宽高比与文件大小分布")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="统计全部数据集")
+    p.add_argument("--group", help="统计分组内全部数据集的合计分布（分组 ID 或名称）")
+    p.add_argument("--force", action="store_true", help="忽略已缓存的图片元信息重新读取")
+    p.add_argument("--jobs", "-j", type=int, default=None, help="读取文件头的线程数（默认读取 MEDIA_PROFILE_WORKERS）")
+
+    p = sub.add_parser("disk-usage", help="统计数据集引用的媒体文件与数据副本的存储占用")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="统计全部数据集")
+    p.add_argument("--group", help="统计分组的存储占用（共用的文件只计一次）")
+    p.add_argument("--force", action="store_true", help="重新统计已统计过的数据集")
+    p.add_argument("--jobs", "-j", type=int, default=None, help="并发扫描目录的线程数（默认读取 DISK_USAGE_WORKERS）")
+
+    p = sub.add_parser("delete", help="删除数据集（同时从分组中移除，并删除不再被引用的存储副本）")
+    p.add_argument("datasets", nargs="+", help="数据集 ID 或名称")
+    p.add_argument("--keep-files", action="store_true", help="只删除数据库记录，保留存储目录中的文件")
+
+    p = sub.add_parser("gc", help="回收孤立的上传目录与缓存文件，按容量上限淘汰最久未使用的派生文件")
+    p.add_argument("--budget-mb", type=int, default=None,
+                   help="行偏移索引、列式副本与关键帧的容量上限（MB，默认读取 GC_DERIVED_BUDGET_MB，0 为不限）")
+    p.add_argument("--grace-hours", type=float, default=None,
+                   help="修改时间在该小时数以内的文件不视为孤立文件（默认读取 GC_GRACE_HOURS）")
+    p.add_argument("--dry-run", action="store_true", help="只列出可回收的文件，不删除")
+
+    p = sub.add_parser("keyframes", help="为数据集中的视频生成封面与关键帧缓存（需要 ffmpeg 或 PyAV）")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称")
+    p.add_argument("--all", action="store_true", help="处理全部数据集")
+    p.add_argument("--force", action="store_true", help="忽略已有缓存重新生成")
+    p.add_argument("--jobs", "-j", type=int, default=None, help="并发抽帧的线程数")
+
+    p = sub.add_parser("stats", help="查看数据集或分组的统计信息")
+    p.add_argument("datasets", nargs="*", help="数据集 ID 或名称（默认全部）")
+    p.add_argument("--group", help="查看分组统计（分组 ID 或名称）")
+
+    p = sub.add_parser("group", help="分组管理")
+    group_sub = p.add_subparsers(dest="group_command", metavar="ACTION")
+    group_sub.required = True
+    group_sub.add_parser("list", help="列出所有分组")
+    gp = group_sub.add_parser("create", help="创建分组")
+    gp.add_argument("name", help="分组名称")
+    gp.add_argument("datasets", nargs="+", help="数据集 ID 或名称")
+    gp = group_sub.add_parser("export", help="导出分组为批量导入配置")
+    gp.add_argument("group", help="分组 ID 或名称")
+    gp.add_argument("--dedup", action="store_true", help="导出去重清单（附带保留的行号）")
+    gp.add_argument("--minhash", action="store_true", help="去重时额外检测近似重复")
+    gp.add_argument("--jobs", "-j", type=int, default=None, help="计算去重签名的进程数")
+    gp.add_argument("--output", "-o", help="输出文件路径（默认输出到标准输出）")
+
+    p = sub.add_parser("sample", help="随机抽样数据，按 JSONL 输出")
+    p.add_argument("dataset", help="数据集 ID 或名称")
+    p.add_argument("-n", type=int, default=10, help="抽样条数")
+    p.add_argument("--seed", type=int, default=None, help="随机种子")
+    p.add_argument("--type", choices=DATA_TYPES, help="只抽样指定类型的数据")
+    p.add_argument("--output", "-o", help="输出文件路径（默认输出到标准输出）")
+    return parser
+
+class CliError(Exception):
+    """命令行参数或引用错误，直接输出消息并以非零状态退出"""
+
+def configure_env(args) -> None:
+    """config 在导入时读取环境变量，必须在导入项目模块之前调用"""
+    if args.db:
+        # 数据库地址（如 postgresql://...）原样使用，文件路径转换为绝对路径
+        os.environ["DATABASE_URL"] = args.db if "://" in args.db else os.path.abspath(args.db)
+    if args.upload_dir:
+        os.environ["UPLOAD_FOLDER"] = os.path.abspath(args.upload_dir)
+
+def resolve_datasets(refs: list, all_datasets: bool = False) -> list:
+    """将数据集 ID 或名称解析为 [(id, name), ...]"""
+    from services.dataset_service import DatasetService
+    names = DatasetService.get_dataset_names()
+    if all_datasets:
+        return list(names)
+    if not refs:
+        raise CliError("请指定数据集 ID 或名称，或使用 --all")
+    by_id = {str(ds_id): (ds_id, name) for ds_id, name in names}
+    by_name = {name: (ds_id, name) for ds_id, name in names}
+    result = []
+    for ref in refs:
+        ds = by_name.get(ref) or by_id.get(ref)
+        if ds is None:
+            raise CliError(f"数据集不存在: {ref}")
+        result.append(ds)
+    return result
+
+def resolve_group(ref: str) -> int:
+    """将分组 ID 或名称解析为分组 ID"""
+    from services.group_service import GroupService
+    for group_id, name, _, _ in GroupService.get_all_groups():
+        if name == ref or str(group_id) == ref:
+            return group_id
+    raise CliError(f"分组不存在: {ref}")
+
+def run_parallel(fn, tasks: list, jobs: int) -> list:
+    """
+    在进程池中执行 fn(*task)，按任务顺序返回结果。
+    使用 spawn 启动子进程，避免 fork 继承父进程中已打开的数据库连接；
+    子进程通过环境变量拿到与父进程相同的数据库与存储目录。
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [fn(*task) for task in tasks]
+    results = [None] * len(tasks)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), mp_context=ctx) as pool:
+        futures = {pool.submit(_run_scoped, fn, *task): i for i, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+# 以下 _task_* 函数在子进程中执行，必须是模块级函数以便序列化
+
+def _run_scoped(fn, *args):
+    """子进程中每个任务使用独立的数据库连接作用域，任务结束即归还连接"""
+    from utils.database import connection_scope
+    with connection_scope():
+        return fn(*args)
+
+def _task_import(name: str, root: str, annotation: str, reuse_existing: bool, max_errors: int = None) -> dict:
+    from services.dataset_service import DatasetService
+    # 相对路径按命令行的工作目录解析后再保存，Web 界面、API 与其他进程的工作目录可能不同
+    root, annotation = os.path.abspath(root), os.path.abspath(annotation)
+    try:
+        ok, msg, ds_id = DatasetService.import_jsonl_dataset(name, root, annotation,
+                                                             reuse_existing=reuse_existing,
+                                                             max_errors=max_errors)
+    except Exception as e:
+        ok, msg, ds_id = False, f"导入失败: {str(e)}", None
+    return {"name": name, "ok": ok, "message": msg, "id": ds_id}
+
+def _task_refresh(dataset_id: int, name: str) -> dict:
+    from services.dataset_service import DatasetService
+    ok, msg = DatasetService.refresh_dataset_stats(dataset_id)
+    return {"id": dataset_id, "name": name, "ok": ok, "message": msg}
+
+def _task_validate(dataset_id: int, name: str, check_media: bool) -> dict:
+    from services.dataset_service import DatasetService
+    report = DatasetService.validate_dataset(dataset_id, check_media=check_media)
+    return {"id": dataset_id, "name": name, **report}
+
+def write_output(text: str, path: str = None) -> None:
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+def emit(args, data, lines: list) -> None:
+    """--json 时输出 JSON，否则输出可读文本"""
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        for line in lines:
+            print(line)
+
+def cmd_import(args) -> int:
+    result = _task_import(args.name, args.root, args.annotation, not args.no_reuse, args.max_errors)
+    emit(args, result, [("✔ " if result["ok"] else "✘ ") + result["message"]])
+    return 0 if result["ok"] else 1
+
+def cmd_batch_import(args) -> int:
+    with open(args.config, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise CliError("配置格式错误，应为 {名称: {root, annotation}} 形式的 JSON 对象")
+    tasks = []
+    for name, cfg in config.items():
+        if not isinstance(cfg, dict) or "root" not in cfg or "annotation" not in cfg:
+            raise CliError(f"数据集 {name} 的配置缺少 root 或 annotation")
+        tasks.append((name, cfg["root"], cfg["annotation"], not args.no_reuse, args.max_errors))
+
+    results = run_parallel(_task_import, tasks, args.jobs)
+    imported = [r["id"] for r in results if r["ok"]]
+    output = {"imported": len(imported), "failed": len(results) - len(imported), "results": results}
+
+    if args.group and imported:
+        from services.group_service import GroupService
+        ok, msg = GroupService.create_dataset_group(args.group, imported)
+        output["group"] = {"name": args.group, "ok": ok, "message": msg}
+
+    lines = [("✔ " if r["ok"] else "✘ ") + f"{r['name']}: {r['message']}" for r in results]
+    lines.append(f"成功导入 {output['imported']} 个数据集，失败 {output['failed']} 个")
+    if "group" in output:
+        lines.append(f"分组 {args.group}: {output['group']['message']}")
+    emit(args, output, lines)
+    ok = output["failed"] == 0 and output.get("group", {}).get("ok", True)
+    return 0 if ok else 1
+
+def cmd_refresh(args) -> int:
+    datasets = resolve_datasets(args.datasets, args.all)
+    results = run_parallel(_task_refresh, datasets, args.jobs)
+    lines = [("✔ " if r["ok"] else "✘ ") + f"{r['name']}: {r['message']}" for r in results]
+    emit(args, results, lines)
+    return 0 if all(r["ok"] for r in results) else 1
+
+def cmd_validate(args) -> int:
+    datasets = resolve_datasets(args.datasets, args.all)
+    tasks = [(ds_id, name, not args.skip_media) for ds_id, name in datasets]
+    results = run_parallel(_task_validate, tasks, args.jobs)
+    lines = []
+    for r in results:
+        status = "✔" if r["ok"] else "✘"
+        lines.append(f"{status} {r['name']}: {r['lines']} 条数据，解析失败 {r['bad_lines']} 行，"
+                     f"缺失媒体文件 {r['missing_media']} 个")
+        lines.extend(f"    {e}" for e in r["errors"])
+    emit(args, results, lines)
+    return 0 if all(r["ok"] for r in results) else 1
+
+def cmd_check_schema(args) -> int:
+    from services.dataset_service import DatasetService
+    results = []
+    lines = []
+    for ds_id, name in resolve_datasets(args.datasets, args.all):
+        report = DatasetService.check_dataset_schema(ds_id, workers=args.jobs)
+        results.append({"id": ds_id, "name": name, **report})
+        status = "✔" if report["invalid"] == 0 else "✘"
+        lines.append(f"{status} {name}: {report['lines']} 条数据，不符合规范 {report['invalid']} 条")
+        lines.extend(f"    {v['description']}: {v['count']} 条（首次出现于第 {v['first_line'] + 1} 行）"
+                     for v in report["violations"])
+    emit(args, results, lines)
+    return 0 if all(r["invalid"] == 0 for r in results) else 1
+
+def _image_profile_lines(title: str, profile: dict) -> list:
+    images = profile["images"]
+    lines = [f"{title}: 图片 {images} 张，文件缺失 {profile['missing']} 个，无法识别 {profile['failed']} 个"]
+    if images:
+        lines.append(f"    平均分辨率 {profile['width_sum'] / images:.0f}x{profile['height_sum'] / images:.0f}，"
+                     f"总大小 {profile['total_bytes'] / 1024 / 1024:.1f} MB")
+        for key, label in (("formats", "格式"), ("width", "宽度"), ("height", "高度"),
+                           ("aspect_ratio", "宽高比"), ("bytes", "文件大小")):
+            buckets = "  ".join(f"{k}: {v}" for k, v in profile[key].items() if v)
+            lines.append(f"    {label}: {buckets}")
+    return lines
+
+def cmd_media_profile(args) -> int:
+    if args.group:
+        from services.group_service import GroupService
+        profile = GroupService.get_group_image_profile(resolve_group(args.group), workers=args.jobs)
+        emit(args, profile, _image_profile_lines(f"分组 {args.group}", profile))
+        return 0
+
+    from services.dataset_service import DatasetService
+    results = []
+    lines = []
+    for ds_id, name in resolve_datasets(args.datasets, args.all):
+        profile = DatasetService.profile_images(ds_id, workers=args.jobs, force=args.force)
+        results.append({"id": ds_id, "name": name, **profile})
+        lines.extend(_image_profile_lines(name, profile))
+    emit(args, results, lines)
+    return 0
+
+def cmd_disk_usage(args) -> int:
+    from services.dataset_service import DatasetService
+    from utils.disk_usage import format_bytes
+    if args.group:
+        from services.group_service import GroupService
+        group_id = resolve_group(args.group)
+        DatasetService.compute_disk_usage(GroupService.get_group_datasets(group_id), force=args.force,
+                                          workers=args.jobs)
+        disk = GroupService.get_group_stats(group_id)["disk"]
+        emit(args, disk, [f"分组 {args.group}: 共 {format_bytes(disk['total_bytes'])}（媒体文件 "
+                          f"{format_bytes(disk['media_bytes'])}，数据副本 {format_bytes(disk['upload_bytes'])}，"
+                          f"{disk['files']} 个文件，共用的文件只计一次）"])
+        return 0
+
+    datasets = resolve_datasets(args.datasets, args.all)
+    DatasetService.compute_disk_usage([ds_id for ds_id, _ in datasets], force=args.force, workers=args.jobs)
+    usage = DatasetService.get_disk_usage_map()
+    results = [{"id": ds_id, "name": name, **usage[ds_id]} for ds_id, name in datasets]
+    lines = [
+        f"{r['name']}: 共 {format_bytes(r['total_bytes'])}（媒体文件 {r['media_files']} 个 "
+        f"{format_bytes(r['media_bytes'])}，缺失 {r['missing_files']} 个，数据副本 {format_bytes(r['upload_bytes'])}）"
+        for r in results
+    ]
+    emit(args, results, lines)
+    return 0
+
+def cmd_delete(args) -> int:
+    from services.dataset_service import DatasetService
+    results = []
+    for ds_id, name in resolve_datasets(args.datasets):
+        ok, msg = DatasetService.delete_dataset(ds_id, delete_files=not args.keep_files)
+        results.append({"id": ds_id, "name": name, "ok": ok, "message": msg})
+    emit(args, results, [("✔ " if r["ok"] else "✘ ") + r["message"] for r in results])
+    return 0 if all(r["ok"] for r in results) else 1
+
+def cmd_gc(args) -> int:
+    from services.dataset_service import DatasetService
+    from utils.cleanup import CATEGORY_DESCRIPTIONS
+    from utils.disk_usage import format_bytes
+    report = DatasetService.collect_garbage(args.budget_mb, args.grace_hours, args.dry_run)
+    lines = [
+        f"{CATEGORY_DESCRIPTIONS[category]}: {entry['count']} 项，{format_bytes(entry['bytes'])}"
+        for category, entry in report["categories"].items() if entry["count"]
+    ]
+    if args.dry_run:
+        lines = [f"  {path}" for path in report["removed"]] + lines
+        lines.append(f"可回收 {format_bytes(report['freed_bytes'])}（未删除任何文件）")
+    else:
+        lines.append(f"已释放 {format_bytes(report['freed_bytes'])}")
+    lines.append(f"剩余派生文件 {format_bytes(report['derived_bytes'])}")
+    emit(args, report, lines)
+    return 0
+
+def cmd_keyframes(args) -> int:
+    from services.dataset_service import DatasetService
+    results = []
+    for ds_id, name in resolve_datasets(args.datasets, args.all):
+        try:
+            result = DatasetService.build_video_keyframes(ds_id, workers=args.jobs, force=args.force)
+        except RuntimeError as e:
+            raise CliError(str(e))
+        results.append({"id": ds_id, "name": name, **result})
+    lines = [
+        ("✔ " if r["failed"] == 0 else "✘ ") + f"{r['name']}: {r['videos']} 个视频，新生成 {r['extracted']} 个，"
+        f"已缓存 {r['cached']} 个，失败 {r['failed']} 个，文件缺失 {r['missing']} 个"
+        for r in results
+    ]
+    emit(args, results, lines)
+    return 0 if all(r["failed"] == 0 for r in results) else 1
+
+def cmd_stats(args) -> int:
+    if args.group:
+        from services.group_service import GroupService
+        stats = GroupService.get_group_stats(resolve_group(args.group))
+        lines = [
+            f"总数据量: {stats['total']}",
+            f"文本: {stats['text']}  单图: {stats['single_image']}  "
+            f"多图: {stats['multi_image']}  视频: {stats['video']}",
+        ]
+        lines.extend(f"  {name}: {count}" for name, count in stats["datasets"].items())
+        if stats["disk"]["counted"]:
+            from utils.disk_usage import format_bytes
+            lines.append(f"存储占用: {format_bytes(stats['disk']['total_bytes'])}"
+                         f"（{stats['disk']['uncounted']} 个数据集尚未统计）")
+        emit(args, stats, lines)
+        return 0
+
+    from services.dataset_service import DatasetService
+    from utils.database import dataset_row_to_dict
+    selected = {ds_id for ds_id, _ in resolve_datasets(args.datasets, not args.datasets)}
+    rows = [dataset_row_to_dict(ds) for ds in DatasetService.get_all_datasets() if ds[0] in selected]
+    header = f"{'ID':>5}  {'名称':<30}{'总数':>10}{'文本':>10}{'单图':>10}{'多图':>10}{'视频':>10}"
+    lines = [header] + [
+        f"{r['id']:>5}  {r['name']:<30}{r['item_count']:>10}{r['text_count']:>10}"
+        f"{r['single_image_count']:>10}{r['multi_image_count']:>10}{r['video_count']:>10}"
+        for r in rows
+    ]
+    emit(args, rows, lines)
+    return 0
+
+def cmd_group(args) -> int:
+    from services.group_service import GroupService
+    if args.group_command == "list":
+        groups = [
+            {"id": group_id, "name": name, "dataset_ids": json.loads(ids), "create_time": create_time}
+            for group_id, name, ids, create_time in GroupService.get_all_groups()
+        ]
+        lines = [f"{g['id']:>5}  {g['name']:<30}{len(g['dataset_ids']):>6} 个数据集  {g['create_time']}"
+                 for g in groups]
+        emit(args, groups, lines)
+        return 0
+
+    if args.group_command == "create":
+        ids = [ds_id for ds_id, _ in resolve_datasets(args.datasets)]
+        ok, msg = GroupService.create_dataset_group(args.name, ids)
+        emit(args, {"name": args.name, "ok": ok, "message": msg, "dataset_ids": ids},
+             [("✔ " if ok else "✘ ") + msg])
+        return 0 if ok else 1
+
+    group_id = resolve_group(args.group)
+    if args.dedup:
+        data = GroupService.export_dedup_manifest(group_id, with_minhash=args.minhash, workers=args.jobs)
+    else:
+        data = GroupService.export_group_config(group_id)
+    if data is None:
+        raise CliError("导出分组信息失败")
+    write_output(json.dumps(data, ensure_ascii=False, indent=2) + "\n", args.output)
+    return 0
+
+def cmd_sample(args) -> int:
+    from services.dataset_service import DatasetService
+    (ds_id, _), = resolve_datasets([args.dataset])
+    items = DatasetService.sample_items(ds_id, args.n, seed=args.seed, data_type=args.type)
+    if args.json:
+        text = json.dumps([{"line_no": idx, "item": item} for idx, item in items],
+                          ensure_ascii=False, indent=2) + "\n"
+    else:
+        text = "".join(json.dumps(item, ensure_ascii=False) + "\n" for _, item in items)
+    write_output(text, args.output)
+    return 0
+
+COMMANDS = {
+    "import": cmd_import,
+    "batch-import": cmd_batch_import,
+    "refresh": cmd_refresh,
+    "validate": cmd_validate,
+    "check-schema": cmd_check_schema,
+    "media-profile": cmd_media_profile,
+    "disk-usage": cmd_disk_usage,
+    "delete": cmd_delete,
+    "gc": cmd_gc,
+    "keyframes": cmd_keyframes,
+    "stats": cmd_stats,
+    "group": cmd_group,
+    "sample": cmd_sample,
+}
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_env(args)
+    from utils.database import connection_scope
+    try:
+        with connection_scope():
+            return COMMANDS[args.command](args)
+    except (CliError, OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,56 @@ import os
 DB_PATH = os.getenv("DATABASE_URL", "metadata.db")
 UPLOAD_DIR = os.getenv("UPLOAD_FOLDER", "../uploads")
 ITEMS_PER_PAGE = 4
+# 按数据集主要类型自适应的每页条数，可通过环境变量覆盖，如 PAGE_SIZES="text=50,video=1"
+PAGE_SIZE_BY_TYPE = {"text": 20, "image": 6, "multi-image": 4, "video": 2}
+for _part in filter(None, os.getenv("PAGE_SIZES", "").split(",")):
+    _type, _, _size = _part.partition("=")
+    PAGE_SIZE_BY_TYPE[_type.strip()] = int(_size)
+SCROLL_WINDOW_PAGES = int(os.getenv("SCROLL_WINDOW_PAGES", "5"))  # 滚动浏览时最多同时渲染的页数
+LINE_INDEX_DIR = os.getenv("LINE_INDEX_DIR", os.path.join(UPLOAD_DIR, ".line_index"))  # 行偏移索引目录
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "2000"))  # 预览页缓存的已渲染数据条数
+# 跨进程共享缓存: 空为关闭 | disk（上传目录下的 SQLite 文件）| 文件路径 | redis://host:6379/0
+SHARED_CACHE_URL = os.getenv("SHARED_CACHE_URL", "")
+SHARED_CACHE_MAX_MB = int(os.getenv("SHARED_CACHE_MAX_MB", "512"))  # 共享缓存（disk）的容量上限
+SHARED_CACHE_TTL = int(os.getenv("SHARED_CACHE_TTL", "86400"))  # 共享缓存条目的默认过期时间（秒）
+# 共享缓存条目的 HMAC 签名密钥。缓存值以 pickle 反序列化，使用 Redis 时必须设置，各进程与主机需使用相同的值
+SHARED_CACHE_SECRET = os.getenv("SHARED_CACHE_SECRET", "")
+# 导入容错: 允许跳过的无法解析的行数（0 为遇到第一行错误即中止，-1 为不限），跳过的行写入隔离文件
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "0"))
+IMPORT_CHECKPOINT_MB = int(os.getenv("IMPORT_CHECKPOINT_MB", "64"))  # 导入时每解析多少 MB 保存一次断点
+# 数据格式规范（JSON 文件路径），其中的字段覆盖 utils/schema.py 中 DEFAULT_RECORD_SPEC 的同名字段
+RECORD_SPEC = os.getenv("RECORD_SPEC", "")
+# JSON 解码后端: auto | orjson | simdjson | json
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# 性能监控配置
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))  # 慢查询阈值（毫秒）
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))  # 每个操作保留的最近样本数
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")  # 定期导出 Prometheus 文本指标的文件路径
+ENABLE_DIAGNOSTICS = os.getenv("ENABLE_DIAGNOSTICS", "0") == "1"  # 是否在导航中显示性能诊断页
+
+# HTTP API 配置
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8600"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))  # 单次请求最多返回的数据条数
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))  # 数据库连接池大小（API 与服务端数据库后端）
+# 浏览器可访问的 API 地址（如 http://host:8600），设置后预览页的图片与视频从 API 的媒体接口加载
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "")
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", "3600"))  # 媒体文件的浏览器缓存时间（秒）
+
+# 图片元信息统计：读取图片头信息的线程数（主要耗时在网络存储的往返延迟上，线程数可远大于 CPU 核数）
+MEDIA_PROFILE_WORKERS = int(os.getenv("MEDIA_PROFILE_WORKERS", "32"))
+DISK_USAGE_WORKERS = int(os.getenv("DISK_USAGE_WORKERS", "32"))  # 统计存储占用时并发扫描目录的线程数
+# 存储清理: 派生文件（行偏移索引、列式副本、视频关键帧）的容量上限（MB，0 为不限），
+# 以及修改时间在多少小时以内的文件不视为孤立文件（避免删除正在进行的导入）
+GC_DERIVED_BUDGET_MB = int(os.getenv("GC_DERIVED_BUDGET_MB", "0"))
+GC_GRACE_HOURS = float(os.getenv("GC_GRACE_HOURS", "24"))
+
+# 视频关键帧缓存配置（需要 ffmpeg 或 PyAV）
+KEYFRAME_DIR = os.getenv("KEYFRAME_DIR", os.path.join(UPLOAD_DIR, ".keyframes"))
+KEYFRAME_COUNT = int(os.getenv("KEYFRAME_COUNT", "6"))  # 每个视频的关键帧数量
+KEYFRAME_WIDTH = 160  # 关键帧缩略图宽度（像素）
+POSTER_WIDTH = 480  # 封面宽度（像素）
 
 # 确保上传目录存在
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -1,32 +1,58 @@
 from typing import List, Dict, Any
+from itertools import starmap
 import json
+from utils import jsonl
 
 class Dataset:
-    def __init__(self, 
-                 id: int, 
-                 name: str, 
-                 path: str, 
+    """
+    数据集元信息。使用 __slots__ 减少大量实例的内存占用，
+    标签在首次访问时才解码，之后复用解码结果。
+    """
+    __slots__ = (
+        "id", "name", "path", "upload_time", "_tags_json", "_tags", "data_type", "root_path",
+        "item_count", "text_count", "single_image_count", "multi_image_count", "video_count",
+    )
+
+    # 与构造参数顺序一致的查询列，读取记录的查询统一使用，查询结果可直接交给 from_rows
+    COLUMNS = ("id, name, path, upload_time, tags, data_type, root_path, item_count, "
+               "text_count, single_image_count, multi_image_count, video_count")
+
+    def __init__(self,
+                 id: int,
+                 name: str,
+                 path: str,
                  upload_time: str,
                  tags_json: str,
                  data_type: str,
                  root_path: str,
-                 item_count: int = 0):
+                 item_count: int = 0,
+                 text_count: int = 0,
+                 single_image_count: int = 0,
+                 multi_image_count: int = 0,
+                 video_count: int = 0):
         self.id = id
         self.name = name
         self.path = path
         self.upload_time = upload_time
         self._tags_json = tags_json
+        self._tags = None
         self.data_type = data_type
         self.root_path = root_path
         self.item_count = item_count
+        self.text_count = text_count
+        self.single_image_count = single_image_count
+        self.multi_image_count = multi_image_count
+        self.video_count = video_count
 
     @property
     def tags(self) -> List[str]:
-        """获取标签列表"""
-        try:
-            return json.loads(self._tags_json)
-        except json.JSONDecodeError:
-            return []
+        """获取标签列表（首次访问时解码）"""
+        if self._tags is None:
+            try:
+                self._tags = jsonl.loads(self._tags_json) if self._tags_json else []
+            except jsonl.DecodeError:
+                self._tags = []
+        return self._tags
 
     @tags.setter
     def tags(self, value: List[str]):
@@ -34,6 +60,15 @@ class Dataset:
         if not isinstance(value, list):
             raise ValueError("标签必须是列表")
         self._tags_json = json.dumps(value, ensure_ascii=False)
+        self._tags = value
+
+    @property
+    def tags_json(self) -> str:
+        return self._tags_json
+
+    def has_any_tag(self, tags: List[str]) -> bool:
+        """是否包含 tags 中的任一标签"""
+        return any(tag in self.tags for tag in tags)
 
     def validate(self) -> bool:
         """验证数据集属性是否有效"""
@@ -55,10 +90,22 @@ class Dataset:
             "tags": self.tags,
             "data_type": self.data_type,
             "root_path": self.root_path,
-            "item_count": self.item_count
+            "item_count": self.item_count,
+            "text_count": self.text_count,
+            "single_image_count": self.single_image_count,
+            "multi_image_count": self.multi_image_count,
+            "video_count": self.video_count,
         }
 
     @classmethod
     def from_tuple(cls, data_tuple: tuple):
         """从数据库元组创建Dataset实例"""
         return cls(*data_tuple)
+
+    @classmethod
+    def from_rows(cls, rows) -> list:
+        """批量从按 COLUMNS 顺序查询的数据库行创建实例"""
+        return list(starmap(cls, rows))
+
+    def __repr__(self) -> str:
+        return f"Dataset(id={self.id!r}, name={self.name!r})"
@@ -1,25 +1,35 @@
 from typing import List, Dict, Any
+from itertools import starmap
 import json
-from datetime import datetime
+from utils import jsonl
 
 class DatasetGroup:
-    def __init__(self, 
-                 id: int, 
-                 name: str, 
+    """数据集分组。使用 __slots__，数据集 ID 列表在首次访问时才解码"""
+    __slots__ = ("id", "name", "_dataset_ids_json", "_dataset_ids", "create_time")
+
+    # 与构造参数顺序一致的查询列，读取记录的查询统一使用，查询结果可直接交给 from_rows
+    COLUMNS = "id, name, dataset_ids, create_time"
+
+    def __init__(self,
+                 id: int,
+                 name: str,
                  dataset_ids_json: str,
                  create_time: str):
         self.id = id
         self.name = name
         self._dataset_ids_json = dataset_ids_json
+        self._dataset_ids = None
         self.create_time = create_time
 
     @property
     def dataset_ids(self) -> List[int]:
-        """获取数据集ID列表"""
-        try:
-            return json.loads(self._dataset_ids_json)
-        except json.JSONDecodeError:
-            return []
+        """获取数据集ID列表（首次访问时解码）"""
+        if self._dataset_ids is None:
+            try:
+                self._dataset_ids = jsonl.loads(self._dataset_ids_json)
+            except jsonl.DecodeError:
+                self._dataset_ids = []
+        return self._dataset_ids
 
     @dataset_ids.setter
     def dataset_ids(self, value: List[int]):
@@ -29,6 +39,7 @@ class DatasetGroup:
         if not all(isinstance(x, int) for x in value):
             raise ValueError("所有数据集ID必须是整数")
         self._dataset_ids_json = json.dumps(value)
+        self._dataset_ids = value
 
     def validate(self) -> bool:
         """验证分组属性是否有效"""
@@ -51,3 +62,11 @@ class DatasetGroup:
     def from_tuple(cls, data_tuple: tuple):
         """从数据库元组创建DatasetGroup实例"""
         return cls(*data_tuple)
+
+    @classmethod
+    def from_rows(cls, rows) -> list:
+        """批量从按 COLUMNS 顺序查询的数据库行创建实例"""
+        return list(starmap(cls, rows))
+
+    def __repr__(self) -> str:
+        return f"DatasetGroup(id={self.id!r}, name={self.name!r})"
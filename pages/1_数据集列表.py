@@ -1,21 +1,31 @@
-import json
 import streamlit as st
 import pandas as pd
 from services.dataset_service import DatasetService
 from services.group_service import GroupService
+from utils.disk_usage import format_bytes
+from utils.cleanup import CATEGORY_DESCRIPTIONS
 
 # 页面标题
 st.title("多模态数据管理平台")
 st.header("所有数据集")
 
 # 添加刷新按钮
-if st.button("刷新"):
-    DatasetService.clear_cache()
-    st.success("数据集列表已刷新！")
-    st.rerun()
+refresh_col, usage_col, _ = st.columns([1, 2, 5])
+with refresh_col:
+    if st.button("刷新"):
+        DatasetService.clear_cache()
+        st.success("数据集列表已刷新！")
+        st.rerun()
+with usage_col:
+    if st.button("统计存储占用", help="统计尚未统计的数据集引用的媒体文件与数据副本大小"):
+        progress_bar = st.progress(0.0)
+        DatasetService.compute_disk_usage(
+            progress_callback=lambda stage, progress: progress_bar.progress(progress, text=stage)
+        )
+        st.rerun()
 
 # 获取所有数据集
-datasets = DatasetService.get_all_datasets()
+datasets = DatasetService.list_datasets()
 if not datasets:
     st.info("当前尚无数据集")
     col1, col2 = st.columns([1, 3])
@@ -37,32 +47,30 @@ else:
         
         # 根据标签筛选数据集
         if selected_tags:
-            filtered_datasets = []
-            for ds in datasets:
-                ds_tags = json.loads(ds[4])  # tags_json 在索引 4
-                if any(tag in ds_tags for tag in selected_tags):
-                    filtered_datasets.append(ds)
-            datasets = filtered_datasets
+            datasets = [ds for ds in datasets if ds.has_any_tag(selected_tags)]
             st.write(f"已筛选: 显示包含 {', '.join(['#'+tag for tag in selected_tags])} 的 {len(datasets)} 个数据集")
 
+    # 存储占用（统计后才有）
+    disk_usage = DatasetService.get_disk_usage_map()
+
     # 创建DataFrame用于显示数据集
     df_data = []
     for ds in datasets:
-        ds_id, name, path, upload_time, tags_json, data_type, root_path, item_count, text_count, single_image_count, multi_image_count, video_count = ds
-        tags = json.loads(tags_json)
-        formatted_tags = ", ".join([f"#{t}" for t in tags]) if tags else "无"
+        usage = disk_usage.get(ds.id)
+        formatted_tags = ", ".join([f"#{t}" for t in ds.tags]) if ds.tags else "无"
         
         # 为每个数据集创建一行数据
         df_data.append({
-            "数据集ID": ds_id,
-            "数据集名称": name,
-            "数据类型": data_type,
-            "数据量": f"{item_count} 条",
-            "纯文本": f"{text_count} 条",
-            "单图": f"{single_image_count} 条",
-            "多图": f"{multi_image_count} 条",
-            "视频": f"{video_count} 条",
-            "上传时间": upload_time.split()[0],
+            "数据集ID": ds.id,
+            "数据集名称": ds.name,
+            "数据类型": ds.data_type,
+            "数据量": f"{ds.item_count} 条",
+            "纯文本": f"{ds.text_count} 条",
+            "单图": f"{ds.single_image_count} 条",
+            "多图": f"{ds.multi_image_count} 条",
+            "视频": f"{ds.video_count} 条",
+            "存储占用": format_bytes(usage["total_bytes"]) if usage else "未统计",
+            "上传时间": ds.upload_time.split()[0],
             "标签": formatted_tags
         })
     
@@ -89,6 +97,8 @@ else:
             "单图": st.column_config.TextColumn("单图", width="small"),
             "多图": st.column_config.TextColumn("多图", width="small"),
             "视频": st.column_config.TextColumn("视频", width="small"),
+            "存储占用": st.column_config.TextColumn("存储占用", width="small",
+                                                help="引用的媒体文件与上传目录中数据副本的总大小"),
             "上传时间": st.column_config.TextColumn("上传时间", width="small"),
             "标签": st.column_config.TextColumn("标签", width="medium"),
         },
@@ -183,3 +193,32 @@ else:
                         st.error(f"发生错误: {str(e)}")
                 else:
                     st.error("分组名称不能为空")
+
+# 存储清理：回收已删除数据集与中断导入遗留的文件，按容量上限淘汰派生文件
+with st.expander("🧹 清理存储"):
+    st.caption("回收不属于任何数据集的上传目录、中断导入遗留的文件与不再使用的行偏移索引；"
+               "设置容量上限后，按最近使用时间淘汰行偏移索引、列式副本与视频关键帧（下次使用时自动重新生成）。")
+    budget_mb = st.number_input("派生文件容量上限（MB，0 为不限）", min_value=0, value=0, step=1024)
+    dry_col, run_col, _ = st.columns([1, 1, 4])
+    with dry_col:
+        dry_run = st.button("预览可回收文件")
+    with run_col:
+        run_gc = st.button("开始清理", type="primary")
+    if dry_run or run_gc:
+        progress_bar = st.progress(0.0)
+        report = DatasetService.collect_garbage(
+            budget_mb=budget_mb, dry_run=dry_run,
+            progress_callback=lambda stage, progress: progress_bar.progress(progress, text=stage)
+        )
+        rows = [
+            {"类别": CATEGORY_DESCRIPTIONS[category], "数量": entry["count"], "大小": format_bytes(entry["bytes"])}
+            for category, entry in report["categories"].items() if entry["count"]
+        ]
+        if rows:
+            st.table(rows)
+        if dry_run:
+            st.info(f"可回收 {format_bytes(report['freed_bytes'])}，清理后派生文件共 {format_bytes(report['derived_bytes'])}")
+            if report["removed"]:
+                st.code("\n".join(report["removed"]), language=None)
+        else:
+            st.success(f"已释放 {format_bytes(report['freed_bytes'])}，派生文件共 {format_bytes(report['derived_bytes'])}")
@@ -1,5 +1,6 @@
 import json
 import streamlit as st
+from config import IMPORT_MAX_ERRORS
 from services.dataset_service import DatasetService
 from services.group_service import GroupService
 
@@ -26,6 +27,19 @@ with tab1:
     ds_name = st.text_input("数据集名称", help="自定义唯一名称，用于区分不同数据集")
     root_path = st.text_input("根目录路径", help="图片和视频的根目录绝对路径")
     data_path = st.text_input("JSONL 文件路径", help="符合格式要求的 .jsonl 文件绝对路径")
+    reuse_existing = st.checkbox(
+        "内容相同时复用已有数据集",
+        value=True,
+        key="single_reuse_existing",
+        help="若文件内容与已导入的数据集完全相同，直接复用其统计信息与存储文件，无需重新解析"
+    )
+    max_errors = st.number_input(
+        "允许跳过的错误行数",
+        min_value=-1,
+        value=IMPORT_MAX_ERRORS,
+        key="single_max_errors",
+        help="无法解析的行不超过该数量时跳过并写入隔离文件，继续导入；0 为遇到错误即中止，-1 为不限"
+    )
 
     if st.button("开始导入", key="single_import"):
         if not all([ds_name, root_path, data_path]):
@@ -39,7 +53,9 @@ with tab1:
                 status_text.text(f"导入进度: {stage}")
                 progress_bar.progress(progress)
             
-            ok, msg, _ = DatasetService.import_jsonl_dataset(ds_name, root_path, data_path, show_progress)
+            ok, msg, _ = DatasetService.import_jsonl_dataset(
+                ds_name, root_path, data_path, show_progress, reuse_existing, int(max_errors)
+            )
             st.session_state.import_status = ok
             st.session_state.import_message = msg
             st.rerun()
@@ -70,6 +86,18 @@ with tab2:
         )
         
         # 添加创建分组选项
+        batch_reuse_existing = st.checkbox(
+            "内容相同时复用已有数据集",
+            value=True,
+            help="若文件内容与已导入的数据集完全相同，直接复用其统计信息与存储文件，无需重新解析"
+        )
+        batch_max_errors = st.number_input(
+            "每个数据集允许跳过的错误行数",
+            min_value=-1,
+            value=IMPORT_MAX_ERRORS,
+            help="无法解析的行不超过该数量时跳过并写入隔离文件，继续导入；0 为遇到错误即中止，-1 为不限"
+        )
+
         create_group = st.checkbox("创建分组", value=False)
         group_name = st.text_input("分组名称",
                                  placeholder="请输入分组名称",
@@ -97,7 +125,9 @@ with tab2:
                         status_text.text(f"导入进度: {stage}")
                         progress_bar.progress(progress)
                     
-                    ok, msg, imported_ids = DatasetService.batch_import_datasets(config, show_progress)
+                    ok, msg, imported_ids = DatasetService.batch_import_datasets(
+                        config, show_progress, batch_reuse_existing, int(batch_max_errors)
+                    )
                     st.session_state.import_status = ok
                     st.session_state.import_message = msg
                     
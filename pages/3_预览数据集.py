@@ -1,7 +1,9 @@
 import json
 import streamlit as st
 from services.dataset_service import DatasetService
-from utils.preview import preview_dataset
+from pages.components.preview import preview_dataset, scroll_preview
+from utils.preview import get_page_size
+from utils.keyframes import BACKEND as KEYFRAME_BACKEND
 
 # 页面标题
 st.title("多模态数据管理平台")
@@ -43,21 +45,82 @@ else:
         def update_page():
             st.session_state["page_preview"] = st.session_state.goto_page_input - 1
 
-        cols = st.columns([1, 3])
-        with cols[0]:
-            goto_page = st.number_input(
-                "页码",
+        dataset = next((ds for ds in DatasetService.list_datasets() if ds.id == dataset_id), None)
+        data_type = dataset.data_type if dataset else None
+        video_count = dataset.video_count if dataset else 0
+
+        option_cols = st.columns([1, 1, 2])
+        with option_cols[0]:
+            view_mode = st.radio(
+                "浏览方式",
+                ["分页浏览", "滚动浏览"],
+                horizontal=True,
+                key="preview_view_mode",
+                help="滚动浏览按批加载数据，适合快速浏览大量文本数据"
+            )
+        with option_cols[1]:
+            page_size = st.number_input(
+                "每页条数",
                 min_value=1,
-                value=st.session_state["page_preview"] + 1,
+                max_value=200,
+                value=get_page_size(data_type),
                 step=1,
-                help="输入想要跳转的页码",
-                key="goto_page_input",
-                on_change=update_page
+                key=f"preview_page_size_{dataset_id}",
+                help="默认值按数据集主要类型自适应：文本较多，视频较少"
+            )
+        with option_cols[2]:
+            render_markdown = st.checkbox(
+                "按 Markdown 渲染对话",
+                value=False,
+                key="preview_render_markdown",
+                help="支持 Markdown 与 LaTeX 公式（$...$），文本中的 $ 符号可能被识别为公式"
             )
-        
-        cur_page = st.session_state["page_preview"]
-        new_page = preview_dataset(dataset_id, cur_page)
-        
-        if new_page != cur_page:
-            st.session_state["page_preview"] = new_page
-            st.rerun()
+
+        cols = st.columns([1, 3])
+        with cols[0]:
+            if view_mode == "分页浏览":
+                goto_page = st.number_input(
+                    "页码",
+                    min_value=1,
+                    value=st.session_state["page_preview"] + 1,
+                    step=1,
+                    help="输入想要跳转的页码",
+                    key="goto_page_input",
+                    on_change=update_page
+                )
+            else:
+                start_line = st.number_input(
+                    "起始条目",
+                    min_value=1,
+                    value=1,
+                    step=1,
+                    key=f"scroll_start_{dataset_id}",
+                    help="从第几条数据开始浏览"
+                ) - 1
+
+        # 视频关键帧：后台生成后预览页先展示缩略图，按需加载播放器
+        if KEYFRAME_BACKEND and video_count:
+            job = DatasetService.get_keyframe_job(dataset_id)
+            with cols[1]:
+                if job and job["status"] == "running":
+                    st.progress(job["progress"], text="正在后台生成视频关键帧...")
+                else:
+                    if st.button("生成视频关键帧", help="为视频生成缩略图，预览时先显示关键帧，点击后再加载视频"):
+                        DatasetService.start_keyframe_job(dataset_id)
+                        st.rerun()
+                    if job and job["status"] == "done":
+                        result = job["result"]
+                        st.caption(f"关键帧已生成：新生成 {result['extracted']} 个，已缓存 {result['cached']} 个，"
+                                   f"失败 {result['failed']} 个，文件缺失 {result['missing']} 个")
+                    elif job and job["status"] == "failed":
+                        st.error(f"生成关键帧失败: {job['error']}")
+
+        if view_mode == "滚动浏览":
+            scroll_preview(dataset_id, start_line, render_markdown=render_markdown, page_size=page_size)
+        else:
+            cur_page = st.session_state["page_preview"]
+            new_page = preview_dataset(dataset_id, cur_page, render_markdown=render_markdown, page_size=page_size)
+
+            if new_page != cur_page:
+                st.session_state["page_preview"] = new_page
+                st.rerun()
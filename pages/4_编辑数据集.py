@@ -6,6 +6,9 @@ from services.dataset_service import DatasetService
 st.title("多模态数据管理平台")
 st.header("编辑数据集")
 
+if "deleted_message" in st.session_state:
+    st.success(st.session_state.pop("deleted_message"))
+
 # 获取数据集列表
 datasets = DatasetService.get_dataset_names()
 if not datasets:
@@ -42,6 +45,31 @@ else:
             tags = json.loads(tags_json)
             
             st.subheader(f"编辑数据集: {name}")
+
+            report = DatasetService.get_import_report(ds_id)
+            if report and report["skipped_count"]:
+                st.warning(f"导入时跳过了 {report['skipped_count']} 行无法解析的数据，"
+                           f"原始内容及其在源文件中的位置见 {report['quarantine_path']}")
+
+            # 数据格式校验结果
+            schema_report = DatasetService.get_schema_report(ds_id)
+            with st.expander("数据格式校验", expanded=bool(schema_report and schema_report["invalid"])):
+                if not schema_report:
+                    st.info("尚未校验数据格式")
+                else:
+                    st.write(f"校验时间: {schema_report['checked_time']}，共 {schema_report['lines']} 条数据，"
+                             f"不符合规范 {schema_report['invalid']} 条")
+                    if schema_report["stale"]:
+                        st.caption("数据格式规范在校验之后已修改，建议重新校验")
+                    if schema_report["violations"]:
+                        st.table([
+                            {"规则": v["description"], "违规条数": v["count"], "首次出现": f"第 {v['first_line'] + 1} 行"}
+                            for v in schema_report["violations"]
+                        ])
+                if st.button("重新校验数据格式", key=f"check_schema_{ds_id}"):
+                    with st.spinner("正在校验数据格式..."):
+                        DatasetService.check_dataset_schema(ds_id)
+                    st.rerun()
             
             # 初始化会话状态中的当前标签
             if "current_tags" not in st.session_state or st.session_state.get("last_edited_id") != ds_id:
@@ -142,6 +170,22 @@ else:
                 st.success("数据集信息已更新")
                 st.session_state.pop("current_tags", None)
             
+            # 删除数据集
+            with st.expander("删除数据集"):
+                st.write("删除后该数据集会从所有分组中移除，只包含该数据集的分组一并删除。")
+                delete_files = st.checkbox("同时删除存储目录中的数据副本（其他数据集复用的文件会保留）",
+                                           value=True, key=f"delete_files_{ds_id}")
+                confirmed = st.checkbox(f"确认删除数据集 {name}", key=f"confirm_delete_{ds_id}")
+                if st.button("删除数据集", key=f"delete_button_{ds_id}", type="primary", disabled=not confirmed):
+                    ok, msg = DatasetService.delete_dataset(ds_id, delete_files=delete_files)
+                    if ok:
+                        st.session_state.pop("edit_dataset_id", None)
+                        st.session_state.pop("current_tags", None)
+                        st.session_state["deleted_message"] = msg
+                        st.rerun()
+                    else:
+                        st.error(msg)
+
             # 返回按钮
             if st.button("返回数据集列表", key=f"return_button_{ds_id}"):
                 st.session_state.pop("edit_dataset_id", None)
@@ -5,13 +5,14 @@ from services.group_service import GroupService
 from services.dataset_service import DatasetService
 from utils.database import get_db_connection
 from utils.group import clear_groups_cache
+from utils.disk_usage import format_bytes
 
 # 页面标题
 st.title("多模态数据管理平台")
 st.header("数据集分组管理")
 
 # 获取所有分组
-groups = GroupService.get_all_groups()
+groups = GroupService.list_groups()
 
 if not groups:
     st.info("当前尚无数据集分组，请先在数据集列表页创建分组。")
@@ -29,15 +30,12 @@ else:
     # 创建DataFrame用于显示分组
     df_data = []
     for group in groups:
-        group_id, name, dataset_ids_json, create_time = group
-        dataset_ids = json.loads(dataset_ids_json)
-        
         # 为每个分组创建一行数据
         df_data.append({
-            "分组ID": group_id,
-            "分组名称": name,
-            "数据集数量": len(dataset_ids),
-            "创建时间": create_time.split()[0],
+            "分组ID": group.id,
+            "分组名称": group.name,
+            "数据集数量": len(group.dataset_ids),
+            "创建时间": group.create_time.split()[0],
         })
     
     # 创建DataFrame对象
@@ -60,7 +58,7 @@ else:
     st.subheader("分组操作")
     
     # 选择分组
-    group_options = {f"{name} (ID: {id})": id for id, name, _, _ in groups}
+    group_options = {f"{group.name} (ID: {group.id})": group.id for group in groups}
     selected_group = st.selectbox("选择分组", options=list(group_options.keys()))
     
     if selected_group:
@@ -96,13 +94,22 @@ else:
             dataset_dist = stats['datasets']
             
             # 显示核心指标
-            col1, col2, col3 = st.columns(3)
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
                 st.metric("总数据量", f"{total_items:,} 条")
             with col2:
                 st.metric("数据类型", f"{len(type_dist)} 类")
             with col3:
                 st.metric("包含数据集", f"{len(dataset_dist)} 个")
+            with col4:
+                disk = stats['disk']
+                st.metric("存储占用", format_bytes(disk['total_bytes']) if disk['counted'] else "未统计",
+                          help=f"媒体文件 {format_bytes(disk['media_bytes'])}，数据副本 {format_bytes(disk['upload_bytes'])}；"
+                               f"共用的文件只计一次，{disk['uncounted']} 个数据集尚未统计")
+                if disk['uncounted'] and st.button("统计存储占用", key=f"disk_usage_{group_id}"):
+                    with st.spinner("正在统计存储占用..."):
+                        DatasetService.compute_disk_usage(GroupService.get_group_datasets(group_id))
+                    st.rerun()
             
             # 类型分布图表
             st.subheader("📊 数据类型分布")
@@ -130,10 +137,123 @@ else:
                     st.progress(pct/100, text=f"{name} ({pct:.1f}%)")
             else:
                 st.info("该分组暂无数据")
-            
+
+            # 内容分析（基于列式副本）
+            st.subheader("📈 内容分析")
+            if st.button("计算内容分析", key=f"analytics_{group_id}"):
+                try:
+                    with st.spinner("正在分析数据（首次分析需要构建列式副本）..."):
+                        analytics = GroupService.get_group_analytics(group_id)
+                except RuntimeError as e:
+                    st.error(str(e))
+                    analytics = None
+                if analytics and analytics["total"]:
+                    text_len = analytics["text_len"]
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("平均文本长度", f"{text_len['mean']:.0f}")
+                    with col2:
+                        st.metric("文本长度 P90", f"{text_len['p90']:.0f}")
+                    with col3:
+                        st.metric("图片总数", f"{analytics['images']:,}")
+                    with col4:
+                        st.metric("视频总数", f"{analytics['videos']:,}")
+                    turns_df = pd.DataFrame(
+                        {"对话轮数": list(analytics["turns"].keys()), "数据量": list(analytics["turns"].values())}
+                    )
+                    st.bar_chart(turns_df, x="对话轮数", y="数据量")
+
+            # 图片元信息（只读取文件头）
+            st.subheader("🖼️ 图片分辨率分布")
+            if st.button("统计图片元信息", key=f"image_profile_{group_id}",
+                         help="只读取图片文件头；已统计过的数据集直接使用保存的结果"):
+                with st.spinner("正在读取图片文件头..."):
+                    profile = GroupService.get_group_image_profile(group_id)
+                if profile and profile["images"]:
+                    images = profile["images"]
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("图片数", f"{images:,}")
+                    with col2:
+                        st.metric("平均分辨率",
+                                  f"{profile['width_sum'] / images:.0f}×{profile['height_sum'] / images:.0f}")
+                    with col3:
+                        st.metric("总大小", f"{profile['total_bytes'] / 1024 / 1024:,.1f} MB")
+                    with col4:
+                        st.metric("缺失 / 无法识别", f"{profile['missing']} / {profile['failed']}")
+                    chart_cols = st.columns(2)
+                    for i, (key, label) in enumerate((("width", "宽度"), ("height", "高度"),
+                                                      ("aspect_ratio", "宽高比"), ("bytes", "文件大小"))):
+                        with chart_cols[i % 2]:
+                            # 保持分桶顺序
+                            fig = px.bar(x=list(profile[key].keys()), y=list(profile[key].values()),
+                                         labels={"x": label, "y": "图片数"}, title=f"{label}分布")
+                            st.plotly_chart(fig, use_container_width=True)
+                    st.caption("格式: " + "，".join(f"{k} {v:,}" for k, v in profile["formats"].items()))
+                elif profile:
+                    st.info(f"分组中没有可读取的图片（文件缺失 {profile['missing']} 个）")
+
+            # 重复数据分析
+            st.subheader("🔁 重复数据分析")
+            use_minhash = st.checkbox(
+                "检测近似重复 (MinHash)",
+                value=False,
+                key=f"dedup_minhash_{group_id}",
+                help="除精确重复外，额外基于 MinHash 检测文本高度相似的数据，计算较慢"
+            )
+            dedup_col1, dedup_col2 = st.columns(2)
+            with dedup_col1:
+                if st.button("计算重复统计", key=f"dedup_stats_{group_id}"):
+                    with st.spinner("正在计算数据签名..."):
+                        dup_stats = GroupService.get_group_duplicate_stats(group_id, with_minhash=use_minhash)
+                    if dup_stats:
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric("总数据量", f"{dup_stats['total']:,} 条")
+                        with col2:
+                            st.metric("去重后", f"{dup_stats['unique']:,} 条")
+                        with col3:
+                            st.metric("重复数据", f"{dup_stats['duplicates']:,} 条")
+                        dup_rows = []
+                        for name, ds_stats in dup_stats["datasets"].items():
+                            row = {
+                                "数据集名称": name,
+                                "数据量": ds_stats["lines"],
+                                "跨数据集精确重复": ds_stats["cross_exact"],
+                            }
+                            if use_minhash:
+                                row["跨数据集近似重复"] = ds_stats["cross_near"]
+                            dup_rows.append(row)
+                        st.dataframe(pd.DataFrame(dup_rows), hide_index=True, use_container_width=True)
+                        if dup_stats["overlaps"]:
+                            st.write("数据集两两重叠：")
+                            st.dataframe(
+                                pd.DataFrame(dup_stats["overlaps"]).rename(columns={
+                                    "dataset": "数据集", "other": "重叠数据集", "duplicates": "重复条数"
+                                }),
+                                hide_index=True,
+                                use_container_width=True
+                            )
+                    else:
+                        st.error("计算重复统计失败")
+            with dedup_col2:
+                if st.button("导出去重清单", key=f"dedup_export_{group_id}"):
+                    with st.spinner("正在生成去重清单..."):
+                        manifest = GroupService.export_dedup_manifest(group_id, with_minhash=use_minhash)
+                    if manifest:
+                        st.download_button(
+                            "下载去重清单",
+                            data=json.dumps(manifest, ensure_ascii=False),
+                            file_name=f"{group_details['name']}_dedup.json",
+                            mime="application/json",
+                            key=f"dedup_download_{group_id}"
+                        )
+                    else:
+                        st.error("导出去重清单失败")
+
             # 操作按钮
             st.subheader("⚙️ 分组操作")
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             
             with col1:
                 if st.button("导出分组信息", key=f"export_{group_id}"):
@@ -165,3 +285,9 @@ else:
                     else:
                         st.session_state[confirm_key] = True
                         st.warning(f"确定要删除分组 '{group_details['name']}' 吗？再次点击'删除分组'按钮确认")
+
+            with col3:
+                if st.button("预览分组", key=f"preview_group_{group_id}",
+                             help="把分组作为一个数据集连续浏览，可按种子随机打乱"):
+                    st.session_state["preview_group_id"] = group_id
+                    st.switch_page("../pages/7_预览分组.py")
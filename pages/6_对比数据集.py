@@ -0,0 +1,66 @@
+import streamlit as st
+from services.dataset_service import DatasetService
+from pages.components.compare import compare_datasets
+
+# 页面标题
+st.title("多模态数据管理平台")
+st.header("对比数据集")
+
+if st.button("刷新"):
+    DatasetService.clear_cache()
+    st.success("数据集列表已刷新！")
+    st.rerun()
+
+datasets = DatasetService.get_dataset_names()
+if len(datasets) < 2:
+    st.info("至少需要两个数据集才能对比，请先导入数据集。")
+else:
+    options = {f"{name} (ID: {id})": (id, name) for id, name in datasets}
+    selected = st.multiselect(
+        "选择要对比的数据集（2-4 个，按 id 对齐时以第一个为基准）：",
+        list(options.keys()),
+        max_selections=4,
+        key="compare_selected"
+    )
+
+    option_cols = st.columns([1, 1, 1, 2])
+    with option_cols[0]:
+        align_label = st.radio("对齐方式", ["按行号", "按 id"], horizontal=True, key="compare_align")
+    with option_cols[1]:
+        page_size = st.number_input("每页条数", min_value=1, max_value=50, value=5, step=1,
+                                    key="compare_page_size")
+    with option_cols[2]:
+        render_markdown = st.checkbox("按 Markdown 渲染对话", value=False, key="compare_render_markdown")
+
+    if len(selected) < 2:
+        st.info("请至少选择两个数据集。")
+    else:
+        dataset_ids = [options[s][0] for s in selected]
+        names = [options[s][1] for s in selected]
+        align = "line" if align_label == "按行号" else "id"
+
+        # 选择的数据集或对齐方式变化后回到第一页
+        state_key = (tuple(dataset_ids), align, page_size)
+        if st.session_state.get("compare_state") != state_key:
+            st.session_state["compare_state"] = state_key
+            st.session_state["compare_page"] = 0
+        page = st.session_state["compare_page"]
+
+        total = compare_datasets(dataset_ids, names, page * page_size, page_size,
+                                 align=align, render_markdown=render_markdown)
+
+        # 分页控制
+        if total:
+            total_pages = (total + page_size - 1) // page_size
+            cols = st.columns([1, 3, 1])
+            with cols[0]:
+                if page > 0 and st.button("⬅️ 上一页", key="compare_prev"):
+                    st.session_state["compare_page"] = page - 1
+                    st.rerun()
+            with cols[1]:
+                st.markdown(f"<div style='text-align: center'>第 {page + 1} 页，共 {total_pages} 页</div>",
+                            unsafe_allow_html=True)
+            with cols[2]:
+                if page + 1 < total_pages and st.button("下一页 ➡️", key="compare_next"):
+                    st.session_state["compare_page"] = page + 1
+                    st.rerun()
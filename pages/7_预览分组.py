@@ -0,0 +1,80 @@
+import streamlit as st
+import pandas as pd
+from services.group_service import GroupService
+from pages.components.preview import preview_group
+from config import ITEMS_PER_PAGE
+
+# 页面标题
+st.title("多模态数据管理平台")
+st.header("预览分组")
+
+if st.button("刷新"):
+    GroupService.clear_groups_cache()
+    st.success("分组列表已刷新！")
+    st.rerun()
+
+groups = GroupService.list_groups()
+if not groups:
+    st.info("当前尚无数据集分组，请先在数据集列表页创建分组。")
+else:
+    options = {f"{group.name} (ID: {group.id})": group.id for group in groups}
+
+    # 如果是从分组管理页跳转来的，自动选中对应分组
+    default_index = 0
+    if "preview_group_id" in st.session_state:
+        for i, group in enumerate(groups):
+            if group.id == st.session_state["preview_group_id"]:
+                default_index = i
+                break
+
+    selected = st.selectbox("选择要预览的分组：", list(options.keys()), index=default_index)
+    group_id = options[selected]
+
+    option_cols = st.columns([1, 1, 1, 2])
+    with option_cols[0]:
+        shuffle = st.checkbox("随机打乱", value=False, key="group_preview_shuffle",
+                              help="按种子打乱分组内全部数据的浏览顺序，同一种子顺序不变")
+    with option_cols[1]:
+        seed = st.number_input("随机种子", min_value=0, value=0, step=1, key="group_preview_seed",
+                               disabled=not shuffle)
+    with option_cols[2]:
+        page_size = st.number_input("每页条数", min_value=1, max_value=200, value=ITEMS_PER_PAGE, step=1,
+                                    key="group_preview_page_size")
+    with option_cols[3]:
+        render_markdown = st.checkbox("按 Markdown 渲染对话", value=False, key="group_preview_render_markdown")
+
+    view = GroupService.open_group_view(group_id, seed=int(seed) if shuffle else None)
+    if view is None:
+        st.error("未找到对应分组")
+    else:
+        for ds_id, name in view.missing:
+            st.warning(f"数据集 {name or ds_id} 已删除或数据文件不存在，预览时跳过")
+
+        with st.expander(f"共 {len(view.members)} 个数据集，{view.total:,} 条数据"):
+            rows = []
+            for k, (ds_id, name, _, _) in enumerate(view.members):
+                start, end = view.member_range(k)
+                rows.append({"数据集": name, "条数": end - start, "序号范围（不打乱时）": f"{start + 1} - {end}"})
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+        # 分组、打乱方式或每页条数变化后回到第一页
+        state_key = (group_id, view.seed, page_size)
+        if st.session_state.get("group_preview_state") != state_key:
+            st.session_state["group_preview_state"] = state_key
+            st.session_state["group_preview_page"] = 0
+        total_pages = max((view.total + page_size - 1) // page_size, 1)
+
+        def update_page():
+            st.session_state["group_preview_page"] = st.session_state.group_preview_goto - 1
+
+        cols = st.columns([1, 3])
+        with cols[0]:
+            st.number_input("页码", min_value=1, max_value=total_pages,
+                            value=min(st.session_state["group_preview_page"] + 1, total_pages), step=1,
+                            key="group_preview_goto", on_change=update_page)
+
+        page = min(st.session_state["group_preview_page"], total_pages - 1)
+        new_page = preview_group(view, page, page_size=page_size, render_markdown=render_markdown)
+        if new_page != page:
+            st.session_state["group_preview_page"] = new_page
+            st.rerun()
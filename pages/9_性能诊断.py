@@ -0,0 +1,100 @@
+import json
+import streamlit as st
+import pandas as pd
+from utils import metrics
+from utils.shared_cache import get_shared_cache
+
+# 页面标题
+st.title("多模态数据管理平台")
+st.header("性能诊断")
+
+col1, col2, _ = st.columns([1, 1, 4])
+with col1:
+    if st.button("刷新"):
+        st.rerun()
+with col2:
+    if st.button("重置指标"):
+        metrics.reset()
+        st.success("指标已清空")
+        st.rerun()
+
+snap = metrics.snapshot()
+
+# 各操作耗时分位数
+st.subheader("⏱️ 操作耗时（最近样本）")
+if snap["operations"]:
+    op_rows = [
+        {
+            "操作": name,
+            "调用次数": op["count"],
+            "总耗时(s)": op["total_s"],
+            "P50(ms)": op["p50_ms"],
+            "P90(ms)": op["p90_ms"],
+            "P99(ms)": op["p99_ms"],
+            "最大(ms)": op["max_ms"],
+        }
+        for name, op in snap["operations"].items()
+    ]
+    op_df = pd.DataFrame(op_rows).sort_values("总耗时(s)", ascending=False)
+    st.dataframe(op_df, hide_index=True, use_container_width=True)
+else:
+    st.info("暂无耗时数据，请先访问其他页面")
+
+# 缓存命中率
+st.subheader("🗃️ 缓存命中率")
+if snap["caches"]:
+    cache_rows = [
+        {"缓存": name, "调用次数": c["calls"], "未命中": c["misses"], "命中率": f"{c['hit_rate']:.1%}"}
+        for name, c in snap["caches"].items()
+    ]
+    st.dataframe(pd.DataFrame(cache_rows), hide_index=True, use_container_width=True)
+else:
+    st.info("暂无缓存统计")
+
+# 跨进程共享缓存
+shared = get_shared_cache()
+if shared is not None:
+    counters = snap.get("counters", {})
+    hits, misses = counters.get("shared_cache.hit", 0), counters.get("shared_cache.miss", 0)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("共享缓存命中率", f"{hits / (hits + misses):.1%}" if hits + misses else "-")
+    with col2:
+        st.metric("共享缓存错误", counters.get("shared_cache.error", 0))
+    with col3:
+        try:
+            stats = shared.stats()
+            st.metric("共享缓存条目", f"{stats['entries']:,}")
+        except Exception as e:
+            st.caption(f"无法读取共享缓存状态: {e}")
+
+# 慢查询
+st.subheader("🐢 慢查询")
+if snap["slow_queries"]:
+    st.dataframe(
+        pd.DataFrame(list(reversed(snap["slow_queries"]))).rename(
+            columns={"time": "时间", "duration_ms": "耗时(ms)", "sql": "SQL"}
+        ),
+        hide_index=True,
+        use_container_width=True
+    )
+else:
+    st.info("暂无慢查询")
+
+# 导出
+st.subheader("📤 导出")
+col1, col2, _ = st.columns([1, 1, 4])
+with col1:
+    st.download_button(
+        "下载 Prometheus 指标",
+        data=metrics.export_prometheus(),
+        file_name="vlm_metrics.prom",
+        mime="text/plain"
+    )
+with col2:
+    st.download_button(
+        "下载 JSON 快照",
+        data=json.dumps(snap, ensure_ascii=False, indent=2),
+        file_name="vlm_metrics.json",
+        mime="application/json"
+    )
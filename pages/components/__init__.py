@@ -0,0 +1 @@
+# Streamlit 页面组件：依赖 streamlit 的渲染逻辑集中在这里，utils/services 保持无界面依赖
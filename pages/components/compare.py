@@ -0,0 +1,43 @@
+import streamlit as st
+from services.dataset_service import DatasetService
+from utils import metrics
+from utils.preview import count_lines, get_preview_source, file_version
+from utils.render import PREVIEW_CSS
+from .preview import render_items
+
+@metrics.timed("preview.compare_datasets")
+def compare_datasets(dataset_ids: list, names: list, start: int = 0, count: int = 5,
+                     align: str = "line", render_markdown: bool = False) -> int:
+    """
+    并排展示多个数据集中对齐的数据，每个数据集一列。
+    返回基准范围内的总条数（按行号对齐时取最长的数据集，按 id 对齐时取第一个数据集），用于分页。
+    """
+    st.markdown(PREVIEW_CSS, unsafe_allow_html=True)
+
+    sources = [get_preview_source(dataset_id) for dataset_id in dataset_ids]
+    if not all(sources):
+        st.error("未找到对应数据集")
+        return 0
+    totals = [count_lines(path) for path, _, _ in sources]
+    total = max(totals) if align == "line" else totals[0]
+    versions = [file_version(path) for path, _, _ in sources]
+
+    rows = DatasetService.get_aligned_items(dataset_ids, start, count, align)
+
+    header_cols = st.columns(len(dataset_ids))
+    for col, name, n in zip(header_cols, names, totals):
+        with col:
+            st.subheader(name)
+            st.caption(f"共 {n} 条")
+
+    for row in rows:
+        cols = st.columns(len(dataset_ids))
+        for col, dataset_id, (_, _, root_path), version, entry in zip(cols, dataset_ids, sources, versions, row):
+            with col:
+                if entry is None:
+                    st.markdown("<hr>", unsafe_allow_html=True)
+                    st.info("该数据集中没有对应数据")
+                else:
+                    st.caption(f"第 {entry[0] + 1} 行")
+                    render_items(dataset_id, [entry], root_path, version, render_markdown)
+    return total
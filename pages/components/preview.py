@@ -0,0 +1,194 @@
+import os
+import streamlit as st
+from config import KEYFRAME_WIDTH, SCROLL_WINDOW_PAGES
+from utils import metrics
+from utils.keyframes import get_cached_keyframes
+from utils.preview import (
+    get_items, count_lines, get_page_size, get_preview_source, resolve_media_sources, file_version,
+)
+from utils.render import PREVIEW_CSS, render_item_html
+
+def render_video(source: str, abs_path: str, key: str) -> None:
+    """
+    有关键帧缓存时先展示关键帧缩略图，点击后才加载完整播放器；否则直接显示播放器。
+    """
+    keyframes = get_cached_keyframes(abs_path)
+    if not keyframes:
+        st.video(source)
+        return
+    frames = keyframes["frames"] or [keyframes["poster"]]
+    st.image(frames, width=KEYFRAME_WIDTH)
+    if st.toggle("▶️ 播放视频", key=key):
+        st.video(source)
+
+def render_items(dataset_id: int, items: list, root_path: str, version, render_markdown: bool = False) -> None:
+    """
+    渲染 [(行号, 数据项), ...]：标题与对话渲染为缓存的 HTML 片段，没有媒体时整条数据只输出一个元素
+    """
+    for line_no, item in items:
+        head_html, body_html = render_item_html(dataset_id, line_no, version, item, markdown=render_markdown)
+        has_media = bool(item.get('image') or item.get('video'))
+        if not has_media:
+            st.markdown(head_html + body_html, unsafe_allow_html=True)
+            continue
+
+        # 使用卡片容器
+        with st.container():
+            st.markdown(head_html, unsafe_allow_html=True)
+
+            # 渲染图片
+            if item.get('image'):
+                images = resolve_media_sources(dataset_id, root_path, item['image'])
+                cols = st.columns(max(min(len(images), 3), 1))  # 最多3列
+                for idx, (source, col) in enumerate(zip(images, cols)):
+                    if source:
+                        with col:
+                            st.image(source, caption=f"图片 {idx+1}", width=400)
+
+            # 渲染视频
+            if item.get('video'):
+                videos = item['video'] if isinstance(item['video'], list) else [item['video']]
+                sources = resolve_media_sources(dataset_id, root_path, item['video'])
+                for video_idx, (rel_path, source) in enumerate(zip(videos, sources)):
+                    if source:
+                        render_video(source, os.path.join(root_path, str(rel_path)),
+                                     key=f"play_{dataset_id}_{line_no}_{video_idx}")
+
+            if body_html:
+                st.markdown(body_html, unsafe_allow_html=True)
+
+def _show_parse_error(line: str) -> None:
+    st.error(f"JSON解析错误: {line[:100]}...")
+
+@metrics.timed("preview.preview_dataset")
+def preview_dataset(dataset_id: int, page: int = 0, render_markdown: bool = False, page_size: int = None) -> int:
+    """
+    在前端预览指定数据集的内容。
+    支持文本、图片、视频展示，并提供分页功能。
+    render_markdown 为 True 时对话内容按 Markdown（含 LaTeX 公式）渲染；
+    page_size 默认按数据集主要类型自适应。
+    """
+    # 样式每次渲染只注入一次
+    st.markdown(PREVIEW_CSS, unsafe_allow_html=True)
+
+    row = get_preview_source(dataset_id)
+    if not row:
+        st.error("未找到对应数据集")
+        return page
+
+    content_path, data_type, root_path = row
+    page_size = page_size or get_page_size(data_type)
+
+    # 通过行偏移索引只读取当前页的数据
+    total_items = count_lines(content_path)
+    start = page * page_size
+    end = start + page_size
+    items = get_items(content_path, start, page_size, on_error=_show_parse_error)
+    render_items(dataset_id, items, root_path, file_version(content_path), render_markdown)
+
+    # 分页控制
+    if total_items:
+        total_pages = total_items // page_size + (1 if total_items % page_size > 0 else 0)
+        cols = st.columns([1, 3, 1])
+
+        with cols[0]:
+            if page > 0:
+                if st.button("⬅️ 上一页", key=f"prev_{dataset_id}"):
+                    return page - 1
+
+        with cols[1]:
+            st.markdown(f"<div style='text-align: center'>第 {page + 1} 页，共 {total_pages} 页</div>", unsafe_allow_html=True)
+
+        with cols[2]:
+            if end < total_items:
+                if st.button("下一页 ➡️", key=f"next_{dataset_id}"):
+                    return page + 1
+
+    return page
+
+def _scroll_state_key(dataset_id: int) -> str:
+    return f"scroll_window_{dataset_id}"
+
+def _shift_window(key: str, delta: int, page_size: int, total: int) -> None:
+    """
+    移动滚动窗口：向后加载时扩展窗口末尾，向前加载时扩展窗口开头；
+    窗口超过 SCROLL_WINDOW_PAGES 页时丢弃另一端，保证渲染的数据量不随滚动深度增长。
+    """
+    start, end = st.session_state[key]
+    max_items = page_size * SCROLL_WINDOW_PAGES
+    if delta > 0:
+        end = min(total, end + page_size)
+        start = max(start, end - max_items)
+    else:
+        start = max(0, start - page_size)
+        end = min(end, start + max_items)
+    st.session_state[key] = (start, end)
+
+@st.fragment
+def scroll_preview(dataset_id: int, start_line: int = 0, render_markdown: bool = False,
+                   page_size: int = None) -> None:
+    """
+    滚动浏览模式：按窗口逐批加载数据，点击"加载更多"只重新运行本组件而不是整个页面。
+    同时渲染的数据不超过 SCROLL_WINDOW_PAGES 页，读取通过行偏移索引完成，内存占用与浏览位置无关。
+    """
+    st.markdown(PREVIEW_CSS, unsafe_allow_html=True)
+
+    row = get_preview_source(dataset_id)
+    if not row:
+        st.error("未找到对应数据集")
+        return
+
+    content_path, data_type, root_path = row
+    page_size = page_size or get_page_size(data_type)
+    total_items = count_lines(content_path)
+
+    key = _scroll_state_key(dataset_id)
+    window = st.session_state.get(key)
+    # 首次进入或跳转到新的起始行时重置窗口
+    if window is None or st.session_state.get(f"{key}_origin") != start_line:
+        window = (min(start_line, max(total_items - 1, 0)), min(total_items, start_line + page_size))
+        st.session_state[key] = window
+        st.session_state[f"{key}_origin"] = start_line
+    start, end = window
+
+    if start > 0:
+        st.button("⬆️ 加载前面的数据", key=f"scroll_prev_{dataset_id}",
+                  on_click=_shift_window, args=(key, -1, page_size, total_items))
+
+    with metrics.timer("preview.scroll_window"):
+        items = get_items(content_path, start, end - start, on_error=_show_parse_error)
+        render_items(dataset_id, items, root_path, file_version(content_path), render_markdown)
+
+    st.caption(f"第 {start + 1} - {end} 条，共 {total_items} 条")
+    if end < total_items:
+        st.button("⬇️ 加载更多", key=f"scroll_next_{dataset_id}",
+                  on_click=_shift_window, args=(key, 1, page_size, total_items))
+
+@metrics.timed("preview.preview_group")
+def preview_group(view, page: int = 0, page_size: int = 4, render_markdown: bool = False) -> int:
+    """
+    分页预览分组的虚拟数据集视图（utils.group_preview.GroupView），每条数据标注来源数据集与行号。
+    返回点击翻页后的页码。
+    """
+    st.markdown(PREVIEW_CSS, unsafe_allow_html=True)
+
+    versions = [file_version(path) for _, _, path, _ in view.members]
+    items = view.get_items(page * page_size, page_size, on_error=_show_parse_error)
+    for position, k, line_no, item in items:
+        ds_id, name, _, root_path = view.members[k]
+        st.caption(f"#{position + 1} · {name} 第 {line_no + 1} 行")
+        render_items(ds_id, [(line_no, item)], root_path, versions[k], render_markdown)
+
+    if view.total:
+        total_pages = (view.total + page_size - 1) // page_size
+        cols = st.columns([1, 3, 1])
+        with cols[0]:
+            if page > 0 and st.button("⬅️ 上一页", key=f"group_prev_{view.group_id}"):
+                return page - 1
+        with cols[1]:
+            st.markdown(f"<div style='text-align: center'>第 {page + 1} 页，共 {total_pages} 页</div>",
+                        unsafe_allow_html=True)
+        with cols[2]:
+            if page + 1 < total_pages and st.button("下一页 ➡️", key=f"group_next_{view.group_id}"):
+                return page + 1
+    return page
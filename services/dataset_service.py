@@ -1,32 +1,44 @@
 from typing import List, Optional
 import json
-from utils.database import get_db_connection, clear_datasets_cache
+from utils.database import get_db_connection, bump_revision, SCOPE_DATASETS, SCOPE_TAGS, SCOPE_DISK_USAGE
+from models import Dataset
+from utils import jsonl
+from utils import metrics
 
 class DatasetService:
     @staticmethod
+    @metrics.timed("service.DatasetService.get_all_datasets")
     def get_all_datasets() -> List[tuple]:
         """获取所有数据集元信息，使用database层的缓存"""
         from utils.database import load_all_datasets
         return load_all_datasets()
 
     @staticmethod
+    @metrics.timed("service.DatasetService.list_datasets")
+    def list_datasets() -> List[Dataset]:
+        """获取所有数据集的 Dataset 对象（进程内缓存，标签按需解码）"""
+        from utils.database import load_dataset_models
+        return load_dataset_models()
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_datasets_by_tags")
     def get_datasets_by_tags(tags: List[str]) -> List[tuple]:
         """根据标签筛选数据集"""
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT id, name, path, upload_time, tags, data_type, root_path, item_count, "
-            "text_count, single_image_count, multi_image_count, video_count FROM datasets"
+            f"SELECT {Dataset.COLUMNS} FROM datasets"
         )
         
         filtered_datasets = []
         for ds in cursor.fetchall():
-            ds_tags = json.loads(ds[4])  # tags_json 在索引4
+            ds_tags = jsonl.loads(ds[4])  # tags_json 在索引4
             if any(tag in ds_tags for tag in tags):
                 filtered_datasets.append(ds)
         return filtered_datasets
 
     @staticmethod
+    @metrics.timed("service.DatasetService.update_dataset_tags")
     def update_dataset_tags(dataset_id: int, tags: List[str]) -> bool:
         """更新数据集标签"""
         try:
@@ -38,6 +50,7 @@ class DatasetService:
             return False
 
     @staticmethod
+    @metrics.timed("service.DatasetService.get_all_unique_tags")
     def get_all_unique_tags() -> List[str]:
         """获取所有唯一标签列表"""
         from utils.database import get_all_unique_tags
@@ -50,27 +63,172 @@ class DatasetService:
         clear_datasets_cache()
 
     @staticmethod
-    def import_jsonl_dataset(name: str, root_path: str, jsonl_path: str, progress_callback=None) -> tuple[bool, str, int]:
-        """导入单个JSONL格式数据集，返回(成功状态, 消息, 数据集ID)"""
+    @metrics.timed("service.DatasetService.import_jsonl_dataset")
+    def import_jsonl_dataset(name: str, root_path: str, jsonl_path: str, progress_callback=None,
+                             reuse_existing: bool = True, max_errors: int = None) -> tuple[bool, str, int]:
+        """导入单个JSONL格式数据集，返回(成功状态, 消息, 数据集ID)
+        reuse_existing 为 True 时，内容指纹相同的文件直接复用已有数据集的统计信息与存储文件
+        max_errors 为允许跳过的无法解析的行数（默认读取 IMPORT_MAX_ERRORS，-1 为不限）
+        """
         from utils.dataset import import_jsonl_dataset as _import_jsonl
-        return _import_jsonl(name, root_path, jsonl_path, progress_callback)
+        return _import_jsonl(name, root_path, jsonl_path, progress_callback, reuse_existing, max_errors)
 
     @staticmethod
-    def batch_import_datasets(config: dict, progress_callback=None) -> tuple[bool, str, list[int]]:
+    @metrics.timed("service.DatasetService.batch_import_datasets")
+    def batch_import_datasets(config: dict, progress_callback=None,
+                              reuse_existing: bool = True, max_errors: int = None) -> tuple[bool, str, list[int]]:
         """批量导入多个数据集
         返回值:
             tuple[bool, str, list[int]]: (是否成功, 消息, 成功导入的数据集ID列表)
         """
         from utils.dataset import batch_import_datasets as _batch_import
-        return _batch_import(config, progress_callback)
+        return _batch_import(config, progress_callback, reuse_existing, max_errors)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.refresh_dataset_stats")
+    def refresh_dataset_stats(dataset_id: int) -> tuple[bool, str]:
+        """重新统计数据集的数据量与类型分布"""
+        from utils.dataset import refresh_dataset_stats
+        return refresh_dataset_stats(dataset_id)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.delete_dataset")
+    def delete_dataset(dataset_id: int, delete_files: bool = True) -> tuple[bool, str]:
+        """删除数据集并从所有分组中移除，可同时删除不再被其他数据集引用的存储副本"""
+        from utils.dataset import delete_dataset
+        return delete_dataset(dataset_id, delete_files=delete_files)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.collect_garbage")
+    def collect_garbage(budget_mb: int = None, grace_hours: float = None, dry_run: bool = False,
+                        progress_callback=None) -> dict:
+        """回收孤立的上传目录、过期的导入遗留文件与行偏移索引，并按容量上限淘汰派生文件，返回清理报告"""
+        from utils.cleanup import collect_garbage
+        return collect_garbage(budget_mb, grace_hours, dry_run, progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.validate_dataset")
+    def validate_dataset(dataset_id: int, check_media: bool = True) -> dict:
+        """校验数据集的数据文件、JSON 格式与媒体文件引用，返回校验报告"""
+        from utils.dataset import validate_dataset
+        return validate_dataset(dataset_id, check_media=check_media)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.check_dataset_schema")
+    def check_dataset_schema(dataset_id: int, workers: int = None, progress_callback=None) -> dict:
+        """按数据格式规范并行校验数据集的每一条数据，保存并返回逐规则的违规统计"""
+        from utils.schema import check_dataset_schema
+        return check_dataset_schema(dataset_id, workers=workers, progress_fn=progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_schema_report")
+    def get_schema_report(dataset_id: int) -> Optional[dict]:
+        """获取数据集已保存的数据格式校验结果，尚未校验时返回 None"""
+        from utils.schema import get_schema_report
+        return get_schema_report(dataset_id)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.sample_items")
+    def sample_items(dataset_id: int, n: int, seed: int = None, data_type: str = None) -> List[tuple]:
+        """流式随机抽样数据，返回 [(行号, 数据项), ...]，无需构建列式副本"""
+        from utils.dataset import sample_items
+        return sample_items(dataset_id, n, seed, data_type)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.compute_dedup_signatures")
+    def compute_dedup_signatures(dataset_id: int, with_minhash: bool = False, workers: int = None,
+                                 force: bool = False, progress_callback=None) -> int:
+        """计算数据集的去重签名（已计算过的数据集会被跳过），返回签名条数"""
+        from utils.dedup import compute_dataset_signatures
+        return compute_dataset_signatures(dataset_id, with_minhash, workers, force, progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.build_video_keyframes")
+    def build_video_keyframes(dataset_id: int, workers: int = None, force: bool = False,
+                              progress_callback=None) -> dict:
+        """为数据集中的视频生成封面与关键帧缓存，返回各状态的视频数量"""
+        from utils.keyframes import build_dataset_keyframes
+        return build_dataset_keyframes(dataset_id, workers, force, progress_callback)
+
+    @staticmethod
+    def start_keyframe_job(dataset_id: int) -> bool:
+        """在后台生成数据集的视频关键帧，已有任务在运行时返回 False"""
+        from utils.keyframes import start_keyframe_job
+        return start_keyframe_job(dataset_id)
+
+    @staticmethod
+    def get_keyframe_job(dataset_id: int) -> Optional[dict]:
+        """获取后台关键帧任务状态"""
+        from utils.keyframes import get_keyframe_job
+        return get_keyframe_job(dataset_id)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.profile_images")
+    def profile_images(dataset_id: int, workers: int = None, force: bool = False, progress_callback=None) -> dict:
+        """只读取图片文件头，统计数据集图片的格式、分辨率、宽高比与文件大小分布并保存"""
+        from utils.media_profile import profile_dataset_images
+        return profile_dataset_images(dataset_id, workers=workers, force=force, progress_fn=progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_image_profile")
+    def get_image_profile(dataset_id: int) -> Optional[dict]:
+        """获取数据集已保存的图片统计结果，尚未统计时返回 None"""
+        from utils.media_profile import get_dataset_image_profile
+        return get_dataset_image_profile(dataset_id)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.compute_disk_usage")
+    def compute_disk_usage(dataset_ids: List[int] = None, force: bool = False, workers: int = None,
+                           progress_callback=None) -> dict:
+        """增量统计数据集（默认全部）引用的媒体文件与数据副本的存储占用，返回本次统计的结果"""
+        from utils.disk_usage import compute_disk_usage
+        return compute_disk_usage(dataset_ids, force=force, workers=workers, progress_fn=progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_disk_usage_map")
+    def get_disk_usage_map() -> dict:
+        """获取所有已统计数据集的存储占用 {数据集ID: 统计结果}"""
+        from utils.disk_usage import get_disk_usage_map
+        return get_disk_usage_map()
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_aligned_items")
+    def get_aligned_items(dataset_ids: List[int], start: int = 0, count: int = 10,
+                          align: str = "line") -> List[list]:
+        """按行号或 id 对齐读取多个数据集的数据，用于并排对比"""
+        from utils.compare import get_aligned_items
+        return get_aligned_items(dataset_ids, start, count, align)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_dataset_analytics")
+    def get_dataset_analytics(dataset_id: int) -> dict:
+        """基于列式副本获取数据集的类型、对话轮数与文本长度统计（首次调用时构建副本）"""
+        from utils.columnar import get_dataset_column_stats
+        return get_dataset_column_stats(dataset_id)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.filter_dataset_lines")
+    def filter_dataset_lines(dataset_id: int, **filters) -> List[int]:
+        """按类型、对话轮数、文本长度筛选数据，返回行号列表"""
+        from utils.columnar import filter_lines
+        return filter_lines(dataset_id, **filters)
 
     @staticmethod
+    @metrics.timed("service.DatasetService.sample_dataset_lines")
+    def sample_dataset_lines(dataset_id: int, n: int, seed: int = None, **filters) -> List[int]:
+        """在满足筛选条件的数据中随机抽样，返回行号列表"""
+        from utils.columnar import sample_lines
+        return sample_lines(dataset_id, n, seed, **filters)
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.get_dataset_names")
     def get_dataset_names() -> List[tuple]:
         """获取数据集ID和名称列表"""
         from utils.database import get_dataset_names
         return get_dataset_names()
 
     @staticmethod
+    @metrics.timed("service.DatasetService.get_dataset_details")
     def get_dataset_details(dataset_id: int) -> Optional[tuple]:
         """获取数据集详细信息"""
         conn = get_db_connection()
@@ -82,6 +240,22 @@ class DatasetService:
         return cursor.fetchone()
 
     @staticmethod
+    @metrics.timed("service.DatasetService.get_import_report")
+    def get_import_report(dataset_id: int) -> Optional[dict]:
+        """获取数据集导入时跳过的行数与隔离文件路径，数据集不存在时返回 None"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT skipped_count, quarantine_path FROM datasets WHERE id = ?",
+            (dataset_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return {"skipped_count": row[0] or 0, "quarantine_path": row[1]}
+
+    @staticmethod
+    @metrics.timed("service.DatasetService.update_dataset")
     def update_dataset(dataset_id: int, path: str = None, root_path: str = None, tags: List[str] = None) -> bool:
         """更新数据集信息"""
         try:
@@ -90,12 +264,26 @@ class DatasetService:
             
             updates = []
             params = []
+            scopes = [SCOPE_DATASETS] + ([SCOPE_TAGS] if tags is not None else [])
+            cursor.execute("SELECT path, root_path FROM datasets WHERE id = ?", (dataset_id,))
+            row = cursor.fetchone()
+            path_changed = False
             
             if path is not None:
+                path_changed = bool(row) and row[0] != path
                 updates.append("path = ?")
                 params.append(path)
+                # 更换数据文件后不再对应导入时的原始文件，清除指纹避免复用导入匹配到该数据集
+                if path_changed:
+                    updates.append("fingerprint = NULL, file_size = NULL")
             
             if root_path is not None:
+                # 去重签名、存储占用与图片统计包含按根目录解析的媒体路径，根目录变化后需要重新计算
+                if row and row[1] != root_path:
+                    for table in ("item_signatures", "minhash_bands", "dedup_status", "disk_usage", "usage_files",
+                                  "media_profile"):
+                        cursor.execute(f"DELETE FROM {table} WHERE dataset_id = ?", (dataset_id,))
+                    scopes.append(SCOPE_DISK_USAGE)
                 updates.append("root_path = ?")
                 params.append(root_path)
             
@@ -110,8 +298,11 @@ class DatasetService:
             params.append(dataset_id)
             
             cursor.execute(query, params)
+            bump_revision(conn, *scopes)
             conn.commit()
-            DatasetService.clear_cache()
+            # 数据文件路径变化后重新统计数据量与类型
+            if path_changed:
+                DatasetService.refresh_dataset_stats(dataset_id)
             return True
         except Exception as e:
             print(f"更新数据集失败: {str(e)}")
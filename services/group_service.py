@@ -1,10 +1,14 @@
 from typing import List, Tuple, Optional
 import json
 from datetime import datetime
-from utils.database import get_db_connection
+from utils.database import get_db_connection, bump_revision, SCOPE_GROUPS
+from models import DatasetGroup
+from utils import jsonl
+from utils import metrics
 
 class GroupService:
     @staticmethod
+    @metrics.timed("service.GroupService.create_dataset_group")
     def create_dataset_group(name: str, dataset_ids: List[int]) -> Tuple[bool, str]:
         """创建新的数据集分组"""
         try:
@@ -21,20 +25,30 @@ class GroupService:
                 "INSERT INTO dataset_groups (name, dataset_ids, create_time) VALUES (?, ?, ?)",
                 (name, json.dumps(dataset_ids), datetime.now().isoformat())
             )
+            bump_revision(conn, SCOPE_GROUPS)
             conn.commit()
             return True, "分组创建成功"
         except Exception as e:
             return False, f"创建分组失败: {str(e)}"
 
     @staticmethod
+    @metrics.timed("service.GroupService.get_all_groups")
     def get_all_groups() -> List[Tuple]:
         """获取所有分组信息"""
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT id, name, dataset_ids, create_time FROM dataset_groups")
+        cursor.execute(f"SELECT {DatasetGroup.COLUMNS} FROM dataset_groups")
         return cursor.fetchall()
 
     @staticmethod
+    @metrics.timed("service.GroupService.list_groups")
+    def list_groups() -> List[DatasetGroup]:
+        """获取所有分组的 DatasetGroup 对象（进程内缓存，数据集 ID 列表按需解码）"""
+        from utils.group import load_group_models
+        return load_group_models()
+
+    @staticmethod
+    @metrics.timed("service.GroupService.get_group_datasets")
     def get_group_datasets(group_id: int) -> Optional[List[int]]:
         """获取分组中的数据集ID列表"""
         conn = get_db_connection()
@@ -42,10 +56,11 @@ class GroupService:
         cursor.execute("SELECT dataset_ids FROM dataset_groups WHERE id = ?", (group_id,))
         result = cursor.fetchone()
         if result:
-            return json.loads(result[0])
+            return jsonl.loads(result[0])
         return None
 
     @staticmethod
+    @metrics.timed("service.GroupService.update_group_datasets")
     def update_group_datasets(group_id: int, dataset_ids: List[int]) -> bool:
         """更新分组中的数据集"""
         try:
@@ -55,6 +70,7 @@ class GroupService:
                 "UPDATE dataset_groups SET dataset_ids = ? WHERE id = ?",
                 (json.dumps(dataset_ids), group_id)
             )
+            bump_revision(conn, SCOPE_GROUPS)
             conn.commit()
             return True
         except Exception as e:
@@ -62,12 +78,13 @@ class GroupService:
             return False
 
     @staticmethod
+    @metrics.timed("service.GroupService.get_group_details")
     def get_group_details(group_id: int) -> Optional[dict]:
         """获取分组详细信息"""
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute(
-            "SELECT id, name, dataset_ids, create_time FROM dataset_groups WHERE id = ?",
+            f"SELECT {DatasetGroup.COLUMNS} FROM dataset_groups WHERE id = ?",
             (group_id,)
         )
         result = cursor.fetchone()
@@ -75,24 +92,27 @@ class GroupService:
             return {
                 "id": result[0],
                 "name": result[1],
-                "dataset_ids": json.loads(result[2]),
+                "dataset_ids": jsonl.loads(result[2]),
                 "create_time": result[3]
             }
         return None
 
     @staticmethod
+    @metrics.timed("service.GroupService.delete_dataset_group")
     def delete_dataset_group(group_id: int) -> Tuple[bool, str]:
         """删除数据集分组"""
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("DELETE FROM dataset_groups WHERE id = ?", (group_id,))
+            bump_revision(conn, SCOPE_GROUPS)
             conn.commit()
             return True, "分组删除成功"
         except Exception as e:
             return False, f"删除分组失败: {str(e)}"
 
     @staticmethod
+    @metrics.timed("service.GroupService.export_group_info")
     def export_group_info(group_id: int) -> Optional[dict]:
         """导出分组信息"""
         group = GroupService.get_group_details(group_id)
@@ -119,6 +139,14 @@ class GroupService:
         }
 
     @staticmethod
+    @metrics.timed("service.GroupService.export_group_config")
+    def export_group_config(group_id: int) -> Optional[dict]:
+        """导出分组为批量导入配置格式 {名称: {root, annotation, length}}"""
+        from utils.group import export_group_info
+        return export_group_info(group_id)
+
+    @staticmethod
+    @metrics.timed("service.GroupService.get_group_stats")
     def get_group_stats(group_id: int) -> dict:
         """获取分组统计数据"""
         group = GroupService.get_group_details(group_id)
@@ -157,9 +185,47 @@ class GroupService:
             stats['multi_image'] += multi or 0
             stats['video'] += video or 0
             stats['datasets'][name] = total or 0
-            
+
+        # 存储占用（跨数据集共用的文件只计一次），未统计的数据集不计入
+        from utils.disk_usage import get_datasets_disk_usage
+        stats['disk'] = get_datasets_disk_usage(group["dataset_ids"])
         return stats
 
+    @staticmethod
+    @metrics.timed("service.GroupService.get_group_analytics")
+    def get_group_analytics(group_id: int) -> dict:
+        """基于列式副本获取分组的对话轮数与文本长度统计"""
+        from utils.columnar import get_group_column_stats
+        return get_group_column_stats(group_id)
+
+    @staticmethod
+    @metrics.timed("service.GroupService.get_group_image_profile")
+    def get_group_image_profile(group_id: int, workers: int = None, progress_callback=None) -> dict:
+        """获取分组内所有数据集的图片格式、分辨率、宽高比与文件大小分布（尚未统计的数据集先统计）"""
+        from utils.media_profile import get_group_image_profile
+        return get_group_image_profile(group_id, workers=workers, progress_fn=progress_callback)
+
+    @staticmethod
+    @metrics.timed("service.GroupService.open_group_view")
+    def open_group_view(group_id: int, seed: int = None):
+        """将分组作为一个虚拟数据集打开，按全局序号（可按种子打乱）读取各成员的数据；分组不存在时返回 None"""
+        from utils.group_preview import open_group_view
+        return open_group_view(group_id, seed)
+
+    @staticmethod
+    @metrics.timed("service.GroupService.get_group_duplicate_stats")
+    def get_group_duplicate_stats(group_id: int, with_minhash: bool = False, workers: int = None) -> dict:
+        """获取分组内跨数据集的重复统计（精确重复，可选近似重复）"""
+        from utils.dedup import get_group_duplicate_stats
+        return get_group_duplicate_stats(group_id, with_minhash=with_minhash, workers=workers)
+
+    @staticmethod
+    @metrics.timed("service.GroupService.export_dedup_manifest")
+    def export_dedup_manifest(group_id: int, with_minhash: bool = False, workers: int = None) -> Optional[dict]:
+        """导出分组去重后的数据清单"""
+        from utils.dedup import export_dedup_manifest
+        return export_dedup_manifest(group_id, with_minhash=with_minhash, workers=workers)
+
     @staticmethod
     def clear_groups_cache():
         """清除分组相关缓存"""
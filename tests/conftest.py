@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# config 在导入时读取环境变量，测试使用独立的临时数据库与上传目录
+_TMP_DIR = tempfile.mkdtemp(prefix="dataset-tests-")
+os.environ.setdefault("DATABASE_URL", os.path.join(_TMP_DIR, "metadata.db"))
+os.environ.setdefault("UPLOAD_FOLDER", os.path.join(_TMP_DIR, "uploads"))
@@ -0,0 +1,30 @@
+import json
+from utils.dataset import import_jsonl_dataset
+
+def _write_jsonl(path, bad_lines):
+    lines = [json.dumps({"conversations": [{"from": "human", "value": str(i)}]}) for i in range(5)]
+    for pos in bad_lines:
+        lines.insert(pos, "{bad")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_strict_import_does_not_reuse_lenient_dataset(tmp_path):
+    data_path = _write_jsonl(tmp_path / "data.jsonl", bad_lines=[1])
+    ok, msg, lenient_id = import_jsonl_dataset("reuse_lenient", str(tmp_path), data_path, max_errors=5)
+    assert ok, msg
+
+    # 严格导入与直接导入结果一致：在第一处无法解析的行失败
+    ok, msg, strict_id = import_jsonl_dataset("reuse_strict", str(tmp_path), data_path, max_errors=0)
+    assert (ok, msg, strict_id) == (False, "第 2 行 JSON 解析失败", -1)
+
+    # 允许的错误行数足够时仍复用已有数据集
+    ok, msg, reused_id = import_jsonl_dataset("reuse_lenient_again", str(tmp_path), data_path, max_errors=5)
+    assert ok and "已复用" in msg
+    assert reused_id != lenient_id
+
+def test_reuse_respects_error_budget(tmp_path):
+    data_path = _write_jsonl(tmp_path / "data.jsonl", bad_lines=[1, 3, 5])
+    ok, msg, _ = import_jsonl_dataset("budget_source", str(tmp_path), data_path, max_errors=-1)
+    assert ok, msg
+    ok, msg, _ = import_jsonl_dataset("budget_tight", str(tmp_path), data_path, max_errors=2)
+    assert not ok and "已复用" not in msg
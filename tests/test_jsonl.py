@@ -0,0 +1,45 @@
+import json
+import pytest
+from utils import jsonl
+from utils.dataset import get_data_type
+
+# classify_line 只扫描键与取值开头，结果必须与完整解码后 get_data_type 的判断一致
+CASES = [
+    {"conversations": []},
+    {"image": "a.jpg", "conversations": []},
+    {"image": ["a.jpg", "b.jpg"]},
+    {"image": []},
+    {"image": ""},
+    {"image": None, "video": "v.mp4"},
+    {"video": "", "image": "a.jpg"},
+    {"id": 1, "video": ["v.mp4"]},
+    # 嵌套对象中的同名键不影响类型
+    {"meta": {"image": "x.jpg"}, "conversations": []},
+    {"meta": {"video": "v.mp4", "image": ["a.jpg"]}, "image": "b.jpg"},
+    {"meta": [{"image": "x.jpg"}], "conversations": [{"from": "human", "value": "hi"}]},
+    {"conversations": [{"from": "human", "value": "<image>", "image": "x.jpg"}]},
+    {"meta": {"a": [1, {"b": "}]"}]}, "video": "v.mp4"},
+    # 字符串中的键名、括号与转义字符
+    {"conversations": [{"from": "human", "value": '"image": "x.jpg"'}]},
+    {"note": 'say "video": "v.mp4" {[', "image": "a.jpg"},
+    {"note": "trailing backslash \\", "image": ["a.jpg"]},
+    {"note": "\\\"image\\\": [1]", "conversations": []},
+    {"image": "\"quoted\".jpg"},
+    {"foo \"image": ["a.jpg"], "conversations": []},
+    # 取值类型无法直接判断时回退到完整解码
+    {"image": {"path": "a.jpg"}},
+    {"video": 1},
+    {"video": True, "image": "a.jpg"},
+]
+
+@pytest.mark.parametrize("item", CASES)
+@pytest.mark.parametrize("separators", [(", ", ": "), (",", ":")])
+def test_classify_line_matches_get_data_type(item, separators):
+    line = json.dumps(item, ensure_ascii=False, separators=separators)
+    expected = get_data_type(item)
+    assert jsonl.classify_line(line) == expected
+    assert jsonl.classify_line(line.encode("utf-8") + b"\n") == expected
+
+def test_classify_line_duplicate_top_level_key_falls_back():
+    line = '{"image": "a.jpg", "image": ["a.jpg", "b.jpg"]}'
+    assert jsonl.classify_line(line) == get_data_type(json.loads(line))
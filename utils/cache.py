@@ -0,0 +1,130 @@
+import time
+import pickle
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from . import metrics
+from . import shared_cache
+
+# 与 Streamlit 无关的缓存层：数据访问模块使用这里的装饰器，
+# 因此服务层可以在批处理脚本、CLI 和基准测试中直接使用。
+
+_MISSING = object()
+
+class MemoryCache:
+    """进程内 LRU 缓存后端，支持按条目数量限制和 TTL 过期"""
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+def _make_key(args: tuple, kwargs: dict):
+    """根据调用参数生成缓存键，参数不可哈希时退化为 pickle 摘要"""
+    key = (args, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return hashlib.blake2b(pickle.dumps(key), digest_size=16).hexdigest()
+
+def _shared_key(name: str, args: tuple, kwargs: dict) -> str:
+    """跨进程一致的缓存键：函数名 + 参数的 pickle 摘要"""
+    digest = hashlib.blake2b(pickle.dumps((args, sorted(kwargs.items())), protocol=4), digest_size=16)
+    return f"{name}:{digest.hexdigest()}"
+
+def _cached(fn, backend, name: str, lock_per_key: bool, shared: bool = False):
+    key_locks = {}
+    key_locks_guard = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        metrics.incr(f"cache.{name}.call")
+        key = _make_key(args, kwargs)
+        value = backend.get(key)
+        if value is not _MISSING:
+            return value
+        if not lock_per_key:
+            if shared:
+                # 进程内未命中时先查共享缓存，命中则只需反序列化
+                skey = _shared_key(name, args, kwargs)
+                value = shared_cache.shared_get(skey)
+                if value is not shared_cache._MISSING:
+                    backend.set(key, value)
+                    return value
+            metrics.incr(f"cache.{name}.miss")
+            value = fn(*args, **kwargs)
+            backend.set(key, value)
+            if shared:
+                shared_cache.shared_set(skey, value, backend.ttl)
+            return value
+        # 资源类缓存保证同一参数只创建一次
+        with key_locks_guard:
+            key_lock = key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = backend.get(key)
+            if value is _MISSING:
+                metrics.incr(f"cache.{name}.miss")
+                value = fn(*args, **kwargs)
+                backend.set(key, value)
+        return value
+
+    wrapper.clear = backend.clear
+    wrapper.cache = backend
+    return wrapper
+
+def cache_data(fn=None, *, ttl: float = None, max_entries: int = None, name: str = None,
+               shared: bool = False):
+    """
+    缓存函数返回值（按参数区分），用法与 st.cache_data 类似，提供 .clear() 方法。
+    返回的对象是共享的，调用方不应原地修改。
+    shared 为 True 时同时使用跨进程共享缓存（配置了 SHARED_CACHE_URL 时生效），
+    参数与返回值需要可以 pickle，且参数需足以确定结果（如包含文件版本或数据版本号）。
+    .clear() 只清除进程内缓存。
+    """
+    def decorator(func):
+        backend = MemoryCache(max_entries=max_entries, ttl=ttl)
+        return _cached(func, backend, name or func.__name__, lock_per_key=False, shared=shared)
+    return decorator(fn) if fn is not None else decorator
+
+def cache_resource(fn=None, *, name: str = None):
+    """
+    缓存全局资源（如数据库连接），同一参数在进程内只创建一次，用法与 st.cache_resource 类似。
+    """
+    def decorator(func):
+        return _cached(func, MemoryCache(), name or func.__name__, lock_per_key=True)
+    return decorator(fn) if fn is not None else decorator
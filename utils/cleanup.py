@@ -0,0 +1,225 @@
+import os
+import stat
+import time
+import shutil
+from config import UPLOAD_DIR, LINE_INDEX_DIR, KEYFRAME_DIR, GC_DERIVED_BUDGET_MB, GC_GRACE_HOURS
+from .database import get_db_connection
+from .line_index import get_index_path
+from .columnar import SIDECAR_SUFFIX, get_sidecar_path
+from .dataset import QUARANTINE_SUFFIX, CHECKPOINT_NAME
+from . import metrics
+
+# 清理报告中的类别
+CATEGORY_ORPHAN_UPLOADS = "orphan_uploads"
+CATEGORY_STALE_FILES = "stale_files"
+CATEGORY_ORPHAN_INDEXES = "orphan_indexes"
+CATEGORY_EVICTED = "evicted"
+
+CATEGORY_DESCRIPTIONS = {
+    CATEGORY_ORPHAN_UPLOADS: "不属于任何数据集的上传目录",
+    CATEGORY_STALE_FILES: "中断导入遗留的断点与临时文件、不再使用的列式副本与隔离文件",
+    CATEGORY_ORPHAN_INDEXES: "数据文件已不被任何数据集引用的行偏移索引",
+    CATEGORY_EVICTED: "超出容量上限、按最近使用时间淘汰的派生文件",
+}
+
+def _list_dir(directory: str) -> list:
+    try:
+        with os.scandir(directory) as entries:
+            return list(entries)
+    except OSError:
+        return []
+
+def _tree_stat(path: str) -> tuple:
+    """
+    文件或目录（递归）的 (总大小, 最近使用时间, 最近修改时间)。
+    最近使用时间取访问与修改时间中较晚者（relatime 挂载下访问时间约每天更新一次，足以区分冷热）。
+    """
+    size = 0
+    last_used = newest = 0.0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.lstat(current)
+        except OSError:
+            continue
+        newest = max(newest, st.st_mtime)
+        if stat.S_ISDIR(st.st_mode):
+            stack.extend(entry.path for entry in _list_dir(current))
+            continue
+        size += st.st_size
+        last_used = max(last_used, st.st_atime, st.st_mtime)
+    return size, last_used, newest
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _load_references() -> dict:
+    """
+    数据库中仍被引用的名称与文件（绝对路径）：
+    {'names': 数据集名称, 'data_paths': 数据文件, 'files': 数据文件、隔离文件与列式副本}
+    """
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT name, path, quarantine_path FROM datasets")
+    refs = {"names": set(), "data_paths": set(), "files": set()}
+    for name, data_path, quarantine_path in cursor.fetchall():
+        refs["names"].add(name)
+        refs["data_paths"].add(os.path.abspath(data_path))
+        refs["files"].add(os.path.abspath(data_path))
+        refs["files"].add(os.path.abspath(get_sidecar_path(name, data_path)))
+        if quarantine_path:
+            refs["files"].add(os.path.abspath(quarantine_path))
+    return refs
+
+def _is_referenced_dir(directory: str, refs: dict) -> bool:
+    """UPLOAD_DIR 下的目录属于某个数据集，或其中有文件仍被数据集引用（复用导入时多个数据集共用存储副本）"""
+    if os.path.basename(directory) in refs["names"]:
+        return True
+    prefix = directory + os.sep
+    return any(path.startswith(prefix) for path in refs["files"])
+
+def _upload_child(path: str):
+    """path 位于 UPLOAD_DIR 的某个数据集目录中时返回该目录（绝对路径），否则返回 None"""
+    upload_root = os.path.abspath(UPLOAD_DIR)
+    path = os.path.abspath(path)
+    if not path.startswith(upload_root + os.sep):
+        return None
+    top = path[len(upload_root) + 1:].split(os.sep)[0]
+    if not top or top.startswith("."):
+        return None
+    return os.path.join(upload_root, top)
+
+def remove_dataset_files(name: str, data_path: str) -> int:
+    """
+    在数据集记录删除并提交之后清理其文件，返回释放的字节数。
+    只删除 UPLOAD_DIR 中的数据集目录（存储副本、隔离文件、列式副本与导入断点）及数据文件的行偏移索引；
+    仍被其他数据集引用（复用导入）的目录与索引保留，导入前的原始文件与媒体文件不会被删除。
+    """
+    refs = _load_references()
+    candidates = {_upload_child(os.path.join(UPLOAD_DIR, name, "")), _upload_child(data_path)}
+    freed = 0
+    for directory in candidates:
+        if directory and os.path.isdir(directory) and not _is_referenced_dir(directory, refs):
+            freed += _tree_stat(directory)[0]
+            _remove(directory)
+
+    data_path = os.path.abspath(data_path)
+    if data_path not in refs["data_paths"]:
+        index_path = get_index_path(data_path)
+        if os.path.isfile(index_path):
+            freed += _tree_stat(index_path)[0]
+            _remove(index_path)
+    return freed
+
+@metrics.timed("cleanup.collect_garbage")
+def collect_garbage(budget_mb: int = None, grace_hours: float = None, dry_run: bool = False,
+                    progress_fn=None) -> dict:
+    """
+    回收不再需要的文件，依次处理：
+      1. UPLOAD_DIR 下不属于任何数据集的目录（已删除数据集的存储副本、中断后放弃的导入）；
+      2. 数据集目录中中断导入遗留的断点与 *.tmp 临时文件，以及数据文件更换后不再使用的列式副本与隔离文件；
+      3. 数据文件已不被任何数据集引用的行偏移索引，索引与关键帧目录中遗留的临时文件；
+      4. 派生文件（行偏移索引、列式副本、视频关键帧）总大小超过容量上限时，按最近使用时间从旧到新淘汰，
+         被淘汰的文件在下次使用时自动重新生成。
+    1-3 只处理修改时间早于 grace_hours 之前的文件，避免删除正在导入或生成中的文件。
+    关键帧按视频内容寻址，判断是否仍被引用需要读取全部视频，因此只参与第 4 步的容量淘汰。
+    参数:
+      - budget_mb: 派生文件的容量上限（MB），默认读取 GC_DERIVED_BUDGET_MB，0 为不限
+      - grace_hours: 默认读取 GC_GRACE_HOURS
+      - dry_run: 只统计可回收的文件，不删除
+      - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+    返回值: {'dry_run': bool, 'freed_bytes': int, 'derived_bytes': int（清理后派生文件的总大小）,
+             'categories': {类别: {'count': int, 'bytes': int}}, 'removed': [路径, ...]}
+    """
+    budget = (GC_DERIVED_BUDGET_MB if budget_mb is None else budget_mb) * 1024 * 1024
+    cutoff = time.time() - (GC_GRACE_HOURS if grace_hours is None else grace_hours) * 3600
+    refs = _load_references()
+    report = {
+        "dry_run": dry_run,
+        "freed_bytes": 0,
+        "derived_bytes": 0,
+        "categories": {category: {"count": 0, "bytes": 0} for category in CATEGORY_DESCRIPTIONS},
+        "removed": [],
+    }
+
+    def reclaim(path: str, category: str, size: int) -> None:
+        if not dry_run:
+            _remove(path)
+        report["categories"][category]["count"] += 1
+        report["categories"][category]["bytes"] += size
+        report["freed_bytes"] += size
+        report["removed"].append(path)
+
+    # 可按容量淘汰的派生文件 [(最近使用时间, 大小, 路径)]
+    derived = []
+
+    if progress_fn:
+        progress_fn("正在扫描上传目录...", 0)
+    for entry in _list_dir(os.path.abspath(UPLOAD_DIR)):
+        if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+            continue
+        if not _is_referenced_dir(entry.path, refs):
+            size, _, newest = _tree_stat(entry.path)
+            if newest < cutoff:
+                reclaim(entry.path, CATEGORY_ORPHAN_UPLOADS, size)
+            continue
+        for child in _list_dir(entry.path):
+            if not child.is_file(follow_symlinks=False):
+                continue
+            name = child.name
+            if not (name == CHECKPOINT_NAME or name.endswith((".tmp", SIDECAR_SUFFIX, QUARANTINE_SUFFIX))):
+                continue
+            st = child.stat(follow_symlinks=False)
+            if child.path in refs["files"]:
+                if name.endswith(SIDECAR_SUFFIX):
+                    derived.append((max(st.st_atime, st.st_mtime), st.st_size, child.path))
+            elif st.st_mtime < cutoff:
+                reclaim(child.path, CATEGORY_STALE_FILES, st.st_size)
+
+    if progress_fn:
+        progress_fn("正在扫描行偏移索引...", 0.4)
+    live_indexes = {os.path.abspath(get_index_path(path)) for path in refs["data_paths"]}
+    for shard in _list_dir(os.path.abspath(LINE_INDEX_DIR)):
+        for entry in _list_dir(shard.path) if shard.is_dir(follow_symlinks=False) else []:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            st = entry.stat(follow_symlinks=False)
+            if entry.path in live_indexes:
+                derived.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+            elif st.st_mtime < cutoff:
+                category = CATEGORY_STALE_FILES if entry.name.endswith(".tmp") else CATEGORY_ORPHAN_INDEXES
+                reclaim(entry.path, category, st.st_size)
+
+    if progress_fn:
+        progress_fn("正在扫描视频关键帧...", 0.6)
+    for shard in _list_dir(os.path.abspath(KEYFRAME_DIR)):
+        for entry in _list_dir(shard.path) if shard.is_dir(follow_symlinks=False) else []:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            size, last_used, newest = _tree_stat(entry.path)
+            if not entry.name.startswith(".tmp_"):
+                derived.append((last_used, size, entry.path))
+            elif newest < cutoff:
+                reclaim(entry.path, CATEGORY_STALE_FILES, size)
+
+    total = sum(size for _, size, _ in derived)
+    if budget and total > budget:
+        if progress_fn:
+            progress_fn("正在按最近使用时间淘汰派生文件...", 0.9)
+        for _, size, path in sorted(derived):
+            if total <= budget:
+                break
+            reclaim(path, CATEGORY_EVICTED, size)
+            total -= size
+    report["derived_bytes"] = total
+    if not dry_run:
+        metrics.incr("cleanup.freed_bytes", report["freed_bytes"])
+    if progress_fn:
+        progress_fn("清理完成", 1.0)
+    return report
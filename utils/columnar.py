@@ -0,0 +1,214 @@
+import os
+import json
+import random
+from config import UPLOAD_DIR
+from .database import get_db_connection
+from .dataset import get_data_type
+from . import jsonl
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+SIDECAR_SUFFIX = ".columns.parquet"
+BATCH_ROWS = 50000
+# 写入 Parquet 元数据的源文件状态，用于判断列式副本是否过期
+_SOURCE_META_KEY = b"vlm_source"
+
+if HAS_ARROW:
+    SIDECAR_SCHEMA = pa.schema([
+        ("line_no", pa.int64()),
+        ("id", pa.string()),
+        ("type", pa.dictionary(pa.int8(), pa.string())),
+        ("images", pa.list_(pa.string())),
+        ("videos", pa.list_(pa.string())),
+        ("num_images", pa.int32()),
+        ("num_videos", pa.int32()),
+        ("turns", pa.int32()),
+        ("text_len", pa.int64()),
+        ("prompt_len", pa.int64()),
+        ("response_len", pa.int64()),
+    ])
+
+def _require_arrow():
+    if not HAS_ARROW:
+        raise RuntimeError("列式分析需要安装 pyarrow")
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)]
+
+def _source_state(data_path: str) -> str:
+    stat = os.stat(data_path)
+    return json.dumps({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+
+def _get_dataset_row(dataset_id: int):
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT name, path FROM datasets WHERE id = ?", (dataset_id,))
+    return cursor.fetchone()
+
+def get_sidecar_path(dataset_name: str, data_path: str) -> str:
+    """列式副本存放在 UPLOAD_DIR/<数据集名称>/ 下"""
+    return os.path.join(UPLOAD_DIR, dataset_name, os.path.basename(data_path) + SIDECAR_SUFFIX)
+
+def _is_fresh(sidecar_path: str, data_path: str) -> bool:
+    if not os.path.isfile(sidecar_path):
+        return False
+    try:
+        metadata = pq.read_schema(sidecar_path).metadata or {}
+    except Exception:
+        return False
+    return metadata.get(_SOURCE_META_KEY, b"").decode() == _source_state(data_path)
+
+def _columns_for_item(line_no: int, item: dict) -> dict:
+    conversations = [c for c in item.get('conversations') or [] if isinstance(c, dict)]
+    lengths = [len(str(c.get('value', ''))) for c in conversations]
+    prompt_len = sum(l for c, l in zip(conversations, lengths) if c.get('from') == 'human')
+    images = _as_list(item.get('image'))
+    videos = _as_list(item.get('video'))
+    return {
+        "line_no": line_no,
+        "id": None if item.get('id') is None else str(item.get('id')),
+        "type": get_data_type(item),
+        "images": images,
+        "videos": videos,
+        "num_images": len(images),
+        "num_videos": len(videos),
+        "turns": len(conversations),
+        "text_len": sum(lengths),
+        "prompt_len": prompt_len,
+        "response_len": sum(lengths) - prompt_len,
+    }
+
+def build_sidecar(data_path: str, sidecar_path: str) -> str:
+    """流式解析 JSONL 并分批写入 Parquet 列式副本，返回副本路径"""
+    _require_arrow()
+    os.makedirs(os.path.dirname(sidecar_path), exist_ok=True)
+    schema = SIDECAR_SCHEMA.with_metadata({_SOURCE_META_KEY: _source_state(data_path).encode()})
+    tmp_path = sidecar_path + ".tmp"
+    with pq.ParquetWriter(tmp_path, schema) as writer, open(data_path, 'rb') as f:
+        rows = []
+        for line_no, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = jsonl.loads(line)
+            except jsonl.DecodeError:
+                continue
+            if not isinstance(item, dict):
+                continue
+            rows.append(_columns_for_item(line_no, item))
+            if len(rows) >= BATCH_ROWS:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                rows = []
+        if rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    os.replace(tmp_path, sidecar_path)
+    return sidecar_path
+
+def ensure_sidecar(dataset_id: int) -> str:
+    """
+    获取数据集的列式副本路径，首次使用或源文件变化时才（重新）构建。
+    """
+    _require_arrow()
+    row = _get_dataset_row(dataset_id)
+    if not row:
+        raise ValueError(f"数据集 {dataset_id} 不存在")
+    name, data_path = row
+    sidecar_path = get_sidecar_path(name, data_path)
+    if not _is_fresh(sidecar_path, data_path):
+        build_sidecar(data_path, sidecar_path)
+    return sidecar_path
+
+def load_columns(dataset_id: int, columns: list = None):
+    """以内存映射方式读取列式副本，返回 pyarrow.Table"""
+    return pq.read_table(ensure_sidecar(dataset_id), columns=columns, memory_map=True)
+
+def _filter_mask(table, data_type: str = None, min_turns: int = None, max_turns: int = None,
+                 min_text_len: int = None, max_text_len: int = None):
+    """组合筛选条件为布尔掩码，没有条件时返回 None"""
+    conditions = []
+    if data_type:
+        conditions.append(pc.equal(pc.cast(table["type"], pa.string()), data_type))
+    if min_turns is not None:
+        conditions.append(pc.greater_equal(table["turns"], min_turns))
+    if max_turns is not None:
+        conditions.append(pc.less_equal(table["turns"], max_turns))
+    if min_text_len is not None:
+        conditions.append(pc.greater_equal(table["text_len"], min_text_len))
+    if max_text_len is not None:
+        conditions.append(pc.less_equal(table["text_len"], max_text_len))
+    mask = None
+    for condition in conditions:
+        mask = condition if mask is None else pc.and_(mask, condition)
+    return mask
+
+def filter_lines(dataset_id: int, **filters) -> list:
+    """
+    按列条件筛选数据，返回满足条件的行号列表（从 0 开始）。
+    支持的条件: data_type, min_turns, max_turns, min_text_len, max_text_len
+    """
+    table = load_columns(dataset_id, ["line_no", "type", "turns", "text_len"])
+    mask = _filter_mask(table, **filters)
+    if mask is not None:
+        table = table.filter(mask)
+    return table["line_no"].to_pylist()
+
+def sample_lines(dataset_id: int, n: int, seed: int = None, **filters) -> list:
+    """在满足筛选条件的数据中随机抽样 n 行，返回排序后的行号列表"""
+    lines = filter_lines(dataset_id, **filters)
+    if n >= len(lines):
+        return lines
+    return sorted(random.Random(seed).sample(lines, n))
+
+def _summarize(table) -> dict:
+    """对列式数据做向量化统计"""
+    if table.num_rows == 0:
+        return {"total": 0, "types": {}, "turns": {}, "text_len": {}, "images": 0, "videos": 0}
+    type_counts = pc.value_counts(pc.cast(table["type"], pa.string())).to_pylist()
+    turn_counts = pc.value_counts(table["turns"]).to_pylist()
+    quantiles = pc.quantile(table["text_len"], q=[0.5, 0.9, 0.99]).to_pylist()
+    return {
+        "total": table.num_rows,
+        "types": {entry["values"]: entry["counts"] for entry in type_counts},
+        "turns": dict(sorted((entry["values"], entry["counts"]) for entry in turn_counts)),
+        "text_len": {
+            "mean": pc.mean(table["text_len"]).as_py(),
+            "min": pc.min(table["text_len"]).as_py(),
+            "max": pc.max(table["text_len"]).as_py(),
+            "p50": quantiles[0],
+            "p90": quantiles[1],
+            "p99": quantiles[2],
+        },
+        "images": pc.sum(table["num_images"]).as_py(),
+        "videos": pc.sum(table["num_videos"]).as_py(),
+    }
+
+_STAT_COLUMNS = ["type", "turns", "text_len", "num_images", "num_videos"]
+
+def get_dataset_column_stats(dataset_id: int) -> dict:
+    """基于列式副本统计数据集的类型、对话轮数与文本长度分布"""
+    return _summarize(load_columns(dataset_id, _STAT_COLUMNS))
+
+def get_group_column_stats(group_id: int) -> dict:
+    """将分组内所有数据集的列式副本拼接后统一统计"""
+    _require_arrow()
+    from .group import get_group_details
+    group = get_group_details(group_id)
+    if not group:
+        return {}
+    tables = []
+    for ds_id in group["dataset_ids"]:
+        if _get_dataset_row(ds_id):
+            tables.append(load_columns(ds_id, _STAT_COLUMNS))
+    if not tables:
+        return {}
+    return _summarize(pa.concat_tables(tables))
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .database import get_db_connection
+from .cache import cache_data
+from .line_index import get_line_index
+from .preview import get_items
+from . import jsonl
+from . import metrics
+
+# 对齐方式：按行号或按数据项的 id 字段
+ALIGN_BY_LINE = "line"
+ALIGN_BY_ID = "id"
+
+@cache_data(max_entries=16, shared=True)
+def _build_id_lookup(data_path: str, size: int, mtime_ns: int) -> dict:
+    with metrics.timer("compare.build_id_lookup"):
+        lookup = {}
+        with open(data_path, 'rb') as f:
+            for line_no, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    item_id = jsonl.loads(line).get('id')
+                except (jsonl.DecodeError, AttributeError):
+                    continue
+                if item_id is not None:
+                    # id 重复时以第一次出现的行为准
+                    lookup.setdefault(str(item_id), line_no)
+        return lookup
+
+def get_id_lookup(data_path: str) -> dict:
+    """
+    数据文件的 id → 行号映射，每个数据文件只扫描一次，
+    按 (路径, 大小, 修改时间) 缓存在进程内，文件变化后自动重建。
+    """
+    st = os.stat(data_path)
+    return _build_id_lookup(data_path, st.st_size, st.st_mtime_ns)
+
+def _get_data_paths(dataset_ids: list) -> list:
+    cursor = get_db_connection().cursor()
+    paths = []
+    for dataset_id in dataset_ids:
+        cursor.execute("SELECT path FROM datasets WHERE id = ?", (dataset_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError(f"数据集不存在: {dataset_id}")
+        paths.append(row[0])
+    return paths
+
+def _read_by_line_nos(data_path: str, line_nos: list) -> list:
+    """按行号读取数据，行号为 None 或解析失败的位置返回 None"""
+    index = get_line_index(data_path)
+    result = []
+    for line_no in line_nos:
+        if line_no is None:
+            result.append(None)
+            continue
+        try:
+            result.append((line_no, jsonl.loads(index.read_line(line_no))))
+        except jsonl.DecodeError:
+            result.append(None)
+    return result
+
+@metrics.timed("compare.get_aligned_items")
+def get_aligned_items(dataset_ids: list, start: int = 0, count: int = 10, align: str = ALIGN_BY_LINE) -> list:
+    """
+    读取多个数据集中对齐的数据，返回行列表，每行为各数据集对应的 (行号, 数据项) 或 None（该数据集中没有对应数据）。
+    - align 为 "line" 时按行号对齐，读取各数据集第 start 行起的 count 行；
+    - align 为 "id" 时以第一个数据集第 start 行起的 count 条数据为基准，按 id 在其余数据集中查找。
+    各数据集的读取在线程池中并发执行。
+    """
+    if align not in (ALIGN_BY_LINE, ALIGN_BY_ID):
+        raise ValueError(f"不支持的对齐方式: {align}")
+    if not dataset_ids:
+        return []
+    paths = _get_data_paths(dataset_ids)
+
+    if align == ALIGN_BY_LINE:
+        def fetch(path):
+            by_line = dict(get_items(path, start, count))
+            return [(line_no, by_line[line_no]) if line_no in by_line else None
+                    for line_no in range(start, start + count)]
+
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            columns = list(pool.map(fetch, paths))
+        # 去掉所有数据集都已读完的尾部
+        rows = [list(row) for row in zip(*columns)]
+        while rows and not any(rows[-1]):
+            rows.pop()
+        return rows
+
+    # 基准数据集读取与其余数据集的 id 映射构建并发进行
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        base_future = pool.submit(get_items, paths[0], start, count)
+        lookup_futures = [pool.submit(get_id_lookup, path) for path in paths[1:]]
+        base = base_future.result()
+        lookups = [future.result() for future in lookup_futures]
+
+        ids = [str(item.get('id')) if isinstance(item, dict) and item.get('id') is not None else None
+               for _, item in base]
+        column_futures = [
+            pool.submit(_read_by_line_nos, path, [lookup.get(i) if i is not None else None for i in ids])
+            for path, lookup in zip(paths[1:], lookups)
+        ]
+        columns = [future.result() for future in column_futures]
+
+    return [[base_entry] + [column[row] for column in columns] for row, base_entry in enumerate(base)]
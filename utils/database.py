@@ -1,44 +1,114 @@
-import sqlite3
 import json
-from datetime import datetime
-import streamlit as st
-from config import DB_PATH
-
-@st.cache_resource
-def get_db_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
-    """
-    初始化并返回 SQLite 数据库连接，使用 Streamlit 单例缓存保证全局唯一。
-    """
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS datasets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            path TEXT NOT NULL,
-            upload_time TEXT NOT NULL,
-            tags TEXT DEFAULT '[]',
-            data_type TEXT NOT NULL,
-            root_path TEXT NOT NULL,
-            item_count INTEGER DEFAULT 0,
-            text_count INTEGER DEFAULT 0,
-            single_image_count INTEGER DEFAULT 0,
-            multi_image_count INTEGER DEFAULT 0,
-            video_count INTEGER DEFAULT 0
-        )
-    """)
-    # 创建数据集分组表
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS dataset_groups (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            dataset_ids TEXT NOT NULL,
-            create_time TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    return conn
+import functools
+import contextvars
+from contextlib import contextmanager
+from config import DB_PATH, DB_POOL_SIZE
+from . import jsonl
+from .cache import cache_resource, cache_data
+from .storage import StorageBackend, ConnectionPool, create_backend
+from .migrations import migrate
+from models import Dataset
+
+# 当前上下文借出的连接池连接，设置后 get_db_connection 返回该连接
+_pooled_conn = contextvars.ContextVar("pooled_conn", default=None)
+
+@cache_resource(name="get_db_connection")
+def get_storage_backend(db_url: str = DB_PATH) -> StorageBackend:
+    """获取 DATABASE_URL 对应的存储后端（进程内单例），首次获取时执行尚未执行的数据库迁移"""
+    backend = create_backend(db_url)
+    with backend.connection() as conn:
+        migrate(conn)
+    return backend
+
+def get_db_connection(db_path: str = DB_PATH):
+    """
+    返回当前线程使用的数据库连接：SQLite 后端为进程内共享的单个连接，服务端数据库后端为从连接池借出的连接。
+    在 connection_scope() 或 pooled_connection() 上下文中返回该上下文借出的连接。
+    """
+    conn = _pooled_conn.get()
+    if conn is not None and db_path == DB_PATH:
+        return conn
+    return get_storage_backend(db_path).get_connection()
+
+@cache_resource
+def get_connection_pool(db_path: str = DB_PATH, size: int = DB_POOL_SIZE) -> ConnectionPool:
+    """获取进程内共享的连接池"""
+    return get_storage_backend(db_path).create_pool(size)
+
+@contextmanager
+def pooled_connection(pool: ConnectionPool = None):
+    """
+    从连接池借出一个连接，上下文内的 get_db_connection() 都返回该连接，
+    因此服务层代码无需修改即可在多线程中并发访问数据库。
+    """
+    pool = pool or get_connection_pool()
+    with pool.connection() as conn:
+        token = _pooled_conn.set(conn)
+        try:
+            yield conn
+        finally:
+            _pooled_conn.reset(token)
+
+@contextmanager
+def connection_scope():
+    """
+    一次页面运行、命令或后台任务的数据库连接作用域，上下文内的 get_db_connection() 都返回同一个连接。
+    服务端数据库后端在进入时从连接池借出连接，退出时回滚未提交的事务后归还；SQLite 后端沿用进程内共享的连接。
+    已在作用域中时直接复用外层的连接。
+    """
+    conn = _pooled_conn.get()
+    if conn is not None:
+        yield conn
+        return
+    with get_storage_backend().connection() as conn:
+        token = _pooled_conn.set(conn)
+        try:
+            yield conn
+        finally:
+            _pooled_conn.reset(token)
 
-@st.cache_data
+# 目录数据的变更范围。写入数据时在同一事务中递增对应范围的版本号，
+# 缓存按版本号区分，任一进程提交修改后其他进程下次读取即可看到，且只失效受影响的缓存
+SCOPE_DATASETS = "datasets"  # 数据集记录的任意字段
+SCOPE_DATASET_NAMES = "dataset_names"  # 数据集的增删与改名
+SCOPE_TAGS = "tags"  # 数据集标签
+SCOPE_GROUPS = "groups"  # 分组
+SCOPE_DISK_USAGE = "disk_usage"  # 数据集存储占用统计
+
+def bump_revision(conn, *scopes: str) -> None:
+    """递增范围版本号，需与数据修改在同一事务中提交"""
+    conn.executemany(
+        "UPDATE catalog_revision SET revision = revision + 1 WHERE scope = ?",
+        [(scope,) for scope in scopes]
+    )
+
+def get_revision(scope: str) -> int:
+    """读取范围当前的版本号"""
+    row = get_db_connection().execute(
+        "SELECT revision FROM catalog_revision WHERE scope = ?", (scope,)
+    ).fetchone()
+    return row[0] if row else 0
+
+def revision_cached(scope: str, max_entries: int = 8, shared: bool = False):
+    """
+    按范围版本号缓存函数返回值：每次调用先读取版本号（一次主键查询），
+    版本号变化后自动重新计算，旧版本的缓存按 LRU 淘汰。提供 .clear() 方法。
+    shared 为 True 时结果同时写入跨进程共享缓存（键包含版本号，各进程看到的结果一致）。
+    """
+    def decorator(func):
+        @cache_data(max_entries=max_entries, name=func.__name__, shared=shared)
+        def cached(revision, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(get_revision(scope), *args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+@revision_cached(SCOPE_DATASETS, shared=True)
 def load_all_datasets() -> list:
     """
     从数据库读取所有数据集元信息，返回列表
@@ -46,12 +116,36 @@ def load_all_datasets() -> list:
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT id, name, path, upload_time, tags, data_type, root_path, item_count, "
-        "text_count, single_image_count, multi_image_count, video_count FROM datasets"
+        f"SELECT {Dataset.COLUMNS} FROM datasets"
     )
     return cursor.fetchall()
 
-@st.cache_data
+@revision_cached(SCOPE_DATASETS)
+def load_dataset_models() -> list:
+    """
+    所有数据集的 Dataset 对象列表，由 load_all_datasets 的结果批量创建并缓存，
+    页面重复运行时复用同一批对象（标签只解码一次）
+    """
+    return Dataset.from_rows(load_all_datasets())
+
+def dataset_row_to_dict(row: tuple) -> dict:
+    """将 load_all_datasets 返回的元组转换为字典（供 CLI 与 API 输出）"""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "path": row[2],
+        "upload_time": row[3],
+        "tags": jsonl.loads(row[4]),
+        "data_type": row[5],
+        "root_path": row[6],
+        "item_count": row[7],
+        "text_count": row[8],
+        "single_image_count": row[9],
+        "multi_image_count": row[10],
+        "video_count": row[11],
+    }
+
+@revision_cached(SCOPE_DATASET_NAMES, shared=True)
 def get_dataset_names() -> list:
     """获取所有数据集名称及ID"""
     conn = get_db_connection()
@@ -59,7 +153,7 @@ def get_dataset_names() -> list:
     cursor.execute("SELECT id, name FROM datasets")
     return cursor.fetchall()
 
-@st.cache_data
+@revision_cached(SCOPE_TAGS, shared=True)
 def get_all_unique_tags() -> list:
     """
     获取所有数据集中使用过的唯一标签列表
@@ -69,7 +163,7 @@ def get_all_unique_tags() -> list:
     cursor.execute("SELECT tags FROM datasets")
     all_tags = []
     for (tags_json,) in cursor.fetchall():
-        tags = json.loads(tags_json)
+        tags = jsonl.loads(tags_json)
         all_tags.extend(tags)
     # 返回去重后的标签列表
     return sorted(list(set(all_tags)))
@@ -86,14 +180,16 @@ def update_tags(dataset_id: int, tags: list) -> None:
     cursor.execute(
         "UPDATE datasets SET tags = ? WHERE id = ?",
         (json.dumps(tags, ensure_ascii=False), dataset_id))
+    bump_revision(conn, SCOPE_DATASETS, SCOPE_TAGS)
     conn.commit()
-    clear_datasets_cache()
 
 
 def clear_datasets_cache():
     """
-    清除数据集相关缓存
+    清除本进程的数据集相关缓存。数据修改通过 bump_revision 自动失效缓存，无需调用；
+    只在数据库被绕过本应用的方式修改后用于手动刷新。
     """
     load_all_datasets.clear()
+    load_dataset_models.clear()
     get_dataset_names.clear()
     get_all_unique_tags.clear()
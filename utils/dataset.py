@@ -1,10 +1,39 @@
 import os
 import json
-import shutil
+import random
 from datetime import datetime
-import streamlit as st
-from config import UPLOAD_DIR
-from .database import get_db_connection, clear_datasets_cache
+from config import UPLOAD_DIR, IMPORT_MAX_ERRORS, IMPORT_CHECKPOINT_MB
+from .database import (get_db_connection, bump_revision, SCOPE_DATASETS, SCOPE_DATASET_NAMES,
+                       SCOPE_TAGS, SCOPE_GROUPS, SCOPE_DISK_USAGE)
+from . import jsonl
+from . import metrics
+from .line_index import LineIndexWriter
+from .schema import get_record_spec, get_spec_hash, compile_spec, SchemaTally, save_schema_report
+from .group import remove_dataset_from_groups
+from .disk_usage import format_bytes
+
+FINGERPRINT_CHUNK_SIZE = 4 * 1024 * 1024
+_WRITE_BATCH_LINES = 4096
+QUARANTINE_SUFFIX = ".quarantine.jsonl"
+CHECKPOINT_NAME = ".import_checkpoint.json"
+# 以 dataset_id 关联数据集的派生数据表，删除数据集时一并删除
+_DATASET_TABLES = ("item_signatures", "minhash_bands", "dedup_status", "schema_violations", "schema_status",
+                   "media_profile", "disk_usage", "usage_files")
+
+try:
+    import xxhash
+
+    def _new_hasher():
+        return xxhash.xxh3_128()
+
+    FINGERPRINT_ALGO = "xxh3_128"
+except ImportError:
+    import hashlib
+
+    def _new_hasher():
+        return hashlib.blake2b(digest_size=16)
+
+    FINGERPRINT_ALGO = "blake2b"
 
 def get_data_type(item: dict) -> str:
     """
@@ -20,15 +49,170 @@ def get_data_type(item: dict) -> str:
             return 'multi-image'
     return 'text'
 
-def import_jsonl_dataset(dataset_name: str, root_path: str, data_path: str, progress_fn=None) -> tuple[bool, str, int]:
+@metrics.timed("dataset.compute_file_fingerprint")
+def compute_file_fingerprint(data_path: str, progress_fn=None) -> str:
+    """
+    分块流式计算文件内容指纹，返回 "算法:十六进制摘要"。
+    优先使用 xxhash（若已安装），否则使用标准库 blake2b。
+    """
+    hasher = _new_hasher()
+    total = os.path.getsize(data_path) or 1
+    done = 0
+    with open(data_path, 'rb') as f:
+        while True:
+            chunk = f.read(FINGERPRINT_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            done += len(chunk)
+            if progress_fn:
+                progress_fn(done / total)
+    return f"{FINGERPRINT_ALGO}:{hasher.hexdigest()}"
+
+def _find_dataset_by_fingerprint(fingerprint: str):
+    """根据内容指纹查找已导入的数据集，返回数据库行或 None"""
+    cursor = get_db_connection().cursor()
+    cursor.execute(
+        "SELECT id, name, path, data_type, root_path, item_count, text_count, "
+        "single_image_count, multi_image_count, video_count, skipped_count, quarantine_path FROM datasets "
+        "WHERE fingerprint = ? ORDER BY id LIMIT 1",
+        (fingerprint,)
+    )
+    return cursor.fetchone()
+
+def _reuse_existing_dataset(dataset_name: str, root_path: str, existing: tuple,
+                            fingerprint: str, file_size: int) -> int:
+    """
+    基于内容相同的已有数据集创建新记录：复用其统计信息与存储文件，
+    根目录一致时同时复制去重签名，返回新数据集ID。
+    """
+    (src_id, _, path, data_type, src_root, item_count, text_count,
+     single_image_count, multi_image_count, video_count, skipped_count, quarantine_path) = existing
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO datasets (name, path, upload_time, tags, data_type, root_path, item_count, "
+        "text_count, single_image_count, multi_image_count, video_count, fingerprint, file_size, "
+        "skipped_count, quarantine_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            dataset_name,
+            path,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            '[]',
+            data_type,
+            root_path,
+            item_count,
+            text_count,
+            single_image_count,
+            multi_image_count,
+            video_count,
+            fingerprint,
+            file_size,
+            skipped_count,
+            quarantine_path
+        )
+    )
+    new_id = cursor.lastrowid
+    # 签名中的媒体路径依赖根目录，根目录相同时才能直接复用
+    if os.path.normpath(src_root) == os.path.normpath(root_path):
+        cursor.execute(
+            "INSERT INTO item_signatures (dataset_id, line_no, exact_hash, minhash) "
+            "SELECT ?, line_no, exact_hash, minhash FROM item_signatures WHERE dataset_id = ?",
+            (new_id, src_id)
+        )
+        cursor.execute(
+            "INSERT INTO minhash_bands (dataset_id, line_no, band, band_hash) "
+            "SELECT ?, line_no, band, band_hash FROM minhash_bands WHERE dataset_id = ?",
+            (new_id, src_id)
+        )
+        cursor.execute(
+            "INSERT INTO dedup_status (dataset_id, with_minhash, line_count, computed_time) "
+            "SELECT ?, with_minhash, line_count, computed_time FROM dedup_status WHERE dataset_id = ?",
+            (new_id, src_id)
+        )
+    # 数据格式校验只与文件内容有关，总是可以复用
+    cursor.execute(
+        "INSERT INTO schema_violations (dataset_id, rule, violation_count, first_line) "
+        "SELECT ?, rule, violation_count, first_line FROM schema_violations WHERE dataset_id = ?",
+        (new_id, src_id)
+    )
+    cursor.execute(
+        "INSERT INTO schema_status (dataset_id, spec_hash, line_count, invalid_count, checked_time) "
+        "SELECT ?, spec_hash, line_count, invalid_count, checked_time FROM schema_status WHERE dataset_id = ?",
+        (new_id, src_id)
+    )
+    bump_revision(conn, SCOPE_DATASETS, SCOPE_DATASET_NAMES)
+    conn.commit()
+    return new_id
+
+def get_quarantine_path(data_path: str) -> str:
+    """存储副本对应的隔离文件路径，导入时无法解析的行及其在源文件中的位置写入该文件"""
+    root, _ = os.path.splitext(data_path)
+    return root + QUARANTINE_SUFFIX
+
+def _get_checkpoint_path(dataset_dir: str) -> str:
+    return os.path.join(dataset_dir, CHECKPOINT_NAME)
+
+def _load_checkpoint(checkpoint_path: str, data_path: str, new_data_path: str, src_stat) -> dict:
+    """读取导入断点，源文件或存储路径已变化时返回 None"""
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (state.get("source") != os.path.abspath(data_path)
+            or state.get("source_size") != src_stat.st_size
+            or state.get("source_mtime_ns") != src_stat.st_mtime_ns
+            or state.get("target") != new_data_path
+            or not os.path.isfile(new_data_path)
+            or os.path.getsize(new_data_path) < state.get("target_offset", 0)):
+        return None
+    return state
+
+def _save_checkpoint(checkpoint_path: str, state: dict, files: list) -> None:
+    """先将存储副本与隔离文件落盘，再原子替换断点文件，保证断点记录的偏移量之前的内容都已写入"""
+    for f in files:
+        if f is not None:
+            f.flush()
+            os.fsync(f.fileno())
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def _open_truncated(path: str, size: int):
+    """将文件截断到 size 字节后以追加方式打开；文件不存在时新建"""
+    with open(path, "ab") as f:
+        f.truncate(size)
+    return open(path, "ab")
+
+def _remove_files(*paths) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+@metrics.timed("dataset.import_jsonl_dataset")
+def import_jsonl_dataset(dataset_name: str, root_path: str, data_path: str, progress_fn=None,
+                         reuse_existing: bool = True, max_errors: int = None) -> tuple[bool, str, int]:
     """
     导入 JSONL 格式数据集，支持进度回调
     参数:
       - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+      - reuse_existing: 文件内容与已有数据集相同时，直接复用其统计信息与存储文件
+      - max_errors: 允许跳过的无法解析的行数，默认读取 IMPORT_MAX_ERRORS；
+        0 为遇到第一行错误即中止，-1 为不限。跳过的行不写入存储副本，
+        连同其在源文件中的行号与字节偏移写入隔离文件，跳过的行数记录在数据集上
+    解析过程中定期保存断点，导入中断后以相同名称与文件重新导入时从上次保存的位置继续。
+    解析的同时按数据格式规范（见 utils/schema.py）校验每一条数据，逐规则的违规统计随数据集一起保存。
     """
     if not os.path.isfile(data_path):
         return False, "数据文件不存在，请检查路径", -1
+    if max_errors is None:
+        max_errors = IMPORT_MAX_ERRORS
 
+    index_writer = None
     try:
         if progress_fn:
             progress_fn("正在准备导入...", 0)
@@ -41,74 +225,184 @@ def import_jsonl_dataset(dataset_name: str, root_path: str, data_path: str, prog
         if existing:
             return True, f"数据集{dataset_name}已存在", existing[0]
 
+        src_stat = os.stat(data_path)
+        file_size = src_stat.st_size
+        fingerprint = None
+        if reuse_existing:
+            # 只有存在大小相同的数据集时才需要预先计算指纹
+            cursor.execute("SELECT 1 FROM datasets WHERE file_size = ? LIMIT 1", (file_size,))
+            if cursor.fetchone():
+                if progress_fn:
+                    progress_fn("正在计算文件指纹...", 0.05)
+                fingerprint = compute_file_fingerprint(
+                    data_path,
+                    (lambda p: progress_fn("正在计算文件指纹...", 0.05 + 0.05 * p)) if progress_fn else None
+                )
+                same = _find_dataset_by_fingerprint(fingerprint)
+                # 已有数据集跳过的行数超出本次允许的数量时不复用，按正常导入处理（并得到相同的失败结果）
+                skipped = (same[10] or 0) if same else 0
+                if same and skipped and (max_errors == 0 or 0 < max_errors < skipped):
+                    same = None
+                if same:
+                    new_id = _reuse_existing_dataset(dataset_name, root_path, same, fingerprint, file_size)
+                    if progress_fn:
+                        progress_fn("导入完成", 1.0)
+                    msg = f"数据集内容与 {same[1]} 相同，已复用其统计信息与存储文件"
+                    if skipped:
+                        msg += f"（跳过 {skipped} 行无法解析的数据）"
+                    return True, msg, new_id
+
         # 创建数据集专属目录
         dataset_dir = os.path.join(UPLOAD_DIR, dataset_name)
         os.makedirs(dataset_dir, exist_ok=True)
+        new_data_path = os.path.join(dataset_dir, os.path.basename(data_path))
+        # 源文件就是存储副本（如保留文件删除数据集后重新导入）时，写入副本会先截断源文件，导致数据丢失
+        if os.path.exists(new_data_path) and os.path.samefile(data_path, new_data_path):
+            return False, f"数据文件 {data_path} 就是该数据集的存储副本，请先将其复制到存储目录之外再导入", -1
+        quarantine_path = get_quarantine_path(new_data_path)
+        checkpoint_path = _get_checkpoint_path(dataset_dir)
 
-        if progress_fn:
-            progress_fn("正在读取文件...", 0.1)
-        
-        with open(data_path, 'r', encoding='utf-8') as f:
-            datas = f.readlines()
+        counts = {'text': 0, 'image': 0, 'multi-image': 0, 'video': 0}
+        # 解析的同时按数据格式规范校验每一条数据
+        spec = get_record_spec()
+        validate_record = compile_spec(spec)
+        tally = SchemaTally()
+        skipped = 0
+        line_no = 0
+        src_offset = 0
+        dst_offset = 0
+        quarantine_offset = 0
+        state = _load_checkpoint(checkpoint_path, data_path, new_data_path, src_stat)
+        if state:
+            counts = state["counts"]
+            tally = SchemaTally.from_dict(state["schema"])
+            skipped = state["skipped"]
+            line_no = state["line_no"]
+            src_offset = state["source_offset"]
+            dst_offset = state["target_offset"]
+            quarantine_offset = state["quarantine_offset"]
+            if progress_fn:
+                progress_fn(f"从上次中断处继续导入 (第 {line_no} 行)...", 0.1)
+        else:
+            _remove_files(quarantine_path, checkpoint_path)
+            if progress_fn:
+                progress_fn("开始解析数据...", 0.1)
 
-        total_lines = len(datas)
+        # 流式读取并解析 JSONL，同时计算内容指纹、统计各类型数据数量、写入存储副本并生成行偏移索引。
+        # 从断点继续时指纹在解析完成后对整个源文件单独计算
+        hasher = _new_hasher() if fingerprint is None and not state else None
+        index_writer = LineIndexWriter(new_data_path)
+        out = _open_truncated(new_data_path, dst_offset)
+        quarantine = _open_truncated(quarantine_path, quarantine_offset) if quarantine_offset else None
+        checkpoint_every = IMPORT_CHECKPOINT_MB * 1024 * 1024
+        try:
+            if dst_offset:
+                # 已写入部分的行偏移从存储副本中重新扫描，无需再次解析
+                offset = 0
+                with open(new_data_path, 'rb') as written:
+                    for line in written:
+                        index_writer.add(offset)
+                        offset += len(line)
+            # 解析通过的行攒够一批再写入存储副本，减少写调用次数
+            pending = []
+            last_checkpoint = src_offset
+            with open(data_path, 'rb') as f:
+                f.seek(src_offset)
+                for line in f:
+                    line_no += 1
+                    if hasher is not None:
+                        hasher.update(line)
+                    line_offset = src_offset
+                    line_size = len(line)
+                    src_offset += line_size
+                    try:
+                        item = jsonl.loads(line.strip())
+                        if not isinstance(item, dict):
+                            raise ValueError("不是 JSON 对象")
+                    except jsonl.DecodeError as e:
+                        if max_errors == 0:
+                            out.close()
+                            index_writer.abort()
+                            _remove_files(new_data_path, checkpoint_path)
+                            return False, f"第 {line_no} 行 JSON 解析失败", -1
+                        if quarantine is None:
+                            quarantine = _open_truncated(quarantine_path, 0)
+                        quarantine.write(json.dumps({
+                            "line": line_no,
+                            "offset": line_offset,
+                            "error": str(e),
+                            "raw": line.decode("utf-8", errors="replace").rstrip("\r\n"),
+                        }, ensure_ascii=False).encode("utf-8") + b"\n")
+                        skipped += 1
+                        if 0 < max_errors < skipped:
+                            out.close()
+                            quarantine.close()
+                            index_writer.abort()
+                            _remove_files(new_data_path, checkpoint_path)
+                            return False, (f"无法解析的行数超过上限 {max_errors}（第 {line_no} 行），"
+                                           f"已中止导入，无法解析的行见 {quarantine_path}"), -1
+                        continue
 
-        if progress_fn:
-            progress_fn("开始解析数据...", 0.2)
+                    tally.add(index_writer.count, validate_record(item))
+                    index_writer.add(dst_offset)
+                    pending.append(line)
+                    dst_offset += line_size
+                    counts[get_data_type(item)] += 1
+                    if len(pending) >= _WRITE_BATCH_LINES:
+                        out.writelines(pending)
+                        pending.clear()
 
-        # 读取并解析 JSONL，显示进度
-        items = []
-        for idx, line in enumerate(datas):
-            try:
-                item = json.loads(line.strip())
-                items.append(item)
-                if progress_fn and idx % 100 == 0:  # 每100行更新一次进度
-                    progress = 0.2 + (0.4 * idx / total_lines)  # 0.2-0.6范围内
-                    progress_fn(f"正在解析数据... ({idx}/{total_lines})", progress)
-            except json.JSONDecodeError:
-                return False, f"第 {idx+1} 行 JSON 解析失败", -1
-
-        if not items:
+                    if src_offset - last_checkpoint >= checkpoint_every:
+                        out.writelines(pending)
+                        pending.clear()
+                        _save_checkpoint(checkpoint_path, {
+                            "source": os.path.abspath(data_path),
+                            "source_size": src_stat.st_size,
+                            "source_mtime_ns": src_stat.st_mtime_ns,
+                            "target": new_data_path,
+                            "source_offset": src_offset,
+                            "target_offset": dst_offset,
+                            "quarantine_offset": quarantine.tell() if quarantine else 0,
+                            "line_no": line_no,
+                            "skipped": skipped,
+                            "counts": counts,
+                            "schema": tally.to_dict(),
+                        }, [out, quarantine])
+                        last_checkpoint = src_offset
+
+                    if progress_fn and line_no % 100 == 0:  # 每100行更新一次进度
+                        progress = 0.1 + (0.7 * src_offset / (file_size or 1))  # 0.1-0.8范围内
+                        progress_fn(f"正在解析数据... (已解析 {line_no} 行)", progress)
+            out.writelines(pending)
+        finally:
+            out.close()
+            if quarantine is not None:
+                quarantine.close()
+
+        item_count = sum(counts.values())
+        if not item_count:
+            index_writer.abort()
+            _remove_files(new_data_path, checkpoint_path)
+            if skipped:
+                return False, f"数据文件中没有可以解析的数据，无法解析的行见 {quarantine_path}", -1
             return False, "数据文件为空，导入失败", -1
 
-        if progress_fn:
-            progress_fn("正在推断数据类型...", 0.7)
+        stat = os.stat(new_data_path)
+        index_writer.close(dst_offset, stat.st_size, stat.st_mtime_ns)
 
-        # 统计各类型数据数量
-        text_count = 0
-        single_image_count = 0
-        multi_image_count = 0
-        video_count = 0
-        
-        # 遍历所有数据项统计数量
-        for item in items:
-            data_type = get_data_type(item)
-            if data_type == 'video':
-                video_count += 1
-            elif data_type == 'multi-image':
-                multi_image_count += 1
-            elif data_type == 'image':
-                single_image_count += 1
+        if fingerprint is None:
+            if hasher is not None:
+                fingerprint = f"{FINGERPRINT_ALGO}:{hasher.hexdigest()}"
             else:
-                text_count += 1
-        
-        item_count = len(items)
-        # 使用最多的类型作为主要数据类型
-        counts = {
-            'text': text_count,
-            'image': single_image_count,
-            'multi-image': multi_image_count,
-            'video': video_count
-        }
-        data_type = max(counts.items(), key=lambda x: x[1])[0]
+                if progress_fn:
+                    progress_fn("正在计算文件指纹...", 0.8)
+                fingerprint = compute_file_fingerprint(data_path)
 
         if progress_fn:
-            progress_fn("正在复制数据文件...", 0.8)
+            progress_fn("正在推断数据类型...", 0.85)
 
-        # 复制原始 JSONL 文件
-        new_data_filename = os.path.basename(data_path)
-        new_data_path = os.path.join(dataset_dir, new_data_filename)
-        shutil.copy2(data_path, new_data_path)
+        # 使用最多的类型作为主要数据类型
+        data_type = max(counts.items(), key=lambda x: x[1])[0]
 
         if progress_fn:
             progress_fn("正在写入数据库...", 0.9)
@@ -118,8 +412,8 @@ def import_jsonl_dataset(dataset_name: str, root_path: str, data_path: str, prog
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO datasets (name, path, upload_time, tags, data_type, root_path, item_count, "
-            "text_count, single_image_count, multi_image_count, video_count)"
-            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            "text_count, single_image_count, multi_image_count, video_count, fingerprint, file_size, "
+            "skipped_count, quarantine_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (
                 dataset_name,
                 new_data_path,
@@ -128,26 +422,48 @@ def import_jsonl_dataset(dataset_name: str, root_path: str, data_path: str, prog
                 data_type,
                 root_path,
                 item_count,
-                text_count,
-                single_image_count,
-                multi_image_count,
-                video_count
+                counts['text'],
+                counts['image'],
+                counts['multi-image'],
+                counts['video'],
+                fingerprint,
+                file_size,
+                skipped,
+                quarantine_path if skipped else None
             )
         )
+        new_id = cursor.lastrowid
+        save_schema_report(conn, new_id, tally, get_spec_hash(spec))
+        bump_revision(conn, SCOPE_DATASETS, SCOPE_DATASET_NAMES)
         conn.commit()
+        _remove_files(checkpoint_path)
+        if skipped:
+            metrics.incr("dataset.import_skipped_lines", skipped)
 
         if progress_fn:
             progress_fn("导入完成", 1.0)
 
-        return True, "数据集导入成功", cursor.lastrowid
+        msg = "数据集导入成功"
+        if skipped:
+            msg += f"，跳过 {skipped} 行无法解析的数据，详见 {quarantine_path}"
+        if tally.invalid:
+            msg += f"，{tally.invalid} 条数据不符合数据格式规范"
+        return True, msg, new_id
     except Exception as e:
+        # 保留已写入的存储副本与断点，重新导入时从断点继续
+        if index_writer is not None:
+            index_writer.abort()
         return False, f"导入过程发生错误: {str(e)}", -1
 
-def batch_import_datasets(config: dict, progress_fn=None) -> tuple[bool, str, list[int]]:
+@metrics.timed("dataset.batch_import_datasets")
+def batch_import_datasets(config: dict, progress_fn=None, reuse_existing: bool = True,
+                          max_errors: int = None) -> tuple[bool, str, list[int]]:
     """
     批量导入数据集，支持总体进度显示
     参数:
       - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+      - reuse_existing: 文件内容与已有数据集相同时，直接复用其统计信息与存储文件
+      - max_errors: 每个数据集允许跳过的无法解析的行数，见 import_jsonl_dataset
     """
     if not isinstance(config, dict):
         return False, "配置格式错误", []
@@ -180,7 +496,9 @@ def batch_import_datasets(config: dict, progress_fn=None) -> tuple[bool, str, li
                 ds_name,
                 ds_config['root'],
                 ds_config['annotation'],
-                single_progress
+                single_progress,
+                reuse_existing,
+                max_errors
             )
             if ok:
                 success_count += 1
@@ -198,3 +516,181 @@ def batch_import_datasets(config: dict, progress_fn=None) -> tuple[bool, str, li
         return False, f"批量导入完成，共 {total} 个数据集，成功 {success_count} 个，失败 {len(failed_imports)} 个。\n失败详情：\n{failed_msg}", imported_ids
     else:
         return True, f"批量导入完成，共 {total} 个数据集全部导入成功。", imported_ids
+
+def count_data_types(data_path: str) -> dict:
+    """
+    仅根据 image/video 键快速统计各类型数据数量（不完整解码每一行）
+    返回值: {'text': int, 'image': int, 'multi-image': int, 'video': int}
+    """
+    counts = {'text': 0, 'image': 0, 'multi-image': 0, 'video': 0}
+    with open(data_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                counts[jsonl.classify_line(line)] += 1
+    return counts
+
+@metrics.timed("dataset.refresh_dataset_stats")
+def refresh_dataset_stats(dataset_id: int) -> tuple[bool, str]:
+    """
+    重新统计数据集的数据量与类型分布（数据文件被修改或替换后使用）
+    指纹与文件大小描述的是导入时的原始文件（用于复用导入），不随存储副本重新计算
+    返回值: (成功标志: bool, 提示消息: str)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        return False, "指定的数据集不存在"
+    data_path = row[0]
+    if not os.path.isfile(data_path):
+        return False, "数据文件不存在，请检查路径"
+
+    counts = count_data_types(data_path)
+    item_count = sum(counts.values())
+    data_type = max(counts.items(), key=lambda x: x[1])[0]
+    cursor.execute(
+        "UPDATE datasets SET data_type = ?, item_count = ?, text_count = ?, single_image_count = ?, "
+        "multi_image_count = ?, video_count = ? WHERE id = ?",
+        (
+            data_type,
+            item_count,
+            counts['text'],
+            counts['image'],
+            counts['multi-image'],
+            counts['video'],
+            dataset_id
+        )
+    )
+    # 文件内容可能已变化，去重签名、数据格式校验、图片统计与存储占用需要重新计算
+    cursor.execute("DELETE FROM dedup_status WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM media_profile WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM disk_usage WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM usage_files WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM schema_status WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM schema_violations WHERE dataset_id = ?", (dataset_id,))
+    bump_revision(conn, SCOPE_DATASETS, SCOPE_DISK_USAGE)
+    conn.commit()
+    return True, f"统计信息已更新，共 {item_count} 条数据"
+
+@metrics.timed("dataset.delete_dataset")
+def delete_dataset(dataset_id: int, delete_files: bool = True) -> tuple[bool, str]:
+    """
+    删除数据集记录及其去重签名、校验结果、图片统计与存储占用，并将其从所有分组中移除（移除后为空的分组一并删除）。
+    delete_files 为 True 时同时删除 UPLOAD_DIR 中不再被其他数据集引用的存储副本与行偏移索引。
+    返回值: (成功标志: bool, 提示消息: str)
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        return False, "指定的数据集不存在"
+    name, data_path = row
+
+    for table in _DATASET_TABLES:
+        cursor.execute(f"DELETE FROM {table} WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM datasets WHERE id = ?", (dataset_id,))
+    emptied = remove_dataset_from_groups(conn, dataset_id)
+    bump_revision(conn, SCOPE_DATASETS, SCOPE_DATASET_NAMES, SCOPE_TAGS, SCOPE_GROUPS, SCOPE_DISK_USAGE)
+    conn.commit()
+
+    msg = f"数据集 '{name}' 已删除"
+    if delete_files:
+        # 记录删除提交后再按剩余数据集的引用清理文件，复用导入的数据集共用的存储副本不会被删除
+        from .cleanup import remove_dataset_files
+        msg += f"，释放 {format_bytes(remove_dataset_files(name, data_path))}"
+    if emptied:
+        msg += f"，同时删除了只包含该数据集的分组: {', '.join(emptied)}"
+    return True, msg
+
+@metrics.timed("dataset.validate_dataset")
+def validate_dataset(dataset_id: int, check_media: bool = True, max_errors: int = 20) -> dict:
+    """
+    校验数据集：数据文件与根目录是否存在、每行 JSON 是否合法、引用的媒体文件是否存在。
+    返回值: {'ok': bool, 'lines': int, 'bad_lines': int, 'missing_media': int, 'errors': [str, ...]}
+    errors 最多记录 max_errors 条。
+    """
+    report = {'ok': False, 'lines': 0, 'bad_lines': 0, 'missing_media': 0, 'errors': []}
+
+    def add_error(msg):
+        if len(report['errors']) < max_errors:
+            report['errors'].append(msg)
+
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT path, root_path, item_count FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        add_error("指定的数据集不存在")
+        return report
+    data_path, root_path, item_count = row
+    if not os.path.isfile(data_path):
+        add_error(f"数据文件不存在: {data_path}")
+        return report
+    if check_media and not os.path.isdir(root_path):
+        add_error(f"根目录不存在: {root_path}")
+        check_media = False
+
+    checked_media = {}
+    with open(data_path, 'rb') as f:
+        for idx, line in enumerate(f):
+            report['lines'] += 1
+            try:
+                item = jsonl.loads(line.strip())
+            except jsonl.DecodeError:
+                report['bad_lines'] += 1
+                add_error(f"第 {idx+1} 行 JSON 解析失败")
+                continue
+            if not check_media or not isinstance(item, dict):
+                continue
+            for key in ('image', 'video'):
+                value = item.get(key)
+                if not value:
+                    continue
+                for p in value if isinstance(value, list) else [value]:
+                    abs_path = os.path.join(root_path, str(p))
+                    exists = checked_media.get(abs_path)
+                    if exists is None:
+                        exists = checked_media[abs_path] = os.path.exists(abs_path)
+                    if not exists:
+                        report['missing_media'] += 1
+                        add_error(f"第 {idx+1} 行引用的文件不存在: {p}")
+
+    if report['lines'] != item_count:
+        add_error(f"数据条数与记录不一致: 文件 {report['lines']} 条，记录 {item_count} 条")
+    report['ok'] = not report['errors']
+    return report
+
+def sample_items(dataset_id: int, n: int, seed: int = None, data_type: str = None) -> list:
+    """
+    流式蓄水池抽样 n 条数据，返回 [(行号, 数据项), ...]（按行号排序）。
+    指定 data_type 时只在该类型中抽样，类型判断走不完整解码的快速路径。
+    """
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+    rng = random.Random(seed)
+    reservoir = []
+    seen = 0
+    with open(row[0], 'rb') as f:
+        for idx, line in enumerate(f):
+            if not line.strip():
+                continue
+            if data_type and jsonl.classify_line(line) != data_type:
+                continue
+            seen += 1
+            if len(reservoir) < n:
+                reservoir.append((idx, line))
+            else:
+                j = rng.randrange(seen)
+                if j < n:
+                    reservoir[j] = (idx, line)
+    result = []
+    for idx, line in sorted(reservoir):
+        try:
+            result.append((idx, jsonl.loads(line)))
+        except jsonl.DecodeError:
+            continue
+    return result
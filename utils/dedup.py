@@ -0,0 +1,431 @@
+import os
+import re
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from .database import get_db_connection
+from . import jsonl
+from . import metrics
+
+# MinHash 参数：64 个排列，切分为 16 个 band（每个 band 4 行）用于 LSH 候选检索
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 5
+CHUNK_LINES = 2000
+NEAR_DUP_THRESHOLD = 0.8
+# LSH 桶中不同签名数超过该值时记录警告（两两比较的开销随其平方增长）
+LSH_BUCKET_WARN = 5000
+# 向量化比较时单次中间结果的元素数上限（约 16MB）
+_COMPARE_BLOCK = 1 << 24
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# 固定种子生成排列参数，保证不同进程、不同批次计算出的签名可以互相比较
+_rng = np.random.RandomState(20250501)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_WS_RE = re.compile(r"\s+")
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(item: dict) -> str:
+    """将对话内容规范化为单个字符串（合并空白、统一小写）"""
+    parts = []
+    for conv in item.get('conversations') or []:
+        if not isinstance(conv, dict):
+            continue
+        value = _WS_RE.sub(' ', str(conv.get('value', ''))).strip().lower()
+        parts.append(f"{conv.get('from', '')}:{value}")
+    return '\n'.join(parts)
+
+def media_paths(item: dict, root_path: str = "") -> list:
+    """返回数据项引用的媒体文件路径集合（相对 root_path 解析后排序去重）"""
+    paths = set()
+    for key in ('image', 'video'):
+        value = item.get(key)
+        if not value:
+            continue
+        if isinstance(value, str):
+            value = [value]
+        for p in value:
+            paths.add(os.path.normpath(os.path.join(root_path, str(p))))
+    return sorted(paths)
+
+def exact_hash(text: str, media: list) -> str:
+    """规范化文本 + 媒体路径集合的精确哈希"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(text.encode('utf-8'))
+    h.update(b'\x1f')
+    h.update('\x1e'.join(media).encode('utf-8'))
+    return h.hexdigest()
+
+def _shingles(text: str, media: list) -> set:
+    """字符 n-gram 分片（兼容无空格分词的中文），媒体路径作为独立分片"""
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text} if text else set()
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    shingles.update(f"\x00{m}" for m in media)
+    return shingles
+
+def minhash_signature(text: str, media: list) -> np.ndarray:
+    """计算 MinHash 签名，返回长度为 NUM_PERM 的 uint32 数组"""
+    shingles = _shingles(text, media)
+    if not shingles:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little')
+         for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+    # a < 2^31 且 hv < 2^32，乘积不会溢出 uint64
+    phv = ((hv[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return phv.min(axis=0).astype(np.uint32)
+
+def band_hashes(signature: np.ndarray) -> list:
+    """将签名按 band 切分并哈希，用于 LSH 桶检索"""
+    result = []
+    for band in range(LSH_BANDS):
+        chunk = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        result.append(int.from_bytes(digest, 'little', signed=True))
+    return result
+
+def estimate_jaccard(sig_a: bytes, sig_b: bytes) -> float:
+    """根据两条 MinHash 签名估计 Jaccard 相似度"""
+    a = np.frombuffer(sig_a, dtype=np.uint32)
+    b = np.frombuffer(sig_b, dtype=np.uint32)
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def _hash_chunk(args: tuple) -> list:
+    """子进程中处理一个行块，返回 (行号, 精确哈希, MinHash 字节) 列表"""
+    start_line, lines, root_path, with_minhash = args
+    results = []
+    for offset, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = jsonl.loads(line)
+        except jsonl.DecodeError:
+            continue
+        if not isinstance(item, dict):
+            continue
+        text = normalize_text(item)
+        media = media_paths(item, root_path)
+        sig = minhash_signature(text, media).tobytes() if with_minhash else None
+        results.append((start_line + offset, exact_hash(text, media), sig))
+    return results
+
+def _iter_chunks(file_path: str, root_path: str, with_minhash: bool):
+    """流式读取文件，按 CHUNK_LINES 行切块"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        start = 0
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= CHUNK_LINES:
+                yield (start, chunk, root_path, with_minhash)
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield (start, chunk, root_path, with_minhash)
+
+def _parallel_hash(file_path: str, root_path: str, with_minhash: bool, workers: int = None):
+    """并行流式计算签名，限制在途块数量以保证内存占用有界"""
+    workers = workers or os.cpu_count() or 1
+    chunks = _iter_chunks(file_path, root_path, with_minhash)
+    if workers <= 1:
+        for chunk in chunks:
+            yield _hash_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_hash_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def compute_dataset_signatures(dataset_id: int, with_minhash: bool = False,
+                               workers: int = None, force: bool = False,
+                               progress_fn=None) -> int:
+    """
+    计算并保存数据集每一行的去重签名，返回签名条数。
+    已计算过（且满足 MinHash 要求）的数据集直接跳过，实现增量检查。
+    参数:
+      - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT with_minhash, line_count FROM dedup_status WHERE dataset_id = ?",
+        (dataset_id,)
+    )
+    status = cursor.fetchone()
+    if status and not force and (status[0] or not with_minhash):
+        return status[1]
+
+    cursor.execute(
+        "SELECT path, root_path, item_count FROM datasets WHERE id = ?",
+        (dataset_id,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f"数据集 {dataset_id} 不存在")
+    path, root_path, item_count = row
+
+    cursor.execute("DELETE FROM item_signatures WHERE dataset_id = ?", (dataset_id,))
+    cursor.execute("DELETE FROM minhash_bands WHERE dataset_id = ?", (dataset_id,))
+
+    line_count = 0
+    for results in _parallel_hash(path, root_path, with_minhash, workers):
+        cursor.executemany(
+            "INSERT INTO item_signatures (dataset_id, line_no, exact_hash, minhash) VALUES (?, ?, ?, ?)",
+            [(dataset_id, line_no, h, sig) for line_no, h, sig in results]
+        )
+        if with_minhash:
+            bands = []
+            for line_no, _, sig in results:
+                signature = np.frombuffer(sig, dtype=np.uint32)
+                for band, band_hash in enumerate(band_hashes(signature)):
+                    bands.append((dataset_id, line_no, band, band_hash))
+            cursor.executemany(
+                "INSERT INTO minhash_bands (dataset_id, line_no, band, band_hash) VALUES (?, ?, ?, ?)",
+                bands
+            )
+        line_count += len(results)
+        if progress_fn and item_count:
+            progress_fn(f"正在计算签名... ({line_count}/{item_count})", min(line_count / item_count, 1.0))
+
+    cursor.execute(
+        "INSERT INTO dedup_status (dataset_id, with_minhash, line_count, computed_time) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (dataset_id) DO UPDATE SET with_minhash = excluded.with_minhash, "
+        "line_count = excluded.line_count, computed_time = excluded.computed_time",
+        (dataset_id, int(with_minhash), line_count, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+    return line_count
+
+def _group_members(group_id: int) -> list:
+    """按分组内顺序返回 (id, name, path, root_path, item_count) 列表"""
+    from .group import get_group_details
+    group = get_group_details(group_id)
+    if not group:
+        return []
+    cursor = get_db_connection().cursor()
+    members = []
+    for ds_id in group["dataset_ids"]:
+        cursor.execute(
+            "SELECT id, name, path, root_path, item_count FROM datasets WHERE id = ?",
+            (ds_id,)
+        )
+        row = cursor.fetchone()
+        if row:
+            members.append(row)
+    return members
+
+def _bucket_pairs(band: int, bucket: list, threshold: float):
+    """
+    确认一个 LSH 桶内的近似重复对，bucket 为 [((ds, line), 签名字节), ...]。
+    签名完全相同的成员先合并为一簇（精确重复的大簇在每个 band 中都落入同一个桶），簇内各对只在 band 0 直接生成；
+    不同签名之间按行块向量化比较，两者在更靠前的 band 已落入同一桶时跳过，保证每对只确认一次。
+    """
+    clusters = {}
+    for key, sig in bucket:
+        clusters.setdefault(sig, []).append(key)
+    members = [sorted(keys) for keys in clusters.values()]
+
+    if band == 0:
+        for keys in members:
+            for i, key_a in enumerate(keys):
+                for key_b in keys[i + 1:]:
+                    yield key_a, key_b
+
+    count = len(members)
+    if count < 2:
+        return
+    if count > LSH_BUCKET_WARN:
+        metrics.incr("dedup.large_bucket")
+        logger.warning("LSH 桶 (band %d) 包含 %d 个不同签名，近似去重可能较慢", band, count)
+    matrix = np.frombuffer(b"".join(clusters), dtype=np.uint32).reshape(count, NUM_PERM)
+    # 每次比较的行数，使单次比较的中间结果不超过 _COMPARE_BLOCK 个元素
+    rows = max(1, _COMPARE_BLOCK // (count * NUM_PERM))
+    for start in range(0, count - 1, rows):
+        stop = min(start + rows, count - 1)
+        # equal[i, j]: 第 start+i 个签名与第 start+j 个签名逐位是否相等，只需比较 j > i 的部分
+        equal = matrix[start:stop, None, :] == matrix[None, start:, :]
+        similar = np.count_nonzero(equal, axis=2) >= threshold * NUM_PERM
+        if band:
+            earlier = equal[:, :, :band * LSH_ROWS].reshape(stop - start, count - start, band, LSH_ROWS)
+            similar &= ~earlier.all(axis=3).any(axis=2)
+        similar &= np.triu(np.ones(similar.shape, dtype=bool), k=1)
+        for i, j in zip(*np.nonzero(similar)):
+            for key_a in members[start + i]:
+                for key_b in members[start + j]:
+                    yield (key_a, key_b) if key_a < key_b else (key_b, key_a)
+
+def _near_duplicate_pairs(dataset_ids: list, threshold: float):
+    """
+    通过 LSH 桶检索候选对，再用签名估计相似度确认，逐个生成 ((ds, line), (ds, line))。
+    逐个 band 按桶顺序流式读取（只读取成员数大于 1 的桶及其成员的签名），内存占用只与单个桶的大小有关。
+    """
+    if not dataset_ids:
+        return
+    cursor = get_db_connection().cursor()
+    placeholders = ','.join(['?'] * len(dataset_ids))
+    query = f"""
+        SELECT b.band_hash, b.dataset_id, b.line_no, s.minhash
+        FROM minhash_bands b
+        JOIN item_signatures s ON s.dataset_id = b.dataset_id AND s.line_no = b.line_no
+        WHERE b.band = ? AND b.dataset_id IN ({placeholders}) AND s.minhash IS NOT NULL
+          AND b.band_hash IN (
+              SELECT band_hash FROM minhash_bands
+              WHERE band = ? AND dataset_id IN ({placeholders})
+              GROUP BY band_hash HAVING COUNT(*) > 1
+          )
+        ORDER BY b.band_hash
+    """
+    for band in range(LSH_BANDS):
+        cursor.execute(query, [band] + dataset_ids + [band] + dataset_ids)
+        current, bucket = None, []
+        for band_hash, ds_id, line_no, sig in cursor:
+            if band_hash != current:
+                yield from _bucket_pairs(band, bucket, threshold)
+                current, bucket = band_hash, []
+            bucket.append(((ds_id, line_no), bytes(sig)))
+        yield from _bucket_pairs(band, bucket, threshold)
+
+def get_group_duplicate_stats(group_id: int, with_minhash: bool = False,
+                              threshold: float = NEAR_DUP_THRESHOLD, workers: int = None) -> dict:
+    """
+    统计分组内跨数据集的重复情况，缺失签名的数据集会先增量计算。
+    返回值包含总行数、去重后行数以及每个数据集与其他成员重复的行数。
+    """
+    members = _group_members(group_id)
+    if not members:
+        return {}
+    for ds_id, *_ in members:
+        compute_dataset_signatures(ds_id, with_minhash=with_minhash, workers=workers)
+
+    dataset_ids = [m[0] for m in members]
+    names = {m[0]: m[1] for m in members}
+    placeholders = ','.join(['?'] * len(dataset_ids))
+    cursor = get_db_connection().cursor()
+
+    cursor.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT exact_hash) FROM item_signatures WHERE dataset_id IN ({placeholders})",
+        dataset_ids
+    )
+    total, unique = cursor.fetchone()
+
+    cursor.execute(
+        f"""
+        SELECT s.dataset_id, COUNT(*)
+        FROM item_signatures s
+        WHERE s.dataset_id IN ({placeholders})
+          AND EXISTS (
+              SELECT 1 FROM item_signatures o
+              WHERE o.exact_hash = s.exact_hash
+                AND o.dataset_id IN ({placeholders})
+                AND o.dataset_id != s.dataset_id
+          )
+        GROUP BY s.dataset_id
+        """,
+        dataset_ids + dataset_ids
+    )
+    cross_exact = dict(cursor.fetchall())
+
+    cursor.execute(
+        f"""
+        SELECT a.dataset_id, b.dataset_id, COUNT(DISTINCT a.line_no)
+        FROM item_signatures a
+        JOIN item_signatures b ON a.exact_hash = b.exact_hash AND a.dataset_id != b.dataset_id
+        WHERE a.dataset_id IN ({placeholders}) AND b.dataset_id IN ({placeholders})
+        GROUP BY a.dataset_id, b.dataset_id
+        """,
+        dataset_ids + dataset_ids
+    )
+    overlaps = [
+        {"dataset": names[a], "other": names[b], "duplicates": count}
+        for a, b, count in cursor.fetchall()
+    ]
+
+    cross_near = {}
+    if with_minhash:
+        hits = set()
+        for (ds_a, line_a), (ds_b, line_b) in _near_duplicate_pairs(dataset_ids, threshold):
+            if ds_a != ds_b:
+                hits.add((ds_a, line_a))
+                hits.add((ds_b, line_b))
+        for ds_id, _ in hits:
+            cross_near[ds_id] = cross_near.get(ds_id, 0) + 1
+
+    datasets = {}
+    for ds_id, name, _, _, _ in members:
+        cursor.execute("SELECT COUNT(*) FROM item_signatures WHERE dataset_id = ?", (ds_id,))
+        datasets[name] = {
+            "lines": cursor.fetchone()[0],
+            "cross_exact": cross_exact.get(ds_id, 0),
+            "cross_near": cross_near.get(ds_id, 0) if with_minhash else None,
+        }
+
+    return {
+        "total": total,
+        "unique": unique,
+        "duplicates": total - unique,
+        "datasets": datasets,
+        "overlaps": overlaps,
+    }
+
+def export_dedup_manifest(group_id: int, with_minhash: bool = False,
+                          threshold: float = NEAR_DUP_THRESHOLD, workers: int = None) -> dict:
+    """
+    导出分组的去重清单：按分组内数据集顺序保留每条数据的首次出现。
+    返回格式与分组导出一致，额外包含保留的行号 keep_lines（从 0 开始）。
+    """
+    members = _group_members(group_id)
+    if not members:
+        return None
+    for ds_id, *_ in members:
+        compute_dataset_signatures(ds_id, with_minhash=with_minhash, workers=workers)
+
+    order = {m[0]: idx for idx, m in enumerate(members)}
+    dropped_near = set()
+    if with_minhash:
+        # 每个近似重复对中，若靠前的一条被保留，则丢弃靠后的一条
+        def position(key):
+            return order[key[0]], key[1]
+        pairs = [sorted(pair, key=position) for pair in _near_duplicate_pairs(list(order), threshold)]
+        for first, second in sorted(pairs, key=lambda pair: position(pair[1])):
+            if first not in dropped_near:
+                dropped_near.add(second)
+
+    cursor = get_db_connection().cursor()
+    seen = set()
+    result = {}
+    for ds_id, name, path, root_path, item_count in members:
+        cursor.execute(
+            "SELECT line_no, exact_hash FROM item_signatures WHERE dataset_id = ? ORDER BY line_no",
+            (ds_id,)
+        )
+        keep_lines = []
+        for line_no, h in cursor.fetchall():
+            if h in seen or (ds_id, line_no) in dropped_near:
+                continue
+            seen.add(h)
+            keep_lines.append(line_no)
+        result[name] = {
+            "root": root_path,
+            "annotation": path,
+            "length": item_count,
+            "kept": len(keep_lines),
+            "keep_lines": keep_lines,
+        }
+    return result
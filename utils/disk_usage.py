@@ -0,0 +1,249 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import UPLOAD_DIR, DISK_USAGE_WORKERS
+from .database import get_db_connection, bump_revision, revision_cached, SCOPE_DISK_USAGE
+from . import jsonl
+from . import metrics
+
+KIND_MEDIA = "media"
+KIND_UPLOAD = "upload"
+
+# 同一目录中引用的文件不少于该数量时用一次 scandir 代替逐个 stat
+_SCANDIR_MIN_FILES = 8
+
+def format_bytes(n: int) -> str:
+    """以 B/KB/MB/GB/TB 显示字节数"""
+    value = float(n)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.2f} TB"
+
+def _signed(ino: int) -> int:
+    # inode 号可能超出 SQLite 有符号 64 位整数的范围
+    return ino - (1 << 64) if ino >= (1 << 63) else ino
+
+def iter_media_paths(data_path: str, root_path: str) -> list:
+    """数据文件引用的全部图片与视频绝对路径（去重），只解码包含媒体字段的行"""
+    paths = {}
+    with open(data_path, 'rb') as f:
+        for line in f:
+            if b'"image"' not in line and b'"video"' not in line:
+                continue
+            if jsonl.classify_line(line) == 'text':
+                continue
+            try:
+                item = jsonl.loads(line)
+            except jsonl.DecodeError:
+                continue
+            if not isinstance(item, dict):
+                continue
+            for key in ('image', 'video'):
+                value = item.get(key)
+                if not value:
+                    continue
+                for p in value if isinstance(value, list) else [value]:
+                    paths.setdefault(os.path.normpath(os.path.join(root_path, str(p))), None)
+    return list(paths)
+
+def _stat_directory(directory: str, names: set) -> tuple:
+    """
+    在线程池中执行：统计一个目录下被引用的文件，返回 ([(dev, ino, size), ...], 缺失数)。
+    引用的文件较多时 scandir 一次列出目录再取各条目的 stat，较少时直接 stat。
+    """
+    found = []
+    if len(names) >= _SCANDIR_MIN_FILES:
+        remaining = set(names)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name in remaining:
+                        remaining.discard(entry.name)
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            remaining.add(entry.name)
+                            continue
+                        found.append((st.st_dev, st.st_ino, st.st_size))
+        except OSError:
+            return found, len(names)
+        return found, len(remaining)
+
+    missing = 0
+    for name in names:
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            missing += 1
+            continue
+        found.append((st.st_dev, st.st_ino, st.st_size))
+    return found, missing
+
+def _walk(directory: str) -> list:
+    """递归统计目录下所有文件，返回 [(dev, ino, size), ...]"""
+    found = []
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            found.append((st.st_dev, st.st_ino, st.st_size))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return found
+
+def _upload_files(name: str, data_path: str) -> list:
+    """数据集在 UPLOAD_DIR 中的文件：专属目录下的全部文件，以及位于其他目录的数据文件（复用导入时）"""
+    files = _walk(os.path.join(UPLOAD_DIR, name))
+    try:
+        st = os.stat(data_path)
+        files.append((st.st_dev, st.st_ino, st.st_size))
+    except OSError:
+        pass
+    return files
+
+@metrics.timed("disk_usage.compute_dataset_disk_usage")
+def compute_dataset_disk_usage(dataset_id: int, workers: int = None, pool: ThreadPoolExecutor = None) -> dict:
+    """
+    统计单个数据集的存储占用：引用的媒体文件与 UPLOAD_DIR 中的数据副本，
+    按目录分组后在线程池中并发 scandir/stat，按 (设备号, inode) 去重（硬链接或重复引用只计一次）。
+    结果写入 disk_usage 与 usage_files 并立即提交，返回 get_disk_usage 格式的结果。
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, path, root_path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f"数据集 {dataset_id} 不存在")
+    name, data_path, root_path = row
+
+    by_dir = defaultdict(set)
+    for path in iter_media_paths(data_path, root_path):
+        directory, filename = os.path.split(path)
+        by_dir[directory].add(filename)
+
+    own_pool = pool is None
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=workers or DISK_USAGE_WORKERS)
+    try:
+        upload_future = pool.submit(_upload_files, name, data_path)
+        results = pool.map(lambda d: _stat_directory(d, by_dir[d]), list(by_dir))
+        media = {}
+        missing = 0
+        for found, dir_missing in results:
+            missing += dir_missing
+            for dev, ino, size in found:
+                media[(dev, ino)] = size
+        upload = {(dev, ino): size for dev, ino, size in upload_future.result()}
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    cursor.execute("DELETE FROM usage_files WHERE dataset_id = ?", (dataset_id,))
+    cursor.executemany(
+        "INSERT INTO usage_files (dataset_id, kind, dev, ino, size) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (dataset_id, dev, ino) DO NOTHING",
+        [(dataset_id, KIND_MEDIA, dev, _signed(ino), size) for (dev, ino), size in media.items()]
+        + [(dataset_id, KIND_UPLOAD, dev, _signed(ino), size) for (dev, ino), size in upload.items()]
+    )
+    result = {
+        "media_files": len(media),
+        "media_bytes": sum(media.values()),
+        "missing_files": missing,
+        "upload_bytes": sum(upload.values()),
+        "computed_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    cursor.execute(
+        "INSERT INTO disk_usage (dataset_id, media_files, media_bytes, missing_files, upload_bytes, computed_time) "
+        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (dataset_id) DO UPDATE SET media_files = excluded.media_files, "
+        "media_bytes = excluded.media_bytes, missing_files = excluded.missing_files, "
+        "upload_bytes = excluded.upload_bytes, computed_time = excluded.computed_time",
+        (dataset_id, result["media_files"], result["media_bytes"], result["missing_files"],
+         result["upload_bytes"], result["computed_time"])
+    )
+    bump_revision(conn, SCOPE_DISK_USAGE)
+    conn.commit()
+    result["total_bytes"] = result["media_bytes"] + result["upload_bytes"]
+    return result
+
+@metrics.timed("disk_usage.compute_disk_usage")
+def compute_disk_usage(dataset_ids: list = None, force: bool = False, workers: int = None,
+                       progress_fn=None) -> dict:
+    """
+    增量统计多个数据集（默认全部）的存储占用，已统计过的数据集跳过（force 时重新统计）。
+    每个数据集统计完成后立即保存，中途中断不影响已完成的部分；各数据集共用同一个线程池。
+    返回 {数据集ID: 统计结果}，只包含本次统计的数据集。
+    参数:
+      - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+    """
+    cursor = get_db_connection().cursor()
+    if dataset_ids is None:
+        cursor.execute("SELECT id FROM datasets ORDER BY id")
+        dataset_ids = [row[0] for row in cursor.fetchall()]
+    if not force:
+        done = set(get_disk_usage_map())
+        dataset_ids = [ds_id for ds_id in dataset_ids if ds_id not in done]
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers or DISK_USAGE_WORKERS) as pool:
+        for i, ds_id in enumerate(dataset_ids):
+            if progress_fn:
+                progress_fn(f"正在统计存储占用... ({i + 1}/{len(dataset_ids)})", i / len(dataset_ids))
+            results[ds_id] = compute_dataset_disk_usage(ds_id, pool=pool)
+    if progress_fn:
+        progress_fn("统计完成", 1.0)
+    return results
+
+@revision_cached(SCOPE_DISK_USAGE)
+def get_disk_usage_map() -> dict:
+    """所有已统计数据集的存储占用 {数据集ID: {media_files, media_bytes, missing_files, upload_bytes, total_bytes, computed_time}}"""
+    cursor = get_db_connection().cursor()
+    cursor.execute(
+        "SELECT dataset_id, media_files, media_bytes, missing_files, upload_bytes, computed_time FROM disk_usage"
+    )
+    return {
+        ds_id: {
+            "media_files": media_files,
+            "media_bytes": media_bytes,
+            "missing_files": missing_files,
+            "upload_bytes": upload_bytes,
+            "total_bytes": media_bytes + upload_bytes,
+            "computed_time": computed_time,
+        }
+        for ds_id, media_files, media_bytes, missing_files, upload_bytes, computed_time in cursor.fetchall()
+    }
+
+def get_datasets_disk_usage(dataset_ids: list) -> dict:
+    """
+    多个数据集合计的存储占用，跨数据集共用的文件（同一媒体文件、复用导入的数据副本）只计一次。
+    返回 {'media_bytes', 'upload_bytes', 'total_bytes', 'files', 'counted', 'uncounted'}，
+    counted/uncounted 为已统计/尚未统计的数据集数量。
+    """
+    usage = get_disk_usage_map()
+    counted = [ds_id for ds_id in dataset_ids if ds_id in usage]
+    result = {"media_bytes": 0, "upload_bytes": 0, "total_bytes": 0, "files": 0,
+              "counted": len(counted), "uncounted": len(dataset_ids) - len(counted)}
+    if not counted:
+        return result
+    placeholders = ", ".join("?" * len(counted))
+    cursor = get_db_connection().cursor()
+    cursor.execute(
+        f"SELECT kind, COUNT(*), SUM(size) FROM (SELECT DISTINCT kind, dev, ino, size FROM usage_files "
+        f"WHERE dataset_id IN ({placeholders})) AS files GROUP BY kind",
+        counted
+    )
+    for kind, files, size in cursor.fetchall():
+        result["files"] += files
+        result[f"{kind}_bytes"] = size or 0
+    result["total_bytes"] = result["media_bytes"] + result["upload_bytes"]
+    return result
@@ -1,22 +1,28 @@
 import json
 from datetime import datetime
-import streamlit as st
-from .database import get_db_connection, clear_datasets_cache
+from .database import get_db_connection, bump_revision, revision_cached, SCOPE_GROUPS
+from . import jsonl
+from models import DatasetGroup
 
-@st.cache_data
+@revision_cached(SCOPE_GROUPS, shared=True)
 def get_all_groups() -> list:
     """获取所有数据集分组信息"""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, name, dataset_ids, create_time FROM dataset_groups")
+    cursor.execute(f"SELECT {DatasetGroup.COLUMNS} FROM dataset_groups")
     return cursor.fetchall()
 
+@revision_cached(SCOPE_GROUPS)
+def load_group_models() -> list:
+    """所有分组的 DatasetGroup 对象列表，由 get_all_groups 的结果批量创建并缓存"""
+    return DatasetGroup.from_rows(get_all_groups())
+
 def get_group_details(group_id: int) -> dict:
     """获取指定分组的详细信息"""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT id, name, dataset_ids, create_time FROM dataset_groups WHERE id = ?",
+        f"SELECT {DatasetGroup.COLUMNS} FROM dataset_groups WHERE id = ?",
         (group_id,)
     )
     group = cursor.fetchone()
@@ -24,7 +30,7 @@ def get_group_details(group_id: int) -> dict:
         return None
     
     group_id, name, dataset_ids_json, create_time = group
-    dataset_ids = json.loads(dataset_ids_json)
+    dataset_ids = jsonl.loads(dataset_ids_json)
     
     return {
         "id": group_id,
@@ -61,11 +67,9 @@ def create_dataset_group(name: str, dataset_ids: list) -> tuple:
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         )
     )
+    bump_revision(conn, SCOPE_GROUPS)
     conn.commit()
     
-    # 清除相关缓存
-    get_all_groups.clear()
-    
     return True, f"分组 '{name}' 创建成功"
 
 def delete_dataset_group(group_id: int) -> tuple:
@@ -82,13 +86,34 @@ def delete_dataset_group(group_id: int) -> tuple:
         return False, "指定的分组不存在"
     
     cursor.execute("DELETE FROM dataset_groups WHERE id = ?", (group_id,))
+    bump_revision(conn, SCOPE_GROUPS)
     conn.commit()
     
-    # 清除相关缓存
-    get_all_groups.clear()
-    
     return True, f"分组 '{group[0]}' 已删除"
 
+def remove_dataset_from_groups(conn, dataset_id: int) -> list:
+    """
+    从所有分组中移除数据集，移除后为空的分组一并删除，返回被删除的分组名称。
+    不提交事务，由调用方与删除数据集的其他写操作一起提交
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name, dataset_ids FROM dataset_groups")
+    emptied = []
+    for group_id, name, dataset_ids_json in cursor.fetchall():
+        dataset_ids = jsonl.loads(dataset_ids_json)
+        if dataset_id not in dataset_ids:
+            continue
+        dataset_ids = [ds_id for ds_id in dataset_ids if ds_id != dataset_id]
+        if dataset_ids:
+            cursor.execute(
+                "UPDATE dataset_groups SET dataset_ids = ? WHERE id = ?",
+                (json.dumps(dataset_ids), group_id)
+            )
+        else:
+            cursor.execute("DELETE FROM dataset_groups WHERE id = ?", (group_id,))
+            emptied.append(name)
+    return emptied
+
 def export_group_info(group_id: int) -> dict:
     """
     导出分组信息为JSON格式
@@ -120,5 +145,6 @@ def export_group_info(group_id: int) -> dict:
     return result
 
 def clear_groups_cache():
-    """清除分组相关缓存"""
+    """清除本进程的分组相关缓存（分组修改通过 bump_revision 自动失效缓存，无需调用）"""
     get_all_groups.clear()
+    load_group_models.clear()
@@ -0,0 +1,148 @@
+import random
+from bisect import bisect_right
+from .database import get_db_connection
+from .group import get_group_details
+from .line_index import get_line_index
+from . import jsonl
+from . import metrics
+
+_MASK64 = (1 << 64) - 1
+_FEISTEL_ROUNDS = 4
+# 置换定义域至少 2^8：定义域过小时每轮只有一两位参与混合，打乱后仍会出现连续的行
+_MIN_DOMAIN_BITS = 8
+
+def _round(value: int, key: int) -> int:
+    # splitmix64 的混合函数
+    value = (value * 0x9E3779B97F4A7C15 + key) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+class SeededPermutation:
+    """
+    [0, n) 上由种子决定的伪随机置换，O(1) 计算第 i 个位置对应的元素，不生成也不保存长度为 n 的排列。
+    在覆盖 n 的 2 的偶数次幂范围上做 Feistel 变换（本身是双射），结果落在 n 之外时继续变换（cycle walking），
+    n 不小于 2^8 时平均变换次数不超过 4 次。
+    """
+
+    __slots__ = ("n", "_half_bits", "_keys")
+
+    def __init__(self, n: int, seed: int):
+        self.n = n
+        bits = max(_MIN_DOMAIN_BITS, (max(n, 1) - 1).bit_length())
+        self._half_bits = (bits + 1) // 2
+        rng = random.Random(seed)
+        self._keys = [rng.getrandbits(64) for _ in range(_FEISTEL_ROUNDS)]
+
+    def _feistel(self, x: int) -> int:
+        mask = (1 << self._half_bits) - 1
+        left, right = x >> self._half_bits, x & mask
+        for key in self._keys:
+            left, right = right, left ^ (_round(right, key) & mask)
+        return (left << self._half_bits) | right
+
+    def __getitem__(self, i: int) -> int:
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        x = self._feistel(i)
+        while x >= self.n:
+            x = self._feistel(x)
+        return x
+
+class GroupView:
+    """
+    把分组视为一个虚拟数据集：各成员数据集按分组中的顺序首尾相接，
+    全局序号通过成员行数的前缀和二分查找映射到 (数据集, 行号)，读取通过各成员的行偏移索引完成，
+    任何成员文件都不会被整体读入内存。指定 seed 时按 SeededPermutation 打乱浏览顺序，同一种子顺序不变。
+    """
+
+    __slots__ = ("group_id", "name", "members", "offsets", "total", "missing", "seed", "_permutation")
+
+    def __init__(self, group_id: int, name: str, members: list, missing: list, seed: int = None):
+        self.group_id = group_id
+        self.name = name
+        # [(数据集ID, 名称, 数据文件路径, 根目录), ...]
+        self.members = members
+        # offsets[k] 为第 k 个成员的第一条数据的全局序号，最后一项为总条数
+        self.offsets = [0]
+        for _, _, path, _ in members:
+            self.offsets.append(self.offsets[-1] + len(get_line_index(path)))
+        self.total = self.offsets[-1]
+        # 已删除或数据文件不存在的成员 [(数据集ID, 名称或 None), ...]
+        self.missing = missing
+        self.seed = seed
+        self._permutation = SeededPermutation(self.total, seed) if seed is not None else None
+
+    def __len__(self) -> int:
+        return self.total
+
+    def locate(self, position: int) -> tuple:
+        """浏览顺序中第 position 条数据所在的 (成员下标, 行号)"""
+        if not 0 <= position < self.total:
+            raise IndexError(position)
+        index = self._permutation[position] if self._permutation is not None else position
+        k = bisect_right(self.offsets, index) - 1
+        return k, index - self.offsets[k]
+
+    def member_range(self, k: int) -> tuple:
+        """第 k 个成员在不打乱时的全局序号范围 [起始, 结束)"""
+        return self.offsets[k], self.offsets[k + 1]
+
+    @metrics.timed("group_preview.get_items")
+    def get_items(self, start: int, count: int, on_error=None) -> list:
+        """
+        按浏览顺序读取第 start 条起的 count 条数据，返回 [(浏览序号, 成员下标, 行号, 数据项), ...]，空行跳过。
+        不打乱时同一成员的连续行一次读取；打乱时逐行按偏移定位读取。
+        参数:
+          - on_error: 解析失败时的回调，接收出错的原始行，默认跳过
+        """
+        stop = min(start + count, self.total)
+        # 同一成员中行号连续的位置合并为一段 [成员下标, 起始行号, 行数, 起始浏览序号]
+        runs = []
+        for position in range(max(start, 0), stop):
+            k, line_no = self.locate(position)
+            last = runs[-1] if runs else None
+            if last and last[0] == k and last[1] + last[2] == line_no:
+                last[2] += 1
+            else:
+                runs.append([k, line_no, 1, position])
+
+        items = []
+        for k, line_start, n, position in runs:
+            lines = get_line_index(self.members[k][2]).read_lines(line_start, n)
+            for offset, line in enumerate(lines):
+                if not line.strip():
+                    continue
+                try:
+                    items.append((position + offset, k, line_start + offset, jsonl.loads(line)))
+                except jsonl.DecodeError:
+                    if on_error:
+                        on_error(line.decode('utf-8', errors='replace'))
+        return items
+
+@metrics.timed("group_preview.open_group_view")
+def open_group_view(group_id: int, seed: int = None):
+    """
+    打开分组的虚拟数据集视图，分组不存在时返回 None。
+    成员行数取自各自的行偏移索引（尚未建立索引的成员首次打开时扫描一次），与文件实际内容一致。
+    """
+    group = get_group_details(group_id)
+    if not group:
+        return None
+    cursor = get_db_connection().cursor()
+    members = []
+    missing = []
+    for ds_id in group["dataset_ids"]:
+        cursor.execute("SELECT name, path, root_path FROM datasets WHERE id = ?", (ds_id,))
+        row = cursor.fetchone()
+        if not row:
+            missing.append((ds_id, None))
+            continue
+        name, path, root_path = row
+        try:
+            get_line_index(path)
+        except OSError:
+            missing.append((ds_id, name))
+            continue
+        members.append((ds_id, name, path, root_path))
+    return GroupView(group_id, group["name"], members, missing, seed)
@@ -0,0 +1,112 @@
+import re
+import json
+from config import JSON_BACKEND
+
+# 所有解码后端的解析错误都是 ValueError 的子类（含 UnicodeDecodeError）
+DecodeError = ValueError
+
+_DECODERS = {"json": json.loads}
+
+try:
+    import orjson
+    _DECODERS["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import simdjson
+    _DECODERS["simdjson"] = simdjson.loads
+except ImportError:
+    pass
+
+# auto 模式下的优先级
+_PREFERRED = ("orjson", "simdjson", "json")
+
+def register_decoder(name: str, fn) -> None:
+    """注册自定义解码函数，fn 接收 str 或 bytes，返回 Python 对象"""
+    global loads, BACKEND
+    _DECODERS[name] = fn
+    if JSON_BACKEND == name:
+        loads, BACKEND = fn, name
+
+def available_decoders() -> list:
+    """返回当前环境可用的解码后端名称"""
+    return list(_DECODERS)
+
+def get_decoder(name: str = "auto"):
+    """
+    获取解码函数，返回 (后端名称, 解码函数)。
+    name 为 auto 时按 orjson > simdjson > json 选择已安装的最快实现。
+    """
+    if name != "auto":
+        if name not in _DECODERS:
+            raise ValueError(f"JSON 解码后端 {name} 不可用，可选: {', '.join(_DECODERS)}")
+        return name, _DECODERS[name]
+    for candidate in _PREFERRED:
+        if candidate in _DECODERS:
+            return candidate, _DECODERS[candidate]
+    return "json", json.loads
+
+BACKEND, loads = get_decoder(JSON_BACKEND if JSON_BACKEND in _DECODERS else "auto")
+
+# image/video 键，前一个字节为反斜杠（字符串内被转义的引号）的匹配由调用方排除，是否位于顶层由 _depth_at 判断。
+# 不用后行断言：后行断言会使整行扫描慢数倍
+_MEDIA_KEY_RE = re.compile(rb'"(image|video)"\s*:\s*')
+_BACKSLASH = ord('\\')
+# 完整的 JSON 字符串（含转义字符）
+_STRING_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_WS = b" \t\r\n"
+
+def _depth_at(line: bytes, pos: int) -> int:
+    """pos 处的对象/数组嵌套深度（顶层对象的键为 1）。pos 必须位于字符串之外，先去掉字符串再统计括号"""
+    prefix = _STRING_RE.sub(b'', line[:pos])
+    return prefix.count(b'{') + prefix.count(b'[') - prefix.count(b'}') - prefix.count(b']')
+
+def _value_kind(line: bytes, pos: int):
+    """
+    只查看值的开头判断其类型与是否非空，返回 ('str'|'list', 是否非空)；
+    遇到其他类型返回 None，由调用方回退到完整解码。
+    """
+    if pos >= len(line):
+        return None
+    head = line[pos:pos + 1]
+    if head == b'"':
+        return 'str', line[pos + 1:pos + 2] != b'"'
+    if head == b'[':
+        rest = line[pos + 1:].lstrip(_WS)
+        return 'list', not rest.startswith(b']')
+    if line.startswith(b'null', pos):
+        return 'null', False
+    return None
+
+def classify_line(line) -> str:
+    """
+    在不完整解码整行 JSON 的情况下判断数据类型，结果与 get_data_type 一致。
+    仅扫描顶层的 image/video 键及其取值开头（嵌套对象中的同名键忽略）；键重复或取值类型无法直接判断时回退到完整解码。
+    注意：该方法不校验整行 JSON 的合法性。
+    返回值: 'video' | 'multi-image' | 'image' | 'text'
+    """
+    if isinstance(line, str):
+        line = line.encode('utf-8')
+    if b'"image"' not in line and b'"video"' not in line:
+        return 'text'
+
+    kinds = {}
+    for match in _MEDIA_KEY_RE.finditer(line):
+        start = match.start()
+        if (start and line[start - 1] == _BACKSLASH) or _depth_at(line, start) != 1:
+            continue
+        key = match.group(1)
+        kind = _value_kind(line, match.end())
+        if key in kinds or kind is None:
+            from .dataset import get_data_type
+            return get_data_type(loads(line))
+        kinds[key] = kind
+
+    video = kinds.get(b'video')
+    if video and video[1]:
+        return 'video'
+    image = kinds.get(b'image')
+    if image and image[1]:
+        return 'image' if image[0] == 'str' else 'multi-image'
+    return 'text'
@@ -0,0 +1,258 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import KEYFRAME_DIR, KEYFRAME_COUNT, KEYFRAME_WIDTH, POSTER_WIDTH
+from .database import get_db_connection, connection_scope
+from .cache import cache_data
+from . import jsonl
+from . import metrics
+
+# 抽帧后端：优先使用本地 ffmpeg 命令，其次 PyAV，都不可用时无法生成关键帧
+FFMPEG = shutil.which("ffmpeg")
+FFPROBE = shutil.which("ffprobe")
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+if FFMPEG:
+    BACKEND = "ffmpeg"
+elif HAS_PYAV:
+    BACKEND = "pyav"
+else:
+    BACKEND = None
+
+# 内容键只读取文件首尾各 64KB，避免对大视频做全量哈希
+_SAMPLE_BYTES = 64 * 1024
+# 单个视频抽帧的超时时间（秒）
+_FFMPEG_TIMEOUT = 120
+
+def _content_key(path: str, size: int) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(size).encode())
+    with open(path, 'rb') as f:
+        hasher.update(f.read(_SAMPLE_BYTES))
+        if size > _SAMPLE_BYTES * 2:
+            f.seek(-_SAMPLE_BYTES, os.SEEK_END)
+            hasher.update(f.read(_SAMPLE_BYTES))
+    # 抽帧参数变化后生成新的缓存
+    hasher.update(f"{KEYFRAME_COUNT}:{KEYFRAME_WIDTH}:{POSTER_WIDTH}".encode())
+    return hasher.hexdigest()
+
+@cache_data(max_entries=100000)
+def _cached_content_key(path: str, size: int, mtime_ns: int) -> str:
+    return _content_key(path, size)
+
+def video_cache_key(path: str) -> str:
+    """
+    视频的内容寻址缓存键（文件大小 + 首尾采样内容），同一视频出现在不同路径或数据集中时共用缓存。
+    按 (路径, 大小, 修改时间) 在进程内记忆，重复查询只需一次 stat。
+    """
+    st = os.stat(path)
+    return _cached_content_key(path, st.st_size, st.st_mtime_ns)
+
+def _cache_dir(key: str) -> str:
+    return os.path.join(KEYFRAME_DIR, key[:2], key)
+
+def get_cached_keyframes(path: str):
+    """返回已缓存的关键帧 {'poster': 路径, 'frames': [路径, ...]}，未缓存或视频不存在时返回 None"""
+    try:
+        cache_dir = _cache_dir(video_cache_key(path))
+    except OSError:
+        return None
+    poster = os.path.join(cache_dir, "poster.jpg")
+    if not os.path.exists(poster):
+        return None
+    frames = sorted(
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if name.startswith("frame_") and name.endswith(".jpg")
+    )
+    return {"poster": poster, "frames": frames}
+
+def _timestamps(duration, count: int) -> list:
+    """在视频时长内均匀取 count 个时间点（避开首尾）"""
+    return [duration * (i + 1) / (count + 1) for i in range(count)]
+
+def _probe_duration(path: str):
+    if not FFPROBE:
+        return None
+    result = subprocess.run(
+        [FFPROBE, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True, text=True, timeout=_FFMPEG_TIMEOUT
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+def _extract_ffmpeg(path: str, out_dir: str) -> None:
+    def run(args):
+        subprocess.run([FFMPEG, "-v", "error", "-y"] + args, check=True,
+                       capture_output=True, timeout=_FFMPEG_TIMEOUT)
+
+    duration = _probe_duration(path)
+    if duration:
+        timestamps = _timestamps(duration, KEYFRAME_COUNT)
+        run(["-ss", f"{timestamps[0]:.3f}", "-i", path, "-frames:v", "1",
+             "-vf", f"scale={POSTER_WIDTH}:-2", os.path.join(out_dir, "poster.jpg")])
+        for i, t in enumerate(timestamps):
+            run(["-ss", f"{t:.3f}", "-i", path, "-frames:v", "1",
+                 "-vf", f"scale={KEYFRAME_WIDTH}:-2", os.path.join(out_dir, f"frame_{i:02d}.jpg")])
+    else:
+        # 无法获取时长时取前若干个关键帧（I 帧）
+        run(["-i", path, "-frames:v", "1", "-vf", f"scale={POSTER_WIDTH}:-2",
+             os.path.join(out_dir, "poster.jpg")])
+        run(["-skip_frame", "nokey", "-i", path, "-vsync", "vfr", "-frames:v", str(KEYFRAME_COUNT),
+             "-vf", f"scale={KEYFRAME_WIDTH}:-2", "-start_number", "0",
+             os.path.join(out_dir, "frame_%02d.jpg")])
+
+def _save_frame(frame, width: int, out_path: str) -> None:
+    image = frame.to_image()
+    image.thumbnail((width, width * 4))
+    image.save(out_path, "JPEG", quality=80)
+
+def _extract_pyav(path: str, out_dir: str) -> None:
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        duration = container.duration / av.time_base if container.duration else None
+        frames = []
+        if duration and stream.time_base:
+            for t in _timestamps(duration, KEYFRAME_COUNT):
+                container.seek(int(t / stream.time_base), stream=stream)
+                frame = next(container.decode(stream), None)
+                if frame is not None:
+                    frames.append(frame)
+        else:
+            stream.codec_context.skip_frame = "NONKEY"
+            for frame in container.decode(stream):
+                frames.append(frame)
+                if len(frames) >= KEYFRAME_COUNT:
+                    break
+        if not frames:
+            raise ValueError("未能解码视频帧")
+        _save_frame(frames[0], POSTER_WIDTH, os.path.join(out_dir, "poster.jpg"))
+        for i, frame in enumerate(frames):
+            _save_frame(frame, KEYFRAME_WIDTH, os.path.join(out_dir, f"frame_{i:02d}.jpg"))
+
+@metrics.timed("keyframes.extract")
+def extract_keyframes(path: str, force: bool = False):
+    """
+    为视频生成封面与关键帧缩略图并写入内容寻址缓存，返回 get_cached_keyframes 格式的结果。
+    先写入临时目录再整体重命名，并发生成同一视频时不会读到不完整的结果。
+    没有可用的抽帧后端时抛出 RuntimeError。
+    """
+    if BACKEND is None:
+        raise RuntimeError("生成视频关键帧需要安装 ffmpeg 或 PyAV")
+    if not force:
+        cached = get_cached_keyframes(path)
+        if cached:
+            return cached
+
+    cache_dir = _cache_dir(video_cache_key(path))
+    os.makedirs(os.path.dirname(cache_dir), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=os.path.dirname(cache_dir))
+    try:
+        if BACKEND == "ffmpeg":
+            _extract_ffmpeg(path, tmp_dir)
+        else:
+            _extract_pyav(path, tmp_dir)
+        if force and os.path.isdir(cache_dir):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        try:
+            os.rename(tmp_dir, cache_dir)
+        except OSError:
+            # 其他线程或进程已经生成
+            pass
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return get_cached_keyframes(path)
+
+def iter_dataset_videos(dataset_id: int) -> list:
+    """返回数据集引用的全部视频绝对路径（去重，保持首次出现顺序），只解码包含视频的行"""
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT path, root_path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+    data_path, root_path = row
+    videos = {}
+    with open(data_path, 'rb') as f:
+        for line in f:
+            if b'"video"' not in line or jsonl.classify_line(line) != 'video':
+                continue
+            try:
+                value = jsonl.loads(line).get('video')
+            except (jsonl.DecodeError, AttributeError):
+                continue
+            for p in value if isinstance(value, list) else [value]:
+                videos.setdefault(os.path.join(root_path, str(p)), None)
+    return list(videos)
+
+@metrics.timed("keyframes.build_dataset_keyframes")
+def build_dataset_keyframes(dataset_id: int, workers: int = None, force: bool = False,
+                            progress_fn=None) -> dict:
+    """
+    为数据集中所有视频生成关键帧缓存，抽帧在线程池中并发执行（ffmpeg 子进程 / PyAV 解码均释放 GIL）。
+    返回 {'videos': 总数, 'extracted': 新生成, 'cached': 已有缓存, 'missing': 文件不存在, 'failed': 失败}
+    """
+    if BACKEND is None:
+        raise RuntimeError("生成视频关键帧需要安装 ffmpeg 或 PyAV")
+    videos = iter_dataset_videos(dataset_id)
+    result = {"videos": len(videos), "extracted": 0, "cached": 0, "missing": 0, "failed": 0}
+
+    def process(path):
+        if not os.path.isfile(path):
+            return "missing"
+        if not force and get_cached_keyframes(path):
+            return "cached"
+        try:
+            return "extracted" if extract_keyframes(path, force=force) else "failed"
+        except Exception:
+            metrics.incr("keyframes.failed")
+            return "failed"
+
+    workers = workers or min(8, (os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process, path) for path in videos]
+        for done, future in enumerate(as_completed(futures), 1):
+            result[future.result()] += 1
+            if progress_fn:
+                progress_fn(done / len(videos))
+    return result
+
+# 后台任务状态 {数据集ID: {'status': running|done|failed, 'progress': 0~1, 'result': ..., 'error': ...}}
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def start_keyframe_job(dataset_id: int, workers: int = None) -> bool:
+    """在后台线程中为数据集生成关键帧，同一数据集已有任务在运行时返回 False"""
+    with _jobs_lock:
+        job = _jobs.get(dataset_id)
+        if job and job["status"] == "running":
+            return False
+        job = _jobs[dataset_id] = {"status": "running", "progress": 0.0, "result": None, "error": None}
+
+    def progress(value):
+        job["progress"] = value
+
+    def run():
+        try:
+            with connection_scope():
+                job["result"] = build_dataset_keyframes(dataset_id, workers=workers, progress_fn=progress)
+            job["status"] = "done"
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = "failed"
+
+    threading.Thread(target=run, name=f"keyframes-{dataset_id}", daemon=True).start()
+    return True
+
+def get_keyframe_job(dataset_id: int):
+    """返回数据集后台关键帧任务的状态，没有任务时返回 None"""
+    job = _jobs.get(dataset_id)
+    return dict(job) if job else None
@@ -0,0 +1,154 @@
+import os
+import sys
+import mmap
+import threading
+import struct
+import hashlib
+from array import array
+from config import LINE_INDEX_DIR
+from .cache import cache_data
+from . import metrics
+
+# 索引文件格式：文件头（魔数、源文件大小、源文件修改时间、行数）+ 行数+1 个 uint64 偏移量，
+# 第 i 行位于 [offsets[i], offsets[i+1])，最后一个偏移量等于源文件大小。
+_MAGIC = b"VLMLIDX1"
+_HEADER = struct.Struct("<8sQqQ")
+_OFFSET = struct.Struct("<Q")
+_FLUSH_EVERY = 65536
+
+def get_index_path(data_path: str) -> str:
+    """索引统一存放在 LINE_INDEX_DIR 下，按数据文件绝对路径命名，不在数据文件旁写入任何文件"""
+    digest = hashlib.blake2b(os.path.abspath(data_path).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(LINE_INDEX_DIR, digest[:2], f"{digest}.idx")
+
+class LineIndexWriter:
+    """
+    边读取数据文件边写入行偏移索引，内存占用与文件大小无关。
+    用法: 每读到一行调用 add(该行起始偏移)，读完后调用 close(文件末尾偏移, 文件大小, 修改时间)；
+    中途放弃时调用 abort()，close 之后再调用 abort 不产生任何影响。
+    """
+
+    def __init__(self, data_path: str):
+        self.index_path = get_index_path(data_path)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self._tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, 0, 0, 0))
+        self._buffer = array("Q")
+        self._done = False
+        self.count = 0
+
+    def add(self, offset: int) -> None:
+        self._buffer.append(offset)
+        self.count += 1
+        if len(self._buffer) >= _FLUSH_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        if sys.byteorder != "little":
+            self._buffer.byteswap()
+        self._file.write(self._buffer.tobytes())
+        self._buffer = array("Q")
+
+    def close(self, end_offset: int, source_size: int, source_mtime_ns: int) -> str:
+        """写入结束偏移与源文件状态并原子替换索引文件，返回索引路径"""
+        self._buffer.append(end_offset)
+        self._flush()
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(_MAGIC, source_size, source_mtime_ns, self.count))
+        self._file.close()
+        os.replace(self._tmp_path, self.index_path)
+        self._done = True
+        return self.index_path
+
+    def abort(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+@metrics.timed("line_index.build")
+def build_line_index(data_path: str) -> str:
+    """扫描数据文件生成行偏移索引，返回索引路径"""
+    st = os.stat(data_path)
+    writer = LineIndexWriter(data_path)
+    try:
+        offset = 0
+        with open(data_path, "rb") as f:
+            for line in f:
+                writer.add(offset)
+                offset += len(line)
+        return writer.close(offset, st.st_size, st.st_mtime_ns)
+    finally:
+        writer.abort()
+
+class LineIndex:
+    """
+    内存映射的行偏移索引，支持 O(1) 定位任意行并一次读取连续多行，
+    无论预览到文件的哪个位置，内存占用都只与读取的行数有关。
+    """
+
+    def __init__(self, data_path: str, index_path: str):
+        self.data_path = data_path
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source_size, self.source_mtime_ns, self.count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"索引文件格式错误: {index_path}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def offset(self, line_no: int) -> int:
+        """第 line_no 行的起始字节偏移，line_no 等于行数时返回文件末尾"""
+        return _OFFSET.unpack_from(self._mmap, _HEADER.size + _OFFSET.size * line_no)[0]
+
+    def read_lines(self, start: int, count: int) -> list:
+        """读取第 start 行起的 count 行原始内容（bytes，含换行符）"""
+        start = max(0, min(start, self.count))
+        stop = max(start, min(start + count, self.count))
+        if start == stop:
+            return []
+        pos = _HEADER.size + _OFFSET.size * start
+        offsets = [o for (o,) in _OFFSET.iter_unpack(self._mmap[pos:pos + _OFFSET.size * (stop - start + 1)])]
+        begin = offsets[0]
+        with open(self.data_path, "rb") as f:
+            f.seek(begin)
+            data = f.read(offsets[-1] - begin)
+        return [data[a - begin:b - begin] for a, b in zip(offsets, offsets[1:])]
+
+    def read_line(self, line_no: int) -> bytes:
+        lines = self.read_lines(line_no, 1)
+        return lines[0] if lines else b""
+
+def _is_fresh(index_path: str, size: int, mtime_ns: int) -> bool:
+    try:
+        with open(index_path, "rb") as f:
+            header = f.read(_HEADER.size)
+        magic, source_size, source_mtime_ns, _ = _HEADER.unpack(header)
+    except (OSError, struct.error):
+        return False
+    return magic == _MAGIC and source_size == size and source_mtime_ns == mtime_ns
+
+@cache_data(max_entries=64)
+def _open_line_index(data_path: str, size: int, mtime_ns: int) -> LineIndex:
+    index_path = get_index_path(data_path)
+    if not _is_fresh(index_path, size, mtime_ns):
+        index_path = build_line_index(data_path)
+    return LineIndex(data_path, index_path)
+
+def get_line_index(data_path: str) -> LineIndex:
+    """
+    获取数据文件的行偏移索引，索引不存在或数据文件已变化（大小/修改时间不同）时重新生成。
+    打开的索引按 (路径, 大小, 修改时间) 缓存在进程内。
+    """
+    st = os.stat(data_path)
+    return _open_line_index(data_path, st.st_size, st.st_mtime_ns)
+
+def clear_line_index_cache() -> None:
+    """关闭进程内缓存的索引（索引文件保留在磁盘上）"""
+    _open_line_index.clear()
@@ -0,0 +1,72 @@
+import os
+import re
+import mimetypes
+from urllib.parse import quote
+from config import MEDIA_BASE_URL
+
+# 媒体文件按块读取的大小
+MEDIA_CHUNK_SIZE = 256 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(ValueError):
+    """请求的字节范围超出文件大小"""
+
+def resolve_sandboxed(root_path: str, rel_path: str) -> str:
+    """
+    将相对路径解析为 root_path 下的绝对路径，禁止通过 .. 或绝对路径访问根目录之外的文件。
+    只做路径规范化检查，根目录内由管理员建立的符号链接视为可信。
+    路径越界时抛出 PermissionError。
+    """
+    root = os.path.normpath(os.path.abspath(root_path))
+    if not rel_path or "\x00" in rel_path:
+        raise PermissionError("非法的媒体路径")
+    target = os.path.normpath(os.path.join(root, rel_path))
+    if target != root and not target.startswith(root.rstrip(os.sep) + os.sep):
+        raise PermissionError("媒体路径超出数据集根目录")
+    return target
+
+def guess_content_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+def parse_range(header: str, size: int):
+    """
+    解析单个 Range 请求头，返回闭区间 (start, end)；不支持或格式错误时返回 None（按完整文件响应）。
+    支持 bytes=a-b、bytes=a- 与 bytes=-n 三种形式，范围不可满足时抛出 RangeNotSatisfiable。
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = MEDIA_CHUNK_SIZE):
+    """按块读取文件的 [start, end] 字节区间"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def media_url(dataset_id: int, rel_path: str):
+    """配置了 MEDIA_BASE_URL 时返回媒体服务地址，否则返回 None"""
+    if not MEDIA_BASE_URL:
+        return None
+    return f"{MEDIA_BASE_URL.rstrip('/')}/api/datasets/{dataset_id}/media?path={quote(str(rel_path))}"
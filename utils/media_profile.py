@@ -0,0 +1,259 @@
+import os
+import json
+import struct
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import MEDIA_PROFILE_WORKERS
+from .database import get_db_connection
+from . import jsonl
+from . import metrics
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+# 直方图分桶边界，分桶固定，不同数据集的统计结果可以直接相加
+SIDE_EDGES = [128, 256, 384, 512, 768, 1024, 1536, 2048, 4096]
+ASPECT_EDGES = [0.5, 0.75, 0.9, 1.1, 1.34, 1.8, 2.5]
+BYTES_EDGES = [50 * 1024, 200 * 1024, 500 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+
+# 每批查询缓存与提交线程池的路径数
+_BATCH = 500
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _labels(edges: list, fmt) -> list:
+    labels = [f"<{fmt(edges[0])}"]
+    labels += [f"{fmt(a)}-{fmt(b)}" for a, b in zip(edges, edges[1:])]
+    labels.append(f"≥{fmt(edges[-1])}")
+    return labels
+
+def _fmt_bytes(n: int) -> str:
+    return f"{n // (1024 * 1024)}MB" if n >= 1024 * 1024 else f"{n // 1024}KB"
+
+SIDE_LABELS = _labels(SIDE_EDGES, str)
+ASPECT_LABELS = _labels(ASPECT_EDGES, str)
+BYTES_LABELS = _labels(BYTES_EDGES, _fmt_bytes)
+
+def _jpeg_size(f) -> tuple:
+    """逐个跳过 JPEG 标记段直到 SOF 段，只读取段头，不读取图像数据"""
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            raise ValueError("未找到 JPEG SOF 段")
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_image_header(path: str) -> tuple:
+    """
+    只读取文件头解析图片格式与尺寸，返回 (格式, 宽, 高)。
+    内置解析 JPEG/PNG/GIF/BMP/WebP，其他格式在安装 Pillow 时交给 Image.open（同样只读取文件头）。
+    无法识别时抛出 ValueError。
+    """
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\xff\xd8"):
+            f.seek(2)
+            width, height = _jpeg_size(f)
+            return "jpeg", width, height
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            width, height = struct.unpack(">II", head[16:24])
+            return "png", width, height
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack("<HH", head[6:10])
+            return "gif", width, height
+        if head.startswith(b"BM") and len(head) >= 26:
+            width, height = struct.unpack("<ii", head[18:26])
+            return "bmp", width, abs(height)
+        if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return "webp", width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L":
+                bits = struct.unpack("<I", head[21:25])[0]
+                return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return "webp", int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    if HAS_PIL:
+        try:
+            with Image.open(path) as image:
+                return (image.format or "unknown").lower(), image.width, image.height
+        except Exception as e:
+            raise ValueError(f"无法识别的图片格式: {e}")
+    raise ValueError("无法识别的图片格式")
+
+def iter_dataset_images(dataset_id: int) -> list:
+    """返回数据集引用的全部图片绝对路径（去重，保持首次出现顺序），只解码包含图片的行"""
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT path, root_path FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        return []
+    data_path, root_path = row
+    images = {}
+    with open(data_path, 'rb') as f:
+        for line in f:
+            if b'"image"' not in line or jsonl.classify_line(line) not in ('image', 'multi-image'):
+                continue
+            try:
+                value = jsonl.loads(line).get('image')
+            except (jsonl.DecodeError, AttributeError):
+                continue
+            for p in value if isinstance(value, list) else [value]:
+                images.setdefault(os.path.join(root_path, str(p)), None)
+    return list(images)
+
+def empty_profile() -> dict:
+    return {
+        "images": 0,
+        "missing": 0,
+        "failed": 0,
+        "total_bytes": 0,
+        "width_sum": 0,
+        "height_sum": 0,
+        "formats": {},
+        "width": dict.fromkeys(SIDE_LABELS, 0),
+        "height": dict.fromkeys(SIDE_LABELS, 0),
+        "aspect_ratio": dict.fromkeys(ASPECT_LABELS, 0),
+        "bytes": dict.fromkeys(BYTES_LABELS, 0),
+    }
+
+def _add_image(profile: dict, fmt: str, width: int, height: int, size: int) -> None:
+    profile["images"] += 1
+    profile["total_bytes"] += size
+    profile["width_sum"] += width
+    profile["height_sum"] += height
+    profile["formats"][fmt] = profile["formats"].get(fmt, 0) + 1
+    profile["width"][SIDE_LABELS[bisect_right(SIDE_EDGES, width)]] += 1
+    profile["height"][SIDE_LABELS[bisect_right(SIDE_EDGES, height)]] += 1
+    if height:
+        profile["aspect_ratio"][ASPECT_LABELS[bisect_right(ASPECT_EDGES, width / height)]] += 1
+    profile["bytes"][BYTES_LABELS[bisect_right(BYTES_EDGES, size)]] += 1
+
+def merge_profiles(profiles: list) -> dict:
+    """将多个统计结果相加（分桶固定，直方图逐桶相加）"""
+    merged = empty_profile()
+    for profile in profiles:
+        for key, value in profile.items():
+            if isinstance(value, dict):
+                for label, count in value.items():
+                    merged[key][label] = merged[key].get(label, 0) + count
+            else:
+                merged[key] += value
+    return merged
+
+def _probe(path: str, cached):
+    """在线程池中执行：stat 后与缓存比对，文件变化或未缓存时读取文件头。返回 (路径, 元信息或 None, 是否新读取)"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path, None, False
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return path, cached, False
+    try:
+        fmt, width, height = read_image_header(path)
+    except (OSError, ValueError, struct.error):
+        fmt = width = height = None
+    return path, (st.st_mtime_ns, st.st_size, fmt, width, height), True
+
+def _load_cached(cursor, paths: list) -> dict:
+    placeholders = ", ".join("?" * len(paths))
+    cursor.execute(
+        f"SELECT path, mtime_ns, file_size, format, width, height FROM media_meta WHERE path IN ({placeholders})",
+        paths
+    )
+    return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+@metrics.timed("media_profile.profile_dataset_images")
+def profile_dataset_images(dataset_id: int, workers: int = None, force: bool = False, progress_fn=None) -> dict:
+    """
+    读取数据集引用的每张图片的文件头，统计格式、宽、高、宽高比与文件大小的分布并保存，返回统计结果。
+    图片元信息按 (路径, 修改时间, 大小) 缓存在 media_meta 表中，各数据集共用，重复统计时只需 stat；
+    stat 与文件头读取在线程池中并发执行，以掩盖网络存储的往返延迟。
+    参数:
+      - workers: 线程数，默认读取 MEDIA_PROFILE_WORKERS
+      - force: 忽略缓存重新读取全部文件头
+      - progress_fn: 进度回调函数，接收 (当前进度: float) 一个参数
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM datasets WHERE id = ?", (dataset_id,))
+    if not cursor.fetchone():
+        raise ValueError(f"数据集 {dataset_id} 不存在")
+    images = iter_dataset_images(dataset_id)
+    profile = empty_profile()
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers or MEDIA_PROFILE_WORKERS) as pool:
+        for start in range(0, len(images), _BATCH):
+            batch = images[start:start + _BATCH]
+            cached = {} if force else _load_cached(cursor, batch)
+            updates = []
+            for path, meta, fresh in pool.map(lambda p: _probe(p, cached.get(p)), batch):
+                if meta is None:
+                    profile["missing"] += 1
+                    continue
+                if fresh:
+                    updates.append((path,) + meta)
+                mtime_ns, size, fmt, width, height = meta
+                if fmt is None:
+                    profile["failed"] += 1
+                else:
+                    _add_image(profile, fmt, width, height, size)
+            if updates:
+                cursor.executemany(
+                    "INSERT INTO media_meta (path, mtime_ns, file_size, format, width, height) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (path) DO UPDATE SET mtime_ns = excluded.mtime_ns, file_size = excluded.file_size, "
+                    "format = excluded.format, width = excluded.width, height = excluded.height",
+                    updates
+                )
+                conn.commit()
+                metrics.incr("media_profile.header_read", len(updates))
+            done += len(batch)
+            if progress_fn:
+                progress_fn(done / len(images))
+
+    cursor.execute(
+        "INSERT INTO media_profile (dataset_id, profile, profiled_time) VALUES (?, ?, ?) "
+        "ON CONFLICT (dataset_id) DO UPDATE SET profile = excluded.profile, profiled_time = excluded.profiled_time",
+        (dataset_id, json.dumps(profile, ensure_ascii=False), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+    return profile
+
+def get_dataset_image_profile(dataset_id: int):
+    """数据集已保存的图片统计结果，尚未统计时返回 None"""
+    cursor = get_db_connection().cursor()
+    cursor.execute("SELECT profile FROM media_profile WHERE dataset_id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    return json.loads(row[0]) if row else None
+
+@metrics.timed("media_profile.get_group_image_profile")
+def get_group_image_profile(group_id: int, workers: int = None, progress_fn=None) -> dict:
+    """分组内各数据集图片统计之和，尚未统计的数据集先进行统计；分组不存在时返回空字典"""
+    from .group import get_group_details
+    group = get_group_details(group_id)
+    if not group:
+        return {}
+    dataset_ids = group["dataset_ids"]
+    profiles = []
+    for i, ds_id in enumerate(dataset_ids):
+        profile = get_dataset_image_profile(ds_id)
+        if profile is None:
+            profile = profile_dataset_images(ds_id, workers=workers)
+        profiles.append(profile)
+        if progress_fn:
+            progress_fn((i + 1) / len(dataset_ids))
+    return merge_profiles(profiles)
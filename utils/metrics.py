@@ -0,0 +1,199 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from config import SLOW_QUERY_MS, METRICS_WINDOW
+
+logger = logging.getLogger("vlm_data.metrics")
+slow_query_logger = logging.getLogger("vlm_data.slow_query")
+
+_lock = threading.Lock()
+# 每个操作保留最近 METRICS_WINDOW 次耗时（秒），用于计算分位数
+_samples = {}
+# 每个操作的累计调用次数与总耗时，用于 Prometheus 导出
+_totals = {}
+_counters = {}
+_slow_queries = deque(maxlen=100)
+
+_SQL_TABLE_RE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE|INDEX)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([A-Za-z_][A-Za-z0-9_]*)",
+    re.IGNORECASE
+)
+
+def record(name: str, seconds: float) -> None:
+    """记录一次操作耗时"""
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=METRICS_WINDOW)
+        samples.append(seconds)
+        count, total = _totals.get(name, (0, 0.0))
+        _totals[name] = (count + 1, total + seconds)
+
+def incr(name: str, value: int = 1) -> None:
+    """计数器自增"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+@contextmanager
+def timer(name: str):
+    """计时上下文管理器"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name: str = None):
+    """计时装饰器，name 默认为 模块名.函数名"""
+    def decorator(fn):
+        op_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(op_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def sql_label(sql: str) -> str:
+    """将 SQL 归类为 "动词 表名" 形式的操作名"""
+    sql = sql.strip()
+    verb = sql.split(None, 1)[0].upper() if sql else "SQL"
+    match = _SQL_TABLE_RE.search(sql)
+    return f"db.{verb} {match.group(1)}" if match else f"db.{verb}"
+
+def record_query(sql: str, seconds: float) -> None:
+    """记录一次 SQL 执行，超过阈值时写入慢查询日志"""
+    record(sql_label(sql), seconds)
+    duration_ms = seconds * 1000
+    if duration_ms >= SLOW_QUERY_MS:
+        entry = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": round(duration_ms, 2),
+            "sql": " ".join(sql.split()),
+        }
+        with _lock:
+            _slow_queries.append(entry)
+        slow_query_logger.warning(json.dumps(entry, ensure_ascii=False))
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+def snapshot() -> dict:
+    """
+    返回当前指标快照:
+      - operations: {操作名: {count, total_s, p50_ms, p90_ms, p99_ms, max_ms}}
+      - counters: {计数器名: 值}
+      - caches: {缓存名: {calls, misses, hit_rate}}
+      - slow_queries: 最近的慢查询列表
+    """
+    with _lock:
+        samples = {name: sorted(values) for name, values in _samples.items()}
+        totals = dict(_totals)
+        counters = dict(_counters)
+        slow = list(_slow_queries)
+
+    operations = {}
+    for name, values in samples.items():
+        count, total = totals[name]
+        operations[name] = {
+            "count": count,
+            "total_s": round(total, 4),
+            "p50_ms": round(_percentile(values, 0.5) * 1000, 3),
+            "p90_ms": round(_percentile(values, 0.9) * 1000, 3),
+            "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+
+    caches = {}
+    for key, calls in counters.items():
+        if key.startswith("cache.") and key.endswith(".call"):
+            cache_name = key[len("cache."):-len(".call")]
+            misses = counters.get(f"cache.{cache_name}.miss", 0)
+            caches[cache_name] = {
+                "calls": calls,
+                "misses": misses,
+                "hit_rate": round(1 - misses / calls, 4) if calls else 0.0,
+            }
+
+    return {
+        "operations": operations,
+        "counters": counters,
+        "caches": caches,
+        "slow_queries": slow,
+    }
+
+def reset() -> None:
+    """清空所有指标"""
+    with _lock:
+        _samples.clear()
+        _totals.clear()
+        _counters.clear()
+        _slow_queries.clear()
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def export_prometheus() -> str:
+    """导出 Prometheus 文本格式的指标"""
+    snap = snapshot()
+    lines = [
+        "# HELP vlm_operation_seconds Operation latency over the recent window.",
+        "# TYPE vlm_operation_seconds summary",
+    ]
+    for name, op in sorted(snap["operations"].items()):
+        label = _escape_label(name)
+        for q, key in (("0.5", "p50_ms"), ("0.9", "p90_ms"), ("0.99", "p99_ms")):
+            lines.append(f'vlm_operation_seconds{{op="{label}",quantile="{q}"}} {op[key] / 1000:.6f}')
+        lines.append(f'vlm_operation_seconds_sum{{op="{label}"}} {op["total_s"]:.6f}')
+        lines.append(f'vlm_operation_seconds_count{{op="{label}"}} {op["count"]}')
+
+    lines.append("# HELP vlm_events_total Event counters.")
+    lines.append("# TYPE vlm_events_total counter")
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f'vlm_events_total{{name="{_escape_label(name)}"}} {value}')
+
+    lines.append("# HELP vlm_cache_hit_ratio Cache hit ratio since start.")
+    lines.append("# TYPE vlm_cache_hit_ratio gauge")
+    for name, cache in sorted(snap["caches"].items()):
+        lines.append(f'vlm_cache_hit_ratio{{cache="{_escape_label(name)}"}} {cache["hit_rate"]}')
+    return "\n".join(lines) + "\n"
+
+def write_textfile(path: str) -> None:
+    """原子写入 Prometheus 文本文件（供 node_exporter textfile collector 等本地采集器读取）"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(export_prometheus())
+    os.replace(tmp_path, path)
+
+_exporter_started = False
+
+def start_textfile_exporter(path: str, interval: float = 15.0) -> None:
+    """启动后台线程，定期将指标写入 Prometheus 文本文件（每个进程只启动一次）"""
+    global _exporter_started
+    with _lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    def _loop():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError as e:
+                logger.warning(f"写入指标文件失败: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, name="metrics-textfile-exporter", daemon=True).start()
@@ -0,0 +1,245 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 按版本号排序的迁移列表 [(版本号, 说明, 迁移函数), ...]
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    """注册一个迁移。新增表或列时追加新的迁移，不要修改已发布的迁移"""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+def _ensure_columns(conn, table: str, columns: dict) -> None:
+    """为已存在的表补齐缺失的列，columns 为 {列名: 列定义}"""
+    cursor = conn.execute(f"SELECT * FROM {table} LIMIT 0")
+    existing = {column[0] for column in cursor.description}
+    cursor.fetchall()
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def _rename_duplicates(conn, table: str) -> None:
+    """同名记录中保留 id 最小的一条，其余改名为 "名称_id"，以便建立唯一索引"""
+    cursor = conn.execute(f"SELECT id, name FROM {table} ORDER BY id")
+    seen = set()
+    renames = []
+    for row_id, name in cursor.fetchall():
+        if name in seen:
+            renames.append((f"{name}_{row_id}", row_id))
+        seen.add(name)
+    for new_name, row_id in renames:
+        logger.warning("%s 中存在重复名称，id=%s 改名为 %s", table, row_id, new_name)
+        conn.execute(f"UPDATE {table} SET name = ? WHERE id = ?", (new_name, row_id))
+
+@migration(1, "初始表结构")
+def _initial_schema(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS datasets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            upload_time TEXT NOT NULL,
+            tags TEXT DEFAULT '[]',
+            data_type TEXT NOT NULL,
+            root_path TEXT NOT NULL,
+            item_count INTEGER DEFAULT 0,
+            text_count INTEGER DEFAULT 0,
+            single_image_count INTEGER DEFAULT 0,
+            multi_image_count INTEGER DEFAULT 0,
+            video_count INTEGER DEFAULT 0,
+            fingerprint TEXT,
+            file_size INTEGER
+        )
+    """)
+    # 兼容引入迁移之前创建的数据库：补齐后续新增的列
+    _ensure_columns(conn, "datasets", {
+        "fingerprint": "TEXT",
+        "file_size": "INTEGER",
+    })
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_datasets_fingerprint ON datasets (fingerprint)")
+    # 创建数据集分组表
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dataset_groups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            dataset_ids TEXT NOT NULL,
+            create_time TEXT NOT NULL
+        )
+    """)
+    # 创建去重签名表（每行一个精确哈希，可选 MinHash 签名）
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS item_signatures (
+            dataset_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            exact_hash TEXT NOT NULL,
+            minhash BLOB,
+            PRIMARY KEY (dataset_id, line_no)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_item_signatures_hash ON item_signatures (exact_hash)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_bands (
+            dataset_id INTEGER NOT NULL,
+            line_no INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            band_hash INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_minhash_bands_bucket ON minhash_bands (band, band_hash)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_minhash_bands_dataset ON minhash_bands (dataset_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS dedup_status (
+            dataset_id INTEGER PRIMARY KEY,
+            with_minhash INTEGER DEFAULT 0,
+            line_count INTEGER DEFAULT 0,
+            computed_time TEXT NOT NULL
+        )
+    """)
+
+@migration(2, "数据集与分组名称唯一索引，上传时间与数据类型索引")
+def _name_and_hot_column_indexes(conn) -> None:
+    _rename_duplicates(conn, "datasets")
+    _rename_duplicates(conn, "dataset_groups")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_datasets_name ON datasets (name)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_dataset_groups_name ON dataset_groups (name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_datasets_upload_time ON datasets (upload_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_datasets_data_type ON datasets (data_type)")
+
+@migration(3, "目录数据版本号表")
+def _catalog_revision(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_revision (
+            scope TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for scope in ("datasets", "dataset_names", "tags", "groups"):
+        conn.execute(
+            "INSERT INTO catalog_revision (scope, revision) VALUES (?, 0) ON CONFLICT (scope) DO NOTHING",
+            (scope,)
+        )
+
+@migration(4, "记录导入时跳过的行数与隔离文件")
+def _import_quarantine(conn) -> None:
+    _ensure_columns(conn, "datasets", {
+        "skipped_count": "INTEGER DEFAULT 0",
+        "quarantine_path": "TEXT",
+    })
+
+@migration(5, "数据格式校验结果表")
+def _schema_violations(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_violations (
+            dataset_id INTEGER NOT NULL,
+            rule TEXT NOT NULL,
+            violation_count INTEGER NOT NULL,
+            first_line INTEGER,
+            PRIMARY KEY (dataset_id, rule)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_status (
+            dataset_id INTEGER PRIMARY KEY,
+            spec_hash TEXT NOT NULL,
+            line_count INTEGER DEFAULT 0,
+            invalid_count INTEGER DEFAULT 0,
+            checked_time TEXT NOT NULL
+        )
+    """)
+
+@migration(6, "图片元信息缓存与数据集图片统计表")
+def _media_profile(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS media_meta (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            file_size INTEGER NOT NULL,
+            format TEXT,
+            width INTEGER,
+            height INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS media_profile (
+            dataset_id INTEGER PRIMARY KEY,
+            profile TEXT NOT NULL,
+            profiled_time TEXT NOT NULL
+        )
+    """)
+
+@migration(7, "数据集存储占用表")
+def _disk_usage(conn) -> None:
+    # 每个数据集引用的文件（按设备号与 inode 去重），分组统计时跨数据集去重
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usage_files (
+            dataset_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            dev INTEGER NOT NULL,
+            ino INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (dataset_id, dev, ino)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS disk_usage (
+            dataset_id INTEGER PRIMARY KEY,
+            media_files INTEGER DEFAULT 0,
+            media_bytes INTEGER DEFAULT 0,
+            missing_files INTEGER DEFAULT 0,
+            upload_bytes INTEGER DEFAULT 0,
+            computed_time TEXT NOT NULL
+        )
+    """)
+
+@migration(8, "存储占用统计的版本号范围")
+def _disk_usage_revision(conn) -> None:
+    conn.execute(
+        "INSERT INTO catalog_revision (scope, revision) VALUES (?, 0) ON CONFLICT (scope) DO NOTHING",
+        ("disk_usage",)
+    )
+
+def get_schema_version(conn) -> int:
+    """数据库当前的表结构版本，尚未执行过任何迁移时为 0"""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn) -> list:
+    """
+    按版本号顺序执行尚未执行的迁移，每个迁移执行成功后写入 schema_version 并提交，返回本次执行的版本号列表。
+    迁移语句均可重复执行（IF NOT EXISTS），多个节点同时启动时，
+    写入版本号冲突的一方回滚并跳过该迁移。
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_time TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            fn(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_time) VALUES (?, ?, ?)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # 其他节点已完成同一迁移
+            if get_schema_version(conn) >= version:
+                continue
+            raise
+        logger.info("已执行数据库迁移 %s: %s", version, description)
+        applied.append(version)
+    return applied
@@ -1,148 +1,83 @@
-import json
 import os
-import html
-import streamlit as st
-from config import ITEMS_PER_PAGE
+from config import ITEMS_PER_PAGE, PAGE_SIZE_BY_TYPE
 from .database import get_db_connection
+from . import jsonl
+from . import metrics
+from .media import media_url
+from .line_index import get_line_index
 
-@st.cache_data
-def load_jsonl_lines(file_path: str) -> list:
-    """缓存加载JSONL文件的行内容"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return f.readlines()
+def read_lines(file_path: str, offset: int, limit: int) -> list:
+    """通过行偏移索引读取第 offset 行起的 limit 行原始内容（bytes），不把整个文件读入内存"""
+    with metrics.timer("preview.read_lines"):
+        return get_line_index(file_path).read_lines(offset, limit)
 
-def get_items_for_page(lines: list, start: int, end: int) -> list:
-    """只解析指定页面范围内的JSON数据"""
-    items = []
-    for line in lines[start:end]:
-        try:
-            items.append(json.loads(line.strip()))
-        except json.JSONDecodeError:
-            st.error(f"JSON解析错误: {line[:100]}...")
-            continue
-    return items
+def count_lines(file_path: str) -> int:
+    """数据文件的行数（来自行偏移索引）"""
+    return len(get_line_index(file_path))
 
-def preview_dataset(dataset_id: int, page: int = 0) -> int:
+def get_page_size(data_type: str) -> int:
+    """按数据集主要类型返回默认每页条数：文本多显示，视频少显示"""
+    return PAGE_SIZE_BY_TYPE.get(data_type, ITEMS_PER_PAGE)
+
+def get_items(file_path: str, start: int, count: int, on_error=None) -> list:
     """
-    在前端预览指定数据集的内容。
-    支持文本、图片、视频展示，并提供分页功能。
+    读取并解析第 start 行起的 count 条数据，返回 [(行号, 数据项), ...]
+    参数:
+      - on_error: 解析失败时的回调，接收出错的原始行，默认跳过
     """
-    # 添加自定义 CSS 样式
-    st.markdown("""
-        <style>
-        .chat-message {
-            padding: 1rem;
-            margin: 1rem 0;
-            border-radius: 10px;
-            position: relative;
-        }
-        .human-message {
-            background-color: #e5f6ff;
-            margin-right: 50px;
-            box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
-        }
-        .assistant-message {
-            background-color: #f0f0f0;
-            margin-left: 50px;
-            box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
-        }
-        .message-header {
-            font-size: 0.8rem;
-            color: #666;
-            margin-bottom: 0.5rem;
-        }
-        .message-content {
-            font-size: 1rem;
-            line-height: 1.5;
-        }
-        </style>
-    """, unsafe_allow_html=True)
+    lines = read_lines(file_path, start, count)
+    with metrics.timer("preview.parse_page"):
+        items = []
+        for line_no, line in enumerate(lines, start):
+            if not line.strip():
+                continue
+            try:
+                items.append((line_no, jsonl.loads(line)))
+            except jsonl.DecodeError:
+                if on_error:
+                    on_error(line.decode('utf-8', errors='replace'))
+        return items
+
+def file_version(path: str):
+    """数据文件的 (大小, 修改时间)，用于缓存失效与 ETag；文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
 
+def get_preview_source(dataset_id: int):
+    """获取预览所需的数据集信息，返回 (数据文件路径, 数据类型, 根目录) 或 None"""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute(
         "SELECT path, data_type, root_path FROM datasets WHERE id = ?",
         (dataset_id,)
     )
-    row = cursor.fetchone()
-    if not row:
-        st.error("未找到对应数据集")
-        return page
-
-    content_path, data_type, root_path = row
-    
-    # 使用缓存加载文件内容
-    lines = load_jsonl_lines(content_path)
-    
-    start = page * ITEMS_PER_PAGE
-    end = start + ITEMS_PER_PAGE
-    
-    # 只解析当前页面需要的数据
-    items = get_items_for_page(lines, start, end)
-    total_items = len(lines)
-
-    # 遍历当前页数据项
-    for item in items:
-        st.markdown("---")
-        # 使用卡片容器
-        with st.container():
-            st.markdown(f"#### 对话 ID: {item.get('id')}")
-            
-            # 渲染图片
-            if 'image' in item:
-                images = item['image'] if isinstance(item['image'], list) else [item['image']]
-                cols = st.columns(min(len(images), 3))  # 最多3列
-                for idx, (img, col) in enumerate(zip(images, cols)):
-                    abs_path = os.path.join(root_path, img)
-                    if os.path.exists(abs_path):
-                        with col:
-                            st.image(abs_path, caption=f"图片 {idx+1}", width=400)
+    return cursor.fetchone()
 
-            # 渲染视频
-            if 'video' in item and item['video']:
-                videos = item['video'] if isinstance(item['video'], list) else [item['video']]
-                for vid in videos:
-                    abs_path = os.path.join(root_path, vid)
-                    if os.path.exists(abs_path):
-                        st.video(abs_path)
+def resolve_media_paths(root_path: str, value) -> list:
+    """将 image/video 字段解析为绝对路径列表，保留原始顺序，不存在的文件对应 None"""
+    if not value:
+        return []
+    paths = value if isinstance(value, list) else [value]
+    resolved = []
+    for p in paths:
+        abs_path = os.path.join(root_path, p)
+        with metrics.timer("preview.media_stat"):
+            exists = os.path.exists(abs_path)
+        resolved.append(abs_path if exists else None)
+    return resolved
 
-            for conv in item.get('conversations', []):
-                is_human = conv['from'] == 'human'
-                message_class = 'human-message' if is_human else 'assistant-message'
-                icon = "👤" if is_human else "🤖"
-                role = "User" if is_human else "Assistant"
-                
-                # 构建消息HTML
-                value = conv['value']
-                value = html.escape(value)  # 转义HTML特殊字符
-                message_html = f"""
-                <div class="chat-message {message_class}">
-                    <div class="message-header">
-                        {icon} <b>{role}</b>
-                    </div>
-                    <div class="message-content">
-                        {value}
-                    </div>
-                </div>
-                """
-                st.markdown(message_html, unsafe_allow_html=True)
-
-    # 分页控制
-    if lines:
-        total_pages = len(lines) // ITEMS_PER_PAGE + (1 if len(lines) % ITEMS_PER_PAGE > 0 else 0)
-        cols = st.columns([1, 3, 1])
-        
-        with cols[0]:
-            if page > 0:
-                if st.button("⬅️ 上一页", key=f"prev_{dataset_id}"):
-                    return page - 1
-                    
-        with cols[1]:
-            st.markdown(f"<div style='text-align: center'>第 {page + 1} 页，共 {total_pages} 页</div>", unsafe_allow_html=True)
-            
-        with cols[2]:
-            if end < len(lines):
-                if st.button("下一页 ➡️", key=f"next_{dataset_id}"):
-                    return page + 1
-
-    return page
+def resolve_media_sources(dataset_id: int, root_path: str, value) -> list:
+    """
+    返回预览使用的媒体来源列表：配置了 MEDIA_BASE_URL 时为媒体服务 URL（浏览器直接按需加载，
+    视频拖动时只请求需要的字节范围），否则为本地绝对路径（不存在的文件对应 None）。
+    """
+    if not value:
+        return []
+    paths = value if isinstance(value, list) else [value]
+    urls = [media_url(dataset_id, p) for p in paths]
+    if all(urls):
+        return urls
+    return resolve_media_paths(root_path, value)
@@ -0,0 +1,98 @@
+import re
+import html
+from config import RENDER_CACHE_SIZE
+from .cache import MemoryCache, _MISSING
+from . import metrics
+from . import shared_cache
+
+# 预览页的对话样式，每次渲染只注入一次
+PREVIEW_CSS = """
+<style>
+.chat-message {
+    padding: 1rem;
+    margin: 1rem 0;
+    border-radius: 10px;
+    position: relative;
+}
+.human-message {
+    background-color: #e5f6ff;
+    margin-right: 50px;
+    box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
+}
+.assistant-message {
+    background-color: #f0f0f0;
+    margin-left: 50px;
+    box-shadow: 2px 2px 5px rgba(0,0,0,0.1);
+}
+.message-header {
+    font-size: 0.8rem;
+    color: #666;
+    margin-bottom: 0.5rem;
+}
+.message-content {
+    font-size: 1rem;
+    line-height: 1.5;
+}
+</style>
+"""
+
+# 代码块与行内代码，Markdown 模式下其中的内容原样保留
+_CODE_RE = re.compile(r"(```.*?```|`[^`\n]*`)", re.DOTALL)
+
+_html_cache = MemoryCache(max_entries=RENDER_CACHE_SIZE)
+
+def _escape_markdown_html(text: str) -> str:
+    """Markdown 模式下转义代码以外的 < 与 >，阻止原始 HTML 标签，同时保留 Markdown 与 LaTeX 语法"""
+    parts = _CODE_RE.split(text)
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].replace("<", "&lt;")
+    return "".join(parts)
+
+def _message_html(conv: dict, markdown: bool) -> str:
+    is_human = conv.get('from') == 'human'
+    message_class = 'human-message' if is_human else 'assistant-message'
+    icon = "👤" if is_human else "🤖"
+    role = "User" if is_human else "Assistant"
+    value = str(conv.get('value', ''))
+    header = (f'<div class="chat-message {message_class}">'
+              f'<div class="message-header">{icon} <b>{role}</b></div>'
+              f'<div class="message-content">')
+    if markdown:
+        # 空行使 HTML 块结束，中间的内容由前端按 Markdown（含 LaTeX 公式）渲染
+        return f"{header}\n\n{_escape_markdown_html(value)}\n\n</div></div>\n"
+    # 纯文本模式整段保持为一个 HTML 块，换行转为 <br>，避免空行打断 HTML 块
+    content = html.escape(value).replace("\n", "<br>")
+    return f"{header}{content}</div></div>\n"
+
+def build_item_html(item: dict, markdown: bool = False) -> tuple:
+    """
+    将一条数据渲染为 HTML 片段，返回 (标题部分, 对话部分)。
+    标题与对话分开返回，以便在两者之间插入图片/视频；没有媒体时调用方可以拼接后一次输出。
+    """
+    head = f"<hr>\n<h4>对话 ID: {html.escape(str(item.get('id')))}</h4>\n"
+    conversations = item.get('conversations') or []
+    body = "".join(_message_html(conv, markdown) for conv in conversations if isinstance(conv, dict))
+    return head, body
+
+def render_item_html(dataset_id: int, line_no: int, version, item: dict, markdown: bool = False) -> tuple:
+    """
+    带缓存的 build_item_html，按 (数据集, 行号, 文件版本, 渲染模式) 缓存，
+    version 一般为数据文件的 (大小, 修改时间)，文件变化后自动失效。
+    进程内未命中时再查跨进程共享缓存（配置了 SHARED_CACHE_URL 时）。
+    """
+    metrics.incr("cache.render_item_html.call")
+    key = (dataset_id, line_no, version, markdown)
+    fragment = _html_cache.get(key)
+    if fragment is _MISSING:
+        shared_key = f"render_item_html:{dataset_id}:{line_no}:{version}:{int(markdown)}"
+        fragment = shared_cache.shared_get(shared_key)
+        if fragment is shared_cache._MISSING:
+            metrics.incr("cache.render_item_html.miss")
+            fragment = build_item_html(item, markdown)
+            shared_cache.shared_set(shared_key, fragment)
+        _html_cache.set(key, fragment)
+    return fragment
+
+def clear_render_cache() -> None:
+    """清除已渲染的 HTML 片段"""
+    _html_cache.clear()
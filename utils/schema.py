@@ -0,0 +1,295 @@
+import os
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import RECORD_SPEC
+from .database import get_db_connection
+from .cache import cache_data
+from . import jsonl
+from . import metrics
+
+# 数据格式规范：对话字段、角色名称与媒体占位符。RECORD_SPEC 指向的 JSON 文件可覆盖其中任意字段，
+# 占位符设为空字符串时不检查对应媒体的占位符数量，alternate 为 false 时不检查角色交替
+DEFAULT_RECORD_SPEC = {
+    "conversations_key": "conversations",
+    "role_key": "from",
+    "value_key": "value",
+    "user_roles": ["human", "user"],
+    "assistant_roles": ["gpt", "assistant"],
+    "system_roles": ["system"],
+    "alternate": True,
+    "image_placeholder": "<image>",
+    "video_placeholder": "<video>",
+}
+
+RULE_CONVERSATIONS = "conversations_missing"
+RULE_TURN_FORMAT = "turn_format"
+RULE_UNKNOWN_ROLE = "unknown_role"
+RULE_ALTERNATION = "role_alternation"
+RULE_IMAGE_PLACEHOLDER = "image_placeholder_mismatch"
+RULE_VIDEO_PLACEHOLDER = "video_placeholder_mismatch"
+
+RULE_DESCRIPTIONS = {
+    RULE_CONVERSATIONS: "缺少对话或对话不是非空列表",
+    RULE_TURN_FORMAT: "对话轮次不是对象，或缺少文本内容",
+    RULE_UNKNOWN_ROLE: "对话角色不在规范允许的范围内",
+    RULE_ALTERNATION: "对话未按 用户→助手 交替进行（系统消息只能位于开头，须以助手回复结束）",
+    RULE_IMAGE_PLACEHOLDER: "图片占位符数量与图片数量不一致",
+    RULE_VIDEO_PLACEHOLDER: "视频占位符数量与视频数量不一致",
+}
+
+CHUNK_LINES = 5000
+_NO_VIOLATIONS = ()
+
+@cache_data(max_entries=1)
+def _load_record_spec(path: str, mtime_ns: int) -> dict:
+    spec = dict(DEFAULT_RECORD_SPEC)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            spec.update(json.load(f))
+    return spec
+
+def get_record_spec() -> dict:
+    """当前生效的数据格式规范，规范文件修改后自动重新读取"""
+    mtime_ns = os.stat(RECORD_SPEC).st_mtime_ns if RECORD_SPEC else 0
+    return _load_record_spec(RECORD_SPEC, mtime_ns)
+
+def get_spec_hash(spec: dict) -> str:
+    """规范内容的摘要，规范变化后已保存的校验结果视为过期"""
+    data = json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def _media_count(value) -> int:
+    if not value:
+        return 0
+    return len(value) if isinstance(value, list) else 1
+
+def compile_spec(spec: dict):
+    """
+    将规范编译为校验函数 validate(item) -> 违反的规则元组（合法时为空元组）。
+    规范中的字段与角色集合在编译时绑定为局部变量，逐条校验时不再查找规范。
+    """
+    conv_key = spec["conversations_key"]
+    role_key = spec["role_key"]
+    value_key = spec["value_key"]
+    # 角色 → 0 用户 / 1 助手 / 2 系统
+    role_kind = {}
+    for role in spec["user_roles"]:
+        role_kind[role] = 0
+    for role in spec["assistant_roles"]:
+        role_kind[role] = 1
+    for role in spec["system_roles"]:
+        role_kind[role] = 2
+    alternate = bool(spec["alternate"])
+    image_placeholder = spec["image_placeholder"]
+    video_placeholder = spec["video_placeholder"]
+
+    def validate(item: dict) -> tuple:
+        convs = item.get(conv_key)
+        if not convs or not isinstance(convs, list):
+            return (RULE_CONVERSATIONS,)
+        bad_format = unknown_role = bad_order = False
+        image_count = video_count = 0
+        # 可选的开头系统消息之后，用户（0）与助手（1）交替，且以助手结束
+        expected = 0
+        answered = False
+        for i, turn in enumerate(convs):
+            if not isinstance(turn, dict):
+                bad_format = True
+                continue
+            value = turn.get(value_key)
+            if isinstance(value, str):
+                if image_placeholder:
+                    image_count += value.count(image_placeholder)
+                if video_placeholder:
+                    video_count += value.count(video_placeholder)
+            else:
+                bad_format = True
+            kind = role_kind.get(turn.get(role_key))
+            if kind is None:
+                unknown_role = True
+            elif kind == 2:
+                bad_order = bad_order or i > 0
+            elif kind != expected:
+                bad_order = True
+            else:
+                expected ^= 1
+                answered = answered or kind == 1
+
+        violations = []
+        if bad_format:
+            violations.append(RULE_TURN_FORMAT)
+        if unknown_role:
+            violations.append(RULE_UNKNOWN_ROLE)
+        elif alternate and not bad_format and (bad_order or expected or not answered):
+            violations.append(RULE_ALTERNATION)
+        if image_placeholder and image_count != _media_count(item.get("image")):
+            violations.append(RULE_IMAGE_PLACEHOLDER)
+        if video_placeholder and video_count != _media_count(item.get("video")):
+            violations.append(RULE_VIDEO_PLACEHOLDER)
+        return tuple(violations) if violations else _NO_VIOLATIONS
+
+    return validate
+
+class SchemaTally:
+    """按规则累计违规条数与首次出现的行号（存储副本中从 0 开始的行号）"""
+
+    def __init__(self, lines: int = 0, invalid: int = 0, violations: dict = None):
+        self.lines = lines
+        self.invalid = invalid
+        # {规则: [违规条数, 首次出现的行号]}
+        self.violations = violations or {}
+
+    def add(self, line_no: int, rules: tuple) -> None:
+        self.lines += 1
+        if not rules:
+            return
+        self.invalid += 1
+        for rule in rules:
+            entry = self.violations.get(rule)
+            if entry is None:
+                self.violations[rule] = [1, line_no]
+            else:
+                entry[0] += 1
+
+    def merge(self, other: "SchemaTally") -> None:
+        """合并后续行块的统计，other 中的行号应大于本对象中的行号"""
+        self.lines += other.lines
+        self.invalid += other.invalid
+        for rule, (count, first_line) in other.violations.items():
+            entry = self.violations.get(rule)
+            if entry is None:
+                self.violations[rule] = [count, first_line]
+            else:
+                entry[0] += count
+
+    def to_dict(self) -> dict:
+        return {"lines": self.lines, "invalid": self.invalid, "violations": self.violations}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SchemaTally":
+        return cls(data["lines"], data["invalid"], {k: list(v) for k, v in data["violations"].items()})
+
+def save_schema_report(conn, dataset_id: int, tally: SchemaTally, spec_hash: str) -> None:
+    """写入数据集的逐规则违规统计，不提交事务，由调用方与其他写操作一起提交"""
+    conn.execute("DELETE FROM schema_violations WHERE dataset_id = ?", (dataset_id,))
+    conn.executemany(
+        "INSERT INTO schema_violations (dataset_id, rule, violation_count, first_line) VALUES (?, ?, ?, ?)",
+        [(dataset_id, rule, count, first_line) for rule, (count, first_line) in tally.violations.items()]
+    )
+    conn.execute(
+        "INSERT INTO schema_status (dataset_id, spec_hash, line_count, invalid_count, checked_time) "
+        "VALUES (?, ?, ?, ?, ?) ON CONFLICT (dataset_id) DO UPDATE SET spec_hash = excluded.spec_hash, "
+        "line_count = excluded.line_count, invalid_count = excluded.invalid_count, "
+        "checked_time = excluded.checked_time",
+        (dataset_id, spec_hash, tally.lines, tally.invalid, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+
+def _check_chunk(args: tuple) -> SchemaTally:
+    """子进程中校验一个行块，无法解析的行不计入（由导入与 validate_dataset 负责）"""
+    start_line, lines, spec = args
+    validate = compile_spec(spec)
+    tally = SchemaTally()
+    loads = jsonl.loads
+    for offset, line in enumerate(lines):
+        try:
+            item = loads(line)
+        except jsonl.DecodeError:
+            continue
+        if isinstance(item, dict):
+            tally.add(start_line + offset, validate(item))
+    return tally
+
+def _iter_chunks(file_path: str, spec: dict):
+    """流式读取文件，按 CHUNK_LINES 行切块"""
+    with open(file_path, 'rb') as f:
+        start = 0
+        chunk = []
+        for line in f:
+            chunk.append(line)
+            if len(chunk) >= CHUNK_LINES:
+                yield (start, chunk, spec)
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield (start, chunk, spec)
+
+def _parallel_check(file_path: str, spec: dict, workers: int = None):
+    """并行流式校验，按行块顺序返回结果，限制在途块数量以保证内存占用有界"""
+    workers = workers or os.cpu_count() or 1
+    chunks = _iter_chunks(file_path, spec)
+    if workers <= 1:
+        for chunk in chunks:
+            yield _check_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_check_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+@metrics.timed("schema.check_dataset_schema")
+def check_dataset_schema(dataset_id: int, workers: int = None, progress_fn=None) -> dict:
+    """
+    按当前规范校验数据集的每一条数据，保存并返回逐规则的违规统计（见 get_schema_report）。
+    参数:
+      - workers: 并行校验的进程数，默认为 CPU 核数
+      - progress_fn: 进度回调函数，接收 (阶段描述: str, 当前进度: float) 两个参数
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT path, item_count FROM datasets WHERE id = ?", (dataset_id,))
+    row = cursor.fetchone()
+    if not row:
+        raise ValueError(f"数据集 {dataset_id} 不存在")
+    path, item_count = row
+
+    spec = get_record_spec()
+    tally = SchemaTally()
+    for chunk_tally in _parallel_check(path, spec, workers):
+        tally.merge(chunk_tally)
+        if progress_fn and item_count:
+            progress_fn(f"正在校验数据格式... ({tally.lines}/{item_count})", min(tally.lines / item_count, 1.0))
+
+    save_schema_report(conn, dataset_id, tally, get_spec_hash(spec))
+    conn.commit()
+    return get_schema_report(dataset_id)
+
+def get_schema_report(dataset_id: int) -> dict:
+    """
+    数据集已保存的数据格式校验结果，尚未校验时返回 None。
+    返回值: {'lines': int, 'invalid': int, 'checked_time': str, 'stale': bool,
+             'violations': [{'rule', 'description', 'count', 'first_line'}, ...]}
+    stale 为 True 表示校验之后规范已变化。
+    """
+    cursor = get_db_connection().cursor()
+    cursor.execute(
+        "SELECT spec_hash, line_count, invalid_count, checked_time FROM schema_status WHERE dataset_id = ?",
+        (dataset_id,)
+    )
+    status = cursor.fetchone()
+    if not status:
+        return None
+    spec_hash, lines, invalid, checked_time = status
+    cursor.execute(
+        "SELECT rule, violation_count, first_line FROM schema_violations WHERE dataset_id = ? "
+        "ORDER BY violation_count DESC",
+        (dataset_id,)
+    )
+    violations = [
+        {"rule": rule, "description": RULE_DESCRIPTIONS.get(rule, rule), "count": count, "first_line": first_line}
+        for rule, count, first_line in cursor.fetchall()
+    ]
+    return {
+        "lines": lines,
+        "invalid": invalid,
+        "checked_time": checked_time,
+        "stale": spec_hash != get_spec_hash(get_record_spec()),
+        "violations": violations,
+    }
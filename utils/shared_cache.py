@@ -0,0 +1,238 @@
+import os
+import hmac
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+import hashlib
+from config import (SHARED_CACHE_URL, SHARED_CACHE_MAX_MB, SHARED_CACHE_TTL, SHARED_CACHE_SECRET,
+                    UPLOAD_DIR, DB_PATH)
+from . import metrics
+
+# 跨进程共享的缓存层：同一台机器上的多个 Streamlit/API 进程共用一份缓存，
+# 位于进程内 MemoryCache 之后、实际计算之前。任何错误都按未命中处理，不影响调用方。
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# 单个条目超过容量上限的该比例时不写入，避免一个大对象挤掉全部缓存
+_MAX_ENTRY_FRACTION = 0.1
+# 每写入多少次检查一次容量
+_EVICT_EVERY = 64
+# 读取时距离上次访问超过该秒数才更新访问时间，减少写操作
+_TOUCH_INTERVAL = 60
+# 键前缀区分不同的元数据库，多个部署共用同一缓存时互不干扰
+_NAMESPACE = hashlib.blake2b(DB_PATH.encode("utf-8"), digest_size=4).hexdigest() + ":"
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+def _sign(secret: bytes, key: str, data: bytes) -> bytes:
+    # 签名包含键，已签名的值被挪到其他键下同样校验失败
+    return hmac.new(secret, key.encode("utf-8") + b"\0" + data, hashlib.sha256).digest()
+
+def _dumps(value, key: str, secret: bytes = None) -> bytes:
+    """pickle 序列化，设置了密钥时在前面加上 HMAC-SHA256 签名"""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return _sign(secret, key, data) + data if secret else data
+
+def _loads(payload: bytes, key: str, secret: bytes = None):
+    """先校验签名再反序列化，签名不符（被篡改或由其他密钥写入）时按未命中处理"""
+    if secret:
+        signature, payload = payload[:_SIGNATURE_SIZE], payload[_SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, _sign(secret, key, payload)):
+            metrics.incr("shared_cache.bad_signature")
+            return _MISSING
+    return pickle.loads(payload)
+
+class DiskCache:
+    """
+    基于 SQLite 文件的共享缓存，值以 pickle 序列化存储（设置 secret 时附带签名，读取时先校验）。
+    缓存文件应只允许运行本平台的用户写入。支持 TTL 与总大小上限，超出上限时按最近访问时间淘汰。
+    """
+
+    def __init__(self, path: str, max_bytes: int, default_ttl: float = None, secret: bytes = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.secret = secret
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # 每个线程使用独立连接，自动提交模式
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires, accessed FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+        value, expires, accessed = row
+        if expires is not None and expires < now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return _MISSING
+        if now - accessed > _TOUCH_INTERVAL:
+            conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, key))
+        return _loads(value, key, self.secret)
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        data = _dumps(value, key, self.secret)
+        if len(data) > self.max_bytes * _MAX_ENTRY_FRACTION:
+            return
+        now = time.time()
+        ttl = ttl or self.default_ttl
+        self._conn().execute(
+            "INSERT INTO cache_entries (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+            "expires = excluded.expires, accessed = excluded.accessed",
+            (key, data, len(data), now + ttl if ttl else None, now)
+        )
+        self._writes += 1
+        if self._writes % _EVICT_EVERY == 0:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache_entries")
+
+    def evict(self) -> int:
+        """删除过期条目，总大小超过上限时按最近访问时间淘汰到上限的 90%，返回删除的条目数"""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires < ?",
+                               (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return removed
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+        return removed + len(victims)
+
+    def stats(self) -> dict:
+        count, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+        ).fetchone()
+        return {"backend": "disk", "path": self.path, "entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+class RedisCache:
+    """
+    基于 Redis（或兼容的 KV 服务，如 Valkey、KeyDB）的共享缓存，可跨主机共享。
+    容量上限由服务端的 maxmemory 与淘汰策略控制。
+    值以 pickle 序列化，能写入该 Redis 的任何人都可以构造在读取进程中执行代码的条目，
+    因此必须设置签名密钥，读取时签名不符的条目直接丢弃。
+    """
+
+    def __init__(self, url: str, default_ttl: float = None, prefix: str = "vlm:", secret: bytes = None):
+        if not secret:
+            raise RuntimeError("使用 Redis 共享缓存必须设置 SHARED_CACHE_SECRET")
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("使用 Redis 共享缓存需要安装 redis")
+        self._client = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.secret = secret
+
+    def get(self, key: str):
+        data = self._client.get(self.prefix + key)
+        return _MISSING if data is None else _loads(data, key, self.secret)
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        ttl = ttl or self.default_ttl
+        self._client.set(self.prefix + key, _dumps(value, key, self.secret), ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(match=self.prefix + "*"):
+            self._client.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "entries": sum(1 for _ in self._client.scan_iter(match=self.prefix + "*"))}
+
+def create_shared_cache(url: str):
+    """
+    根据 SHARED_CACHE_URL 创建共享缓存：
+      - 空字符串：不使用共享缓存
+      - disk：上传目录下的 .cache/shared_cache.db
+      - 文件路径：指定位置的 SQLite 缓存文件
+      - redis://host:6379/0：Redis（需要安装 redis，并设置 SHARED_CACHE_SECRET）
+    设置 SHARED_CACHE_SECRET 后所有条目都带 HMAC 签名。
+    """
+    if not url:
+        return None
+    secret = SHARED_CACHE_SECRET.encode("utf-8") or None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, SHARED_CACHE_TTL, secret=secret)
+    path = os.path.join(UPLOAD_DIR, ".cache", "shared_cache.db") if url == "disk" else url
+    return DiskCache(path, SHARED_CACHE_MAX_MB * 1024 * 1024, SHARED_CACHE_TTL, secret=secret)
+
+_shared = _MISSING
+_shared_lock = threading.Lock()
+
+def get_shared_cache():
+    """进程内共享的缓存实例，未配置或初始化失败时返回 None"""
+    global _shared
+    if _shared is _MISSING:
+        with _shared_lock:
+            if _shared is _MISSING:
+                try:
+                    _shared = create_shared_cache(SHARED_CACHE_URL)
+                except Exception as e:
+                    logger.warning("共享缓存初始化失败，仅使用进程内缓存: %s", e)
+                    _shared = None
+    return _shared
+
+def shared_get(key: str):
+    """读取共享缓存，未配置、未命中或出错时返回 _MISSING"""
+    cache = get_shared_cache()
+    if cache is None:
+        return _MISSING
+    try:
+        value = cache.get(_NAMESPACE + key)
+    except Exception:
+        metrics.incr("shared_cache.error")
+        return _MISSING
+    metrics.incr("shared_cache.miss" if value is _MISSING else "shared_cache.hit")
+    return value
+
+def shared_set(key: str, value, ttl: float = None) -> None:
+    """写入共享缓存，未配置或出错时忽略"""
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    try:
+        cache.set(_NAMESPACE + key, value, ttl)
+    except Exception:
+        metrics.incr("shared_cache.error")